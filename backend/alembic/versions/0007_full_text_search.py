@@ -0,0 +1,46 @@
+"""full-text search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:40:12.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db import fts
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("medicines", "users")
+
+
+def _statements(table: str, create: bool):
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return fts.sqlite_ddl(table) if create else fts.sqlite_drop_ddl(table)
+    if dialect == "mysql":
+        return fts.mysql_ddl(table) if create else fts.mysql_drop_ddl(table)
+    return []
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        for statement in _statements(table, create=True):
+            op.execute(statement)
+        # Index the rows that already exist
+        fts.rebuild(op.get_bind(), table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for statement in _statements(table, create=False):
+            op.execute(statement)
@@ -0,0 +1,74 @@
+"""hospital tenancy
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 19:16:26.680395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import fts
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, index on the new column)
+TABLES = (
+    ('appointments', 'ix_appointments_hospital_scheduled', ['hospital_id', 'scheduled_time']),
+    ('inventory', 'ix_inventory_hospital_medicine', ['hospital_id', 'medicine_id']),
+    ('lab_orders', 'ix_lab_orders_hospital_ordered', ['hospital_id', 'ordered_at']),
+    ('pharmacy_orders', 'ix_pharmacy_orders_hospital_ordered', ['hospital_id', 'ordered_at']),
+    ('prescriptions', 'ix_prescriptions_hospital_issued', ['hospital_id', 'date_issued']),
+    ('users', 'ix_users_hospital_id', ['hospital_id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table, index, columns in TABLES:
+        if sqlite:
+            # SQLite cannot add constraints later, but takes an inline
+            # REFERENCES without rebuilding the table
+            op.execute(f"ALTER TABLE {table} ADD COLUMN hospital_id INTEGER REFERENCES hospitals (id)")
+        else:
+            op.add_column(table, sa.Column('hospital_id', sa.Integer(), nullable=True))
+            op.create_foreign_key(f'fk_{table}_hospital_id', table, 'hospitals', ['hospital_id'], ['id'])
+        op.create_index(index, table, columns, unique=False)
+
+    # Staff get the first hospital that lists them as their home hospital
+    op.execute(
+        "UPDATE users SET hospital_id = "
+        "(SELECT MIN(staff.hospital_id) FROM staff WHERE staff.user_id = users.id)"
+    )
+    # Existing appointments and prescriptions belong to their doctor's hospital
+    for table in ('appointments', 'prescriptions'):
+        op.execute(
+            f"UPDATE {table} SET hospital_id = (SELECT users.hospital_id FROM doctors "
+            f"JOIN users ON users.id = doctors.user_id WHERE doctors.id = {table}.doctor_id)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table, index, _ in reversed(TABLES):
+        op.drop_index(index, table_name=table)
+        if sqlite:
+            # Rebuilds the table, which drops its triggers
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('hospital_id')
+            if table in fts.INDEXED_COLUMNS:
+                for statement in fts.sqlite_ddl(table)[2:]:
+                    op.execute(statement)
+        else:
+            op.drop_constraint(f'fk_{table}_hospital_id', table, type_='foreignkey')
+            op.drop_column(table, 'hospital_id')
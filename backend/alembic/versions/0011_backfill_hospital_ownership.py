@@ -0,0 +1,94 @@
+"""backfill hospital ownership
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 09:12:04.518230
+
+0008 only assigned appointments and prescriptions to a hospital. Rows left
+with a NULL hospital_id are invisible to every hospital's staff, so this
+fills in the rest where an owner can be derived:
+
+- inventory: the hospital of the staff member who created the medicine;
+- pharmacy orders: the hospital of the batch their stock was reserved from;
+- lab and pharmacy orders: the patient's hospital, when all of their
+  appointments are at one;
+- anything still unowned, when there is only one hospital.
+
+If rows remain, the upgrade fails and lists them. Assign them by hand, e.g.
+
+    UPDATE lab_orders SET hospital_id = <id> WHERE hospital_id IS NULL;
+
+and run the upgrade again. Alternatively, pass ``-x allow_unowned=true`` to
+leave them to admins and system admins, the only roles that still see them.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('appointments', 'prescriptions', 'inventory', 'lab_orders', 'pharmacy_orders')
+
+# Hospital of the patient's appointments, if they are all at the same one
+PATIENT_HOSPITAL = (
+    "(SELECT MIN(appointments.hospital_id) FROM appointments "
+    "WHERE appointments.patient_id = {table}.patient_id "
+    "HAVING COUNT(DISTINCT appointments.hospital_id) = 1)"
+)
+
+
+def _fill(table: str, owner: str) -> None:
+    op.execute(f"UPDATE {table} SET hospital_id = {owner} WHERE hospital_id IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # Again, for rows written between 0008 and tenancy-aware handlers
+    for table in ('appointments', 'prescriptions'):
+        _fill(table, (
+            f"(SELECT users.hospital_id FROM doctors JOIN users ON users.id = doctors.user_id "
+            f"WHERE doctors.id = {table}.doctor_id)"
+        ))
+    _fill('inventory', (
+        "(SELECT users.hospital_id FROM medicines JOIN users ON users.id = medicines.created_by "
+        "WHERE medicines.id = inventory.medicine_id)"
+    ))
+    _fill('pharmacy_orders', (
+        "(SELECT MIN(inventory.hospital_id) FROM stock_reservations "
+        "JOIN inventory ON inventory.id = stock_reservations.inventory_id "
+        "WHERE stock_reservations.order_id = pharmacy_orders.id)"
+    ))
+    for table in ('lab_orders', 'pharmacy_orders'):
+        _fill(table, PATIENT_HOSPITAL.format(table=table))
+
+    hospitals = conn.execute(sa.text("SELECT id FROM hospitals")).scalars().all()
+    if len(hospitals) == 1:
+        for table in TABLES:
+            _fill(table, str(int(hospitals[0])))
+
+    unowned = {
+        table: count for table in TABLES
+        if (count := conn.execute(sa.text(f"SELECT COUNT(*) FROM {table} WHERE hospital_id IS NULL")).scalar())
+    }
+    allowed = context.get_x_argument(as_dictionary=True).get('allow_unowned', '').lower() == 'true'
+    if unowned and not allowed:
+        listing = ", ".join(f"{table}: {count}" for table, count in unowned.items())
+        raise RuntimeError(
+            f"Rows with no derivable hospital ({listing}). Set their hospital_id by hand "
+            f"and upgrade again, or pass -x allow_unowned=true to leave them to admins; "
+            f"see the docstring of revision 0011."
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data only; which rows were filled here is not recorded, so they keep their hospital
+    pass
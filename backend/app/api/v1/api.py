@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, patients, doctors, appointments, prescriptions, lab, pharmacy, hospitals, system_admin
+from app.api.v1.endpoints import auth, patients, doctors, appointments, prescriptions, lab, pharmacy, hospitals, system_admin, jobs, events
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
@@ -10,4 +10,6 @@ api_router.include_router(prescriptions.router)
 api_router.include_router(lab.router)
 api_router.include_router(pharmacy.router)
 api_router.include_router(hospitals.router)
-api_router.include_router(system_admin.router) 
\ No newline at end of file
+api_router.include_router(system_admin.router) 
+api_router.include_router(jobs.router)
+api_router.include_router(events.router)
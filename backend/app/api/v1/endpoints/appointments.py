@@ -1,109 +1,258 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.schemas.appointment import AppointmentCreate, AppointmentRead, AppointmentUpdate
-from app.db.models.appointment import Appointment
-from app.core.dependencies import get_db, require_roles
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app.db.schemas.appointment import AppointmentCreate, AppointmentRead, AppointmentUpdate, AppointmentStatusBatch
+from app.db.schemas.batch import BatchResult
+from app.db.schemas.doctor import AvailableSlots
+from app.db.models.appointment import FREE_STATUSES, Appointment
+from app.db.models.doctor import Doctor
+from app.db.models.patient import Patient
+from app.db.models.user import User
+from app.db.schemas.pagination import Page
+from app.core.dependencies import get_async_db, require_roles, get_page_params, get_async_read_db
+from app.core import events
+from app.core.batch import BatchOutcomes
+from app.core.pagination import PageParams, paginate_async
+from app.core.serialization import json_response, page_data, schema_columns
+from app.core.slots import MAX_HORIZON_DAYS, find_free_slots, is_slot_start, naive_utc
+from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
-@router.get("/", response_model=List[AppointmentRead])
-def list_appointments(db: Session = Depends(get_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+APPOINTMENT_SORT_KEYS = {"scheduled_time": Appointment.scheduled_time}
+
+SLOT_TAKEN = "This time slot is already booked"
+
+async def _check_slot(db: AsyncSession, doctor_id: int, when: datetime, appointment_id: int = None):
+    if not await is_slot_start(db, doctor_id, when):
+        raise HTTPException(status_code=400, detail="Requested time is not one of the doctor's slots")
+    # Unique index lookup; the constraint itself still decides races at commit
+    stmt = select(Appointment.id).where(Appointment.doctor_id == doctor_id, Appointment.booked_slot == when)
+    if appointment_id is not None:
+        stmt = stmt.where(Appointment.id != appointment_id)
+    if (await db.execute(stmt.limit(1))).first():
+        raise HTTPException(status_code=409, detail=SLOT_TAKEN)
+
+def _check_version(appt: Appointment, values: dict):
+    version = values.pop("version", None)
+    if version is not None and version != appt.version:
+        raise HTTPException(status_code=409, detail="Appointment was changed by someone else; reload and retry")
+
+async def _commit_booking(db: AsyncSession, *changed: Appointment):
+    try:
+        # Flushed first so new rows have their ids for the events
+        await db.flush()
+        # Topics are per user, so map the patients and doctors rows to theirs
+        patient_users = dict((await db.execute(
+            select(Patient.id, Patient.user_id).where(Patient.id.in_({appt.patient_id for appt in changed}))
+        )).all())
+        doctor_users = dict((await db.execute(
+            select(Doctor.id, Doctor.user_id).where(Doctor.id.in_({appt.doctor_id for appt in changed}))
+        )).all())
+        for appt in changed:
+            events.notify(
+                db, (patient_users.get(appt.patient_id), doctor_users.get(appt.doctor_id)), "appointment",
+                id=appt.id, status=appt.status, scheduled_time=appt.scheduled_time,
+            )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=SLOT_TAKEN)
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Appointment was changed by someone else; reload and retry")
+
+async def _own_record_id(db: AsyncSession, user) -> Optional[int]:
+    # Appointments reference patients.id and doctors.id, not users.id
+    model = Patient if user.role == "patient" else Doctor
+    return (await db.execute(select(model.id).where(model.user_id == user.id))).scalar()
+
+@router.get("/", response_model=Page[AppointmentRead])
+async def list_appointments(page: PageParams = Depends(get_page_params), db: AsyncSession = Depends(get_async_read_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
     # Admin, doctor, hospital admin see all; patient sees their own
+    stmt = select(*schema_columns(Appointment, AppointmentRead))
     if user.role == "patient":
-        return db.query(Appointment).filter(Appointment.patient_id == user.id).all()
+        stmt = stmt.where(Appointment.patient_id.in_(select(Patient.id).where(Patient.user_id == user.id)))
     elif user.role == "doctor":
-        return db.query(Appointment).filter(Appointment.doctor_id == user.id).all()
-    return db.query(Appointment).all()
+        stmt = stmt.where(Appointment.doctor_id.in_(select(Doctor.id).where(Doctor.user_id == user.id)))
+    return json_response(page_data(await paginate_async(db, stmt, page, Appointment.id, APPOINTMENT_SORT_KEYS, rows=True)))
 
 @router.post("/", response_model=AppointmentRead)
-def create_appointment(appt: AppointmentCreate, db: Session = Depends(get_db), user=Depends(require_roles("patient"))):
-    # Only patients can create
-    new_appt = Appointment(**appt.dict())
+async def create_appointment(appt: AppointmentCreate, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("patient"))):
+    # Only patients can create, and only for themselves
+    if appt.patient_id != await _own_record_id(db, user):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    await _check_slot(db, appt.doctor_id, appt.scheduled_time)
+    # The appointment belongs to the doctor's hospital
+    hospital_id = (await db.execute(
+        select(User.hospital_id).join(Doctor, Doctor.user_id == User.id).where(Doctor.id == appt.doctor_id)
+    )).scalar()
+    new_appt = Appointment(**appt.dict(), hospital_id=hospital_id)
     db.add(new_appt)
-    db.commit()
-    db.refresh(new_appt)
+    await _commit_booking(db, new_appt)
+    await db.refresh(new_appt)
     return new_appt
 
 @router.put("/{appointment_id}", response_model=AppointmentRead)
-def update_appointment(appointment_id: int, update: AppointmentUpdate, db: Session = Depends(get_db), user=Depends(require_roles("doctor", "patient", "hospital_admin"))):
-    appt = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+async def update_appointment(appointment_id: int, update: AppointmentUpdate, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("doctor", "patient", "hospital_admin"))):
+    appt = await db.get(Appointment, appointment_id)
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
     # Patient can only update their own, doctor their own
-    if user.role == "patient" and appt.patient_id != user.id:
+    if user.role == "patient" and appt.patient_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    if user.role == "doctor" and appt.doctor_id != user.id:
+    if user.role == "doctor" and appt.doctor_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    for key, value in update.dict(exclude_unset=True).items():
+    values = update.dict(exclude_unset=True)
+    _check_version(appt, values)
+    if "scheduled_time" in values and values["scheduled_time"] != appt.scheduled_time:
+        await _check_slot(db, appt.doctor_id, values["scheduled_time"], appt.id)
+    for key, value in values.items():
         setattr(appt, key, value)
-    db.commit()
-    db.refresh(appt)
+    await _commit_booking(db, appt)
+    await db.refresh(appt)
     return appt
 
+@router.post("/status-changes", response_model=BatchResult)
+async def change_statuses(batch: AppointmentStatusBatch, atomic: bool = False, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("doctor", "hospital_admin"))):
+    """Set the status of many appointments in one transaction, e.g. closing a clinic day"""
+    items = batch.items
+    outcomes = BatchOutcomes(len(items))
+    appts = {
+        appt.id: appt
+        for appt in (await db.execute(select(Appointment).where(Appointment.id.in_({item.id for item in items})))).scalars()
+    }
+    # Un-cancelling takes the slot back, so it must still be free
+    reclaimed = [appts[item.id] for item in items if item.id in appts and item.status not in FREE_STATUSES and appts[item.id].booked_slot is None]
+    taken = set()
+    if reclaimed:
+        taken = set((await db.execute(
+            select(Appointment.doctor_id, Appointment.booked_slot).where(
+                Appointment.doctor_id.in_({appt.doctor_id for appt in reclaimed}),
+                Appointment.booked_slot.in_({appt.scheduled_time for appt in reclaimed}),
+            )
+        )).all())
+    # Appointments name doctors.id; the caller is a users.id
+    doctor_users = {}
+    if user.role == "doctor":
+        doctor_users = dict((await db.execute(
+            select(Doctor.id, Doctor.user_id).where(Doctor.id.in_({appt.doctor_id for appt in appts.values()}))
+        )).all())
+
+    changed = {}
+    for index, item in enumerate(items):
+        appt = appts.get(item.id)
+        if appt is None:
+            outcomes.fail(index, "Appointment not found")
+        elif user.role == "doctor" and doctor_users.get(appt.doctor_id) != user.id:
+            outcomes.fail(index, "Not enough permissions")
+        elif item.id in changed:
+            outcomes.fail(index, "Appointment appears more than once in the batch")
+        elif item.version is not None and item.version != appt.version:
+            outcomes.fail(index, "Appointment was changed by someone else; reload and retry")
+        elif item.status == appt.status:
+            outcomes.ok(index, "unchanged", appt.id)
+        elif appt in reclaimed and (appt.doctor_id, appt.scheduled_time) in taken:
+            outcomes.fail(index, SLOT_TAKEN)
+        else:
+            if appt in reclaimed:
+                taken.add((appt.doctor_id, appt.scheduled_time))
+            changed[item.id] = item.status
+            outcomes.ok(index, "updated", appt.id)
+    if not outcomes.should_apply(atomic):
+        return outcomes.result(committed=False)
+
+    # Through the ORM, not a bulk UPDATE, so version checks and booked_slot sync still apply
+    for appointment_id, new_status in changed.items():
+        appts[appointment_id].status = new_status
+    await _commit_booking(db, *(appts[appointment_id] for appointment_id in changed))
+    return outcomes.result(committed=True)
+
 @router.delete("/{appointment_id}")
-def delete_appointment(appointment_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin", "patient"))):
-    appt = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+async def delete_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("admin", "hospital_admin", "patient"))):
+    appt = await db.get(Appointment, appointment_id)
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    if user.role == "patient" and appt.patient_id != user.id:
+    if user.role == "patient" and appt.patient_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    db.delete(appt)
-    db.commit()
+    await db.delete(appt)
+    await db.commit()
     return {"ok": True}
 
-@router.get("/available-slots")
-def get_available_slots():
-    # Placeholder: implement slot logic
-    return {"slots": []}
+@router.get("/available-slots", response_model=AvailableSlots)
+async def get_available_slots(
+    doctor_id: Optional[int] = None,
+    department: Optional[str] = None,
+    start: Optional[datetime] = None,
+    days: int = Query(14, ge=1, le=MAX_HORIZON_DAYS),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+    user=Depends(require_roles("admin", "hospital_admin", "doctor", "patient"))
+):
+    """Next free slots for one doctor or for everyone in a department"""
+    if doctor_id is not None:
+        doctor_ids = [doctor_id]
+    elif department:
+        result = await db.execute(select(Doctor.id).where(Doctor.department == department))
+        doctor_ids = result.scalars().all()
+    else:
+        raise HTTPException(status_code=400, detail="doctor_id or department is required")
+    start = naive_utc(start) if start is not None else datetime.utcnow()
+    return await find_free_slots(db, doctor_ids, start, limit, days)
 
 @router.put("/{appointment_id}/reschedule", response_model=AppointmentRead)
-def reschedule_appointment(
+async def reschedule_appointment(
     appointment_id: int,
     update: AppointmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles("patient", "doctor"))
 ):
     """Reschedule an appointment"""
-    appt = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appt = await db.get(Appointment, appointment_id)
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    
+
     # Check if user has permission to reschedule this appointment
-    if user.role == "patient" and appt.patient_id != user.id:
+    if user.role == "patient" and appt.patient_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not authorized to reschedule this appointment")
-    elif user.role == "doctor" and appt.doctor_id != user.id:
+    elif user.role == "doctor" and appt.doctor_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not authorized to reschedule this appointment")
-    
+
     # Update appointment details
-    for key, value in update.dict(exclude_unset=True).items():
+    values = update.dict(exclude_unset=True)
+    _check_version(appt, values)
+    if "scheduled_time" in values and values["scheduled_time"] != appt.scheduled_time:
+        await _check_slot(db, appt.doctor_id, values["scheduled_time"], appt.id)
+    for key, value in values.items():
         setattr(appt, key, value)
-    
+
     appt.status = "pending"  # Reset status to pending for approval
-    db.commit()
-    db.refresh(appt)
-    
+    await _commit_booking(db, appt)
+    await db.refresh(appt)
+
     return appt
 
 @router.post("/{appointment_id}/start-consultation")
-def start_consultation(
+async def start_consultation(
     appointment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(require_roles("doctor"))
 ):
     """Start a consultation for an appointment"""
-    appt = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appt = await db.get(Appointment, appointment_id)
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appt.doctor_id != user.id:
+
+    if appt.doctor_id != await _own_record_id(db, user):
         raise HTTPException(status_code=403, detail="Not authorized to start this consultation")
-    
+
     if appt.status != "confirmed":
         raise HTTPException(status_code=400, detail="Appointment must be confirmed to start consultation")
-    
+
     appt.status = "in-progress"
-    db.commit()
-    
-    return {"message": "Consultation started successfully"} 
\ No newline at end of file
+    await _commit_booking(db, appt)
+
+    return {"message": "Consultation started successfully"}
@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.schemas.user import UserCreate, UserRead, UserLogin, UserResponse, PasswordChange
 from app.db.models.user import User
-from app.core.security import hash_password, verify_password, get_password_hash, create_access_token
-from app.core.dependencies import get_db, get_current_user
+from app.core.security import (
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async,
+    verify_and_update_password_async,
+)
+from app.core.process_pool import PoolSaturated
+from app.core.dependencies import get_async_db, get_current_user
+from app.core.principal import Principal
 from app.core.config import settings
 import traceback
 import logging
@@ -15,13 +23,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
         logger.info(f"Attempting to register user: {user_data.email}")
         
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        result = await db.execute(select(User).where(User.email == user_data.email))
+        existing_user = result.scalars().first()
         if existing_user:
             logger.warning(f"User already exists: {user_data.email}")
             raise HTTPException(
@@ -31,7 +40,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         
         # Create new user
         logger.info("Creating new user...")
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         db_user = User(
             email=user_data.email,
             hashed_password=hashed_password,
@@ -45,34 +54,44 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         
         logger.info("Adding user to database...")
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         logger.info(f"Successfully registered user: {user_data.email}")
         return UserResponse.from_orm(db_user)
         
+    except (HTTPException, PoolSaturated):
+        raise
     except Exception as e:
         logger.error(f"Registration error: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
 
 @router.post("/login")
-def login(email: str, password: str, db: Session = Depends(get_db)):
+async def login(email: str, password: str, db: AsyncSession = Depends(get_async_db)):
     """Login user and return JWT token"""
     try:
         logger.info(f"Attempting login for user: {email}")
         
-        user = db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.hashed_password):
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
+        valid, new_hash = (False, None)
+        if user:
+            valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
             logger.warning(f"Invalid credentials for user: {email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
+        if new_hash:
+            # Stored hash used an outdated scheme or cost factor
+            user.hashed_password = new_hash
+            await db.commit()
         
         token_data = {"sub": email, "role": user.role}
         token = create_access_token(token_data)
@@ -84,6 +103,8 @@ def login(email: str, password: str, db: Session = Depends(get_db)):
             "user": UserResponse.from_orm(user)
         }
         
+    except (HTTPException, PoolSaturated):
+        raise
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -93,26 +114,27 @@ def login(email: str, password: str, db: Session = Depends(get_db)):
         )
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
+    current_user = await db.get(User, principal.id)
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    # Update password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    # Update password; committing the User row also evicts its cached principal
+    current_user.hashed_password = await get_password_hash_async(password_data.new_password)
+    await db.commit()
     
     return {"message": "Password changed successfully"}
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
     return UserResponse.from_orm(current_user) 
\ No newline at end of file
@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.db.schemas.doctor import DoctorCreate, DoctorRead, DoctorUpdate
-from app.db.models.doctor import Doctor
-from app.core.dependencies import get_db, require_roles
+from app.db.schemas.doctor import DoctorCreate, DoctorRead, DoctorUpdate, DoctorScheduleEntry, DoctorScheduleRead
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.user import User
+from app.db.schemas.pagination import Page
+from app.core.dependencies import get_db, require_roles, get_page_params, get_read_db
+from app.core.pagination import PageParams, paginate
+from app.core import response_cache
+from app.core.slots import check_templates
+from app.core.serialization import page_data, schema_columns
+from app.db import tenancy
 from typing import List
 
 router = APIRouter(prefix="/doctors", tags=["doctors"])
 
-@router.get("/", response_model=List[DoctorRead])
-def list_doctors(db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin", "patient"))):
-    return db.query(Doctor).all()
+@router.get("/", response_model=Page[DoctorRead])
+def list_doctors(request: Request, page: PageParams = Depends(get_page_params), db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin", "patient"))):
+    return response_cache.cached_response_sync(
+        request, "doctors", "all",
+        lambda: page_data(paginate(db.query(*schema_columns(Doctor, DoctorRead)), page, Doctor.id)),
+    )
 
 @router.get("/{doctor_id}", response_model=DoctorRead)
-def get_doctor(doctor_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin", "patient", "doctor"))):
+def get_doctor(doctor_id: int, db: Session = Depends(get_read_db), user=Depends(require_roles("admin", "hospital_admin", "patient", "doctor"))):
     doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
@@ -30,15 +40,44 @@ def update_doctor(doctor_id: int, update: DoctorUpdate, db: Session = Depends(ge
     for key, value in update.dict(exclude_unset=True).items():
         setattr(doctor, key, value)
     db.commit()
+    response_cache.invalidate("doctors")
     db.refresh(doctor)
     return doctor
 
-@router.get("/{doctor_id}/schedule")
-def get_doctor_schedule(doctor_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin", "doctor"))):
-    # Placeholder: implement schedule logic
-    return {"doctor_id": doctor_id, "schedule": []}
+def _schedule(db: Session, doctor_id: int):
+    templates = (
+        db.query(DoctorSchedule)
+        .filter(DoctorSchedule.doctor_id == doctor_id)
+        .order_by(DoctorSchedule.weekday, DoctorSchedule.start_time)
+        .all()
+    )
+    return {"doctor_id": doctor_id, "schedule": templates}
 
-@router.put("/{doctor_id}/schedule")
-def update_doctor_schedule(doctor_id: int, db: Session = Depends(get_db), user=Depends(require_roles("doctor", "hospital_admin"))):
-    # Placeholder: implement update schedule logic
-    return {"doctor_id": doctor_id, "schedule": []} 
\ No newline at end of file
+@router.get("/{doctor_id}/schedule", response_model=DoctorScheduleRead)
+def get_doctor_schedule(doctor_id: int, db: Session = Depends(get_read_db), user=Depends(require_roles("admin", "hospital_admin", "doctor"))):
+    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if user.role == "doctor" and doctor.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return _schedule(db, doctor_id)
+
+@router.put("/{doctor_id}/schedule", response_model=DoctorScheduleRead)
+def update_doctor_schedule(doctor_id: int, schedule: List[DoctorScheduleEntry], db: Session = Depends(get_db), user=Depends(require_roles("doctor", "hospital_admin"))):
+    """Replace the doctor's weekly working-hour templates"""
+    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    if user.role == "doctor" and doctor.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    # Doctors are not hospital-scoped rows; they belong to their user's hospital
+    hospital_id = db.query(User.hospital_id).filter(User.id == doctor.user_id).scalar()
+    if not tenancy.can_access(user, hospital_id):
+        raise HTTPException(status_code=403, detail="Not authorized for this hospital")
+    problem = check_templates(schedule)
+    if problem:
+        raise HTTPException(status_code=400, detail=problem)
+    db.query(DoctorSchedule).filter(DoctorSchedule.doctor_id == doctor_id).delete()
+    db.add_all(DoctorSchedule(doctor_id=doctor_id, **entry.dict()) for entry in schedule)
+    db.commit()
+    return _schedule(db, doctor_id)
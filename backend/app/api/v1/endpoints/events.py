@@ -0,0 +1,71 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from app.core import events
+from app.core.config import settings
+from app.core.dependencies import credentials_exception, get_current_user, get_token_claims
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Sent when a connection has been idle for EVENTS_HEARTBEAT_SECONDS
+PING = ("ping", '{"type":"ping"}')
+# How long an SSE client waits before reconnecting
+SSE_RETRY_MS = 3000
+
+async def _authenticate(headers, token: Optional[str]):
+    # Browsers cannot set headers on EventSource or WebSocket, so the token
+    # may also come as ?token=
+    scheme, _, value = headers.get("authorization", "").partition(" ")
+    token = value if scheme.lower() == "bearer" and value else token
+    if not token:
+        raise credentials_exception
+    return await get_current_user(get_token_claims(token))
+
+async def stream_user(request: Request, token: Optional[str] = Query(None)):
+    return await _authenticate(request.headers, token)
+
+async def _sse(user_id: int):
+    with events.broker.subscribe("sse", events.user_topic(user_id)) as subscription:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            messages = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+            if not messages:
+                yield ": ping\n\n"
+                continue
+            yield "".join(f"event: {event_type}\ndata: {data}\n\n" for event_type, data in messages)
+
+@router.get("/stream")
+async def event_stream(user=Depends(stream_user)):
+    """Server-sent events for the caller: appointment, lab, pharmacy order and job status changes"""
+    return StreamingResponse(
+        _sse(user.id),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def event_socket(websocket: WebSocket, token: Optional[str] = None):
+    """The same events as /events/stream, one JSON text message each"""
+    try:
+        user = await _authenticate(websocket.headers, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    with events.broker.subscribe("websocket", events.user_topic(user.id)) as subscription:
+
+        async def push():
+            while True:
+                for _, data in await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS) or [PING]:
+                    await websocket.send_text(data)
+
+        sender = asyncio.create_task(push())
+        try:
+            # Nothing clients send is acted on; reading is how a close is noticed
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
@@ -1,37 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.schemas.hospital import HospitalCreate, HospitalRead, DepartmentCreate, DepartmentRead, StaffCreate, StaffRead
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.schemas.hospital import HospitalCreate, HospitalRead, DepartmentCreate, DepartmentRead, StaffCreate, StaffRead, StaffImport
+from app.db.schemas.batch import BatchResult
 from app.db.models.hospital import Hospital, Department, Staff
-from app.core.dependencies import get_db, require_roles, get_current_user
+from app.core.dependencies import get_async_db, require_roles, get_current_user, get_async_read_db
+from app.core import response_cache, rollups
+from app.core.batch import BatchOutcomes
+from app.core.serialization import row_dicts, schema_columns
+from app.db import tenancy
 from typing import List
 from app.db.models.user import User
 from app.db.schemas.hospital import HospitalResponse, HospitalUpdate
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/hospitals", tags=["hospitals"])
 
 @router.get("/", response_model=List[HospitalResponse])
-def get_hospitals(
-    db: Session = Depends(get_db),
+async def get_hospitals(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get hospitals based on user role"""
     if current_user.role == "system_admin":
         # System admin sees all hospitals
-        hospitals = db.query(Hospital).all()
+        stmt = select(*schema_columns(Hospital, HospitalResponse))
+        variant = "all"
     elif current_user.role == "hospital_admin":
         # Hospital admin sees only their hospital
-        hospitals = db.query(Hospital).filter(Hospital.id == current_user.hospital_id).all()
+        stmt = select(*schema_columns(Hospital, HospitalResponse)).where(Hospital.id == current_user.hospital_id)
+        variant = f"user:{current_user.id}"
     else:
         # Other users see approved hospitals only
-        hospitals = db.query(Hospital).filter(Hospital.status == "approved").all()
+        stmt = select(*schema_columns(Hospital, HospitalResponse)).where(Hospital.status == "approved")
+        variant = "approved"
+
+    async def load():
+        return row_dicts((await db.execute(stmt)).all())
     
-    return [HospitalResponse.from_orm(hospital) for hospital in hospitals]
+    return await response_cache.cached_response(request, "hospitals", variant, load)
 
 @router.post("/", response_model=HospitalResponse)
-def create_hospital(
+async def create_hospital(
     hospital: HospitalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["system_admin"]))
 ):
     """Create a new hospital (system admin only)"""
@@ -44,19 +58,20 @@ def create_hospital(
         created_by=current_user.id
     )
     db.add(db_hospital)
-    db.commit()
-    db.refresh(db_hospital)
+    await db.commit()
+    response_cache.invalidate("hospitals")
+    await db.refresh(db_hospital)
     return HospitalResponse.from_orm(db_hospital)
 
 @router.put("/{hospital_id}", response_model=HospitalResponse)
-def update_hospital(
+async def update_hospital(
     hospital_id: int,
     hospital_update: HospitalUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["system_admin", "hospital_admin"]))
 ):
     """Update hospital information"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     
@@ -68,18 +83,19 @@ def update_hospital(
     for key, value in hospital_update.dict(exclude_unset=True).items():
         setattr(hospital, key, value)
     
-    db.commit()
-    db.refresh(hospital)
+    await db.commit()
+    response_cache.invalidate("hospitals")
+    await db.refresh(hospital)
     return HospitalResponse.from_orm(hospital)
 
 @router.post("/{hospital_id}/approve")
-def approve_hospital(
+async def approve_hospital(
     hospital_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["system_admin"]))
 ):
     """Approve a hospital (system admin only)"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     
@@ -89,19 +105,20 @@ def approve_hospital(
     hospital.status = "approved"
     hospital.approved_at = datetime.now()
     hospital.approved_by = current_user.id
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("hospitals")
     
     return {"message": "Hospital approved successfully"}
 
 @router.post("/{hospital_id}/reject")
-def reject_hospital(
+async def reject_hospital(
     hospital_id: int,
     reason: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["system_admin"]))
 ):
     """Reject a hospital (system admin only)"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     
@@ -112,43 +129,46 @@ def reject_hospital(
     hospital.rejection_reason = reason
     hospital.rejected_at = datetime.now()
     hospital.rejected_by = current_user.id
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("hospitals")
     
     return {"message": "Hospital rejected successfully"}
 
 @router.delete("/{hospital_id}")
-def delete_hospital(
+async def delete_hospital(
     hospital_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["system_admin"]))
 ):
     """Delete a hospital (system admin only)"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     
-    db.delete(hospital)
-    db.commit()
+    await db.delete(hospital)
+    await db.commit()
+    response_cache.invalidate("hospitals")
     
     return {"message": "Hospital deleted successfully"}
 
 @router.get("/pending")
-def get_pending_hospitals(
-    db: Session = Depends(get_db),
+async def get_pending_hospitals(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_roles(["system_admin"]))
 ):
     """Get all pending hospitals for system admin review"""
-    hospitals = db.query(Hospital).filter(Hospital.status == "pending").all()
+    result = await db.execute(select(Hospital).where(Hospital.status == "pending"))
+    hospitals = result.scalars().all()
     return [HospitalResponse.from_orm(hospital) for hospital in hospitals]
 
 @router.get("/{hospital_id}/departments")
-def get_hospital_departments(
+async def get_hospital_departments(
     hospital_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get departments for a specific hospital"""
-    hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+    hospital = await db.get(Hospital, hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
     
@@ -163,28 +183,124 @@ def get_hospital_departments(
         ]
     }
 
+def _check_access(user, hospital_id: int):
+    if not tenancy.can_access(user, hospital_id):
+        raise HTTPException(status_code=403, detail="Not authorized for this hospital")
+
 @router.get("/{hospital_id}/departments", response_model=List[DepartmentRead])
-def list_departments(hospital_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin"))):
-    return db.query(Department).filter(Department.hospital_id == hospital_id).all()
+async def list_departments(hospital_id: int, db: AsyncSession = Depends(get_async_read_db), user=Depends(require_roles("admin", "hospital_admin"))):
+    _check_access(user, hospital_id)
+    result = await db.execute(select(Department).where(Department.hospital_id == hospital_id))
+    return result.scalars().all()
 
 @router.post("/{hospital_id}/departments", response_model=DepartmentRead)
-def create_department(hospital_id: int, dep: DepartmentCreate, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin"))):
+async def create_department(hospital_id: int, dep: DepartmentCreate, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("admin", "hospital_admin"))):
+    _check_access(user, hospital_id)
     new_dep = Department(**dep.dict(), hospital_id=hospital_id)
     db.add(new_dep)
-    db.commit()
-    db.refresh(new_dep)
+    await db.commit()
+    await db.refresh(new_dep)
     return new_dep
 
 @router.get("/{hospital_id}/staff", response_model=List[StaffRead])
-def list_staff(hospital_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin"))):
-    return db.query(Staff).filter(Staff.hospital_id == hospital_id).all()
+async def list_staff(hospital_id: int, db: AsyncSession = Depends(get_async_read_db), user=Depends(require_roles("admin", "hospital_admin"))):
+    _check_access(user, hospital_id)
+    result = await db.execute(select(Staff).where(Staff.hospital_id == hospital_id))
+    return result.scalars().all()
+
+@router.post("/{hospital_id}/staff/import", response_model=BatchResult)
+async def import_staff(hospital_id: int, batch: StaffImport, atomic: bool = False, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("admin", "hospital_admin"))):
+    """Add existing users to the hospital's staff in one transaction, creating departments by name"""
+    _check_access(user, hospital_id)
+    if await db.get(Hospital, hospital_id) is None:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    items = batch.items
+    outcomes = BatchOutcomes(len(items))
+    users = {
+        u.email: u
+        for u in (await db.execute(select(User).where(User.email.in_({item.email for item in items})))).scalars()
+    }
+    already = set((await db.execute(
+        select(Staff.user_id).where(Staff.hospital_id == hospital_id, Staff.user_id.in_({u.id for u in users.values()}))
+    )).scalars())
+    departments = {
+        d.name: d
+        for d in (await db.execute(select(Department).where(Department.hospital_id == hospital_id))).scalars()
+    }
+
+    new_staff = {}
+    for index, item in enumerate(items):
+        member = users.get(item.email)
+        if member is None:
+            outcomes.fail(index, "User not found")
+        elif member.hospital_id not in (None, hospital_id):
+            outcomes.fail(index, "User belongs to another hospital")
+        elif member.id in already or member.id in new_staff:
+            outcomes.ok(index, "unchanged")
+        else:
+            department = None
+            if item.department:
+                department = departments.get(item.department)
+                if department is None:
+                    department = departments[item.department] = Department(name=item.department, hospital_id=hospital_id)
+            new_staff[member.id] = (index, Staff(user_id=member.id, hospital_id=hospital_id, department=department, role=item.role))
+    for index, _ in new_staff.values():
+        outcomes.ok(index, "created")
+    if not outcomes.should_apply(atomic):
+        return outcomes.result(committed=False)
+
+    db.add_all(staff for _, staff in new_staff.values())
+    assigned = False
+    for member in users.values():
+        # Through the ORM so cached principals of these users are refreshed
+        if member.id in new_staff and member.hospital_id is None:
+            member.hospital_id = hospital_id
+            assigned = True
+    await db.commit()
+    if assigned:
+        response_cache.invalidate("hospitals")
+    for index, staff in new_staff.values():
+        outcomes.ok(index, "created", staff.id)
+    return outcomes.result(committed=True)
 
 @router.get("/{hospital_id}/reports")
-def get_hospital_reports(hospital_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin"))):
-    # Placeholder: implement report logic
-    return {"hospital_id": hospital_id, "reports": []}
+async def get_hospital_reports(
+    hospital_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    user=Depends(require_roles("admin", "hospital_admin"))
+):
+    """Activity totals for [start, end], from the dashboard rollups (default: last 30 days)"""
+    _check_access(user, hospital_id)
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    rows = (await db.execute(rollups.stats_stmt(start, end + timedelta(days=1), [hospital_id]))).all()
+    as_of = (await db.execute(rollups.last_refresh_stmt())).scalar()
+    return {
+        "hospital_id": hospital_id,
+        "start": start,
+        "end": end,
+        "reports": rollups.totals(rows),
+        **rollups.freshness(as_of),
+    }
 
 @router.get("/{hospital_id}/analytics")
-def get_hospital_analytics(hospital_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "hospital_admin"))):
-    # Placeholder: implement analytics logic
-    return {"hospital_id": hospital_id, "analytics": {}} 
\ No newline at end of file
+async def get_hospital_analytics(
+    hospital_id: int,
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_read_db),
+    user=Depends(require_roles("admin", "hospital_admin"))
+):
+    """Daily activity for the last ``days`` days, from the dashboard rollups"""
+    _check_access(user, hospital_id)
+    start = date.today() - timedelta(days=days - 1)
+    rows = (await db.execute(rollups.stats_stmt(start, date.today() + timedelta(days=1), [hospital_id]))).all()
+    as_of = (await db.execute(rollups.last_refresh_stmt())).scalar()
+    return {
+        "hospital_id": hospital_id,
+        "analytics": {"totals": rollups.totals(rows), "daily": rollups.daily(rows)},
+        **rollups.freshness(as_of),
+    } 
\ No newline at end of file
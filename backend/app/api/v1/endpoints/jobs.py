@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import blob_store, jobs
+from app.core.dependencies import get_async_db, get_current_user
+from app.db.models.job import Job
+from app.db.schemas.job import JobRead
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Roles that may see any job of their hospital, not just their own
+JOB_ADMIN_ROLES = ("admin", "system_admin", "hospital_admin")
+
+async def _get_job(db: AsyncSession, job_id: int, user) -> Job:
+    job = await db.get(Job, job_id)
+    # 404 rather than 403, so job ids cannot be probed
+    if job is None or (job.created_by != user.id and user.role not in JOB_ADMIN_ROLES):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}", response_model=JobRead)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    """Poll a background job; ``result_url`` is set once it has succeeded"""
+    return jobs.describe(await _get_job(db, job_id, user))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    """Download what a succeeded job produced"""
+    job = await _get_job(db, job_id, user)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, not succeeded")
+    if not blob_store.exists(job.result_key):
+        raise HTTPException(status_code=410, detail="Job result is no longer stored")
+    # The blob key is a content hash, so it makes a strong ETag
+    return FileResponse(
+        blob_store.path(job.result_key), media_type=job.content_type, filename=job.filename,
+        headers={"ETag": f'"{job.result_key}"', "Cache-Control": "private, max-age=31536000, immutable"},
+    )
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.schemas.lab import LabTestCreate, LabTestRead, LabOrderCreate, LabOrderRead, LabResultCreate, LabResultRead
+from app.db.schemas.lab import LabTestCreate, LabTestRead, LabOrderCreate, LabOrderRead, LabResultCreate, LabResultRead, LabResultBatch
+from app.db.schemas.batch import BatchResult
+from app.db.schemas.job import JobRead
 from app.db.models.lab import LabTest, LabOrder, LabResult
-from app.core.dependencies import get_db, require_roles, get_current_user
+from app.db.models.patient import Patient
+from app.core.dependencies import get_db, get_async_db, require_roles, get_current_user, get_read_db
+from app.core import document_cache, documents, events, jobs, response_cache
+from app.core.batch import BatchOutcomes
+from app.core.serialization import row_dicts, schema_columns
 from typing import List
 from datetime import datetime
 from app.db.models.user import User
@@ -11,9 +19,21 @@ from app.db.schemas.lab_test import LabTestResponse, LabTestUpdate
 router = APIRouter(prefix="/lab", tags=["lab"])
 
 # Lab Tests
+@router.get("/catalog", response_model=List[LabTestRead])
+def get_lab_test_catalog(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Orderable lab tests with their prices"""
+    return response_cache.cached_response_sync(
+        request, "lab_tests", "all",
+        lambda: row_dicts(db.query(*schema_columns(LabTest, LabTestRead)).order_by(LabTest.name).all()),
+    )
+
 @router.get("/tests", response_model=List[LabTestResponse])
 def get_lab_tests(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get lab tests for the current user"""
@@ -43,6 +63,7 @@ def create_lab_test(
     )
     db.add(db_test)
     db.commit()
+    response_cache.invalidate("lab_tests")
     db.refresh(db_test)
     return LabTestResponse.from_orm(db_test)
 
@@ -51,46 +72,44 @@ def update_test_status(
     test_id: int,
     status: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["lab_technician"]))
+    current_user: User = Depends(require_roles(["lab_worker", "doctor"]))
 ):
-    """Update lab test status"""
-    test = db.query(LabTest).filter(LabTest.id == test_id).first()
-    if not test:
-        raise HTTPException(status_code=404, detail="Lab test not found")
+    """Update the status of a lab order"""
+    order = db.query(LabOrder).filter(LabOrder.id == test_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Lab order not found")
     
     valid_statuses = ["pending", "in-progress", "completed", "cancelled"]
     if status not in valid_statuses:
         raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
     
-    test.status = status
-    if status == "completed":
-        test.completed_date = datetime.now()
+    order.status = status
+    patient_user_id = db.query(Patient.user_id).filter(Patient.id == order.patient_id).scalar()
+    events.notify(db, (patient_user_id,), "lab_order", id=order.id, status=status)
     
     db.commit()
     
     return {"message": f"Lab test status updated to {status}"}
 
-@router.post("/tests/{test_id}/generate-report")
-def generate_test_report(
+@router.post("/tests/{test_id}/generate-report", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def generate_test_report(
     test_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_roles(["lab_technician"]))
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_roles(["lab_worker", "doctor"]))
 ):
-    """Generate a report for a completed lab test"""
-    test = db.query(LabTest).filter(LabTest.id == test_id).first()
-    if not test:
+    """Queue the PDF report of a completed lab order; poll the returned job for it"""
+    # Tests are ordered per patient as lab orders, so test_id is the order id
+    order = await db.get(LabOrder, test_id)
+    if not order:
         raise HTTPException(status_code=404, detail="Lab test not found")
     
-    if test.status != "completed":
+    if order.status != "completed":
         raise HTTPException(status_code=400, detail="Test must be completed to generate report")
     
-    # In a real application, this would generate an actual report
-    # For now, we'll just return a success message
-    return {
-        "message": "Report generated successfully",
-        "test_id": test_id,
-        "report_url": f"/reports/lab-test-{test_id}.pdf"
-    }
+    job = await jobs.enqueue(db, "lab_report_pdf", {"order_id": order.id}, created_by=current_user.id)
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return jobs.describe(job)
 
 @router.get("/tests/{test_id}/patient-info")
 def get_patient_info(
@@ -148,20 +167,63 @@ def reschedule_lab_test(
 # Lab Orders
 @router.post("/orders", response_model=LabOrderRead)
 def create_lab_order(order: LabOrderCreate, db: Session = Depends(get_db), user=Depends(require_roles("doctor", "lab_worker", "hospital_admin"))):
-    new_order = LabOrder(**order.dict(), ordered_at=datetime.utcnow())
+    # Only staff order tests, so the order is always their hospital's
+    if user.hospital_id is None:
+        raise HTTPException(status_code=403, detail="No home hospital is assigned to this account")
+    new_order = LabOrder(**order.dict(), hospital_id=user.hospital_id, ordered_at=datetime.utcnow())
     db.add(new_order)
     db.commit()
     db.refresh(new_order)
     return new_order
 
 @router.get("/orders/{order_id}", response_model=LabOrderRead)
-def get_lab_order(order_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "lab_worker", "doctor", "hospital_admin", "patient"))):
+def get_lab_order(order_id: int, db: Session = Depends(get_read_db), user=Depends(require_roles("admin", "lab_worker", "doctor", "hospital_admin", "patient"))):
     order = db.query(LabOrder).filter(LabOrder.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Lab order not found")
     return order
 
 # Lab Results
+def _notify_results(db: Session, result_ids):
+    # Tells each order's patient; one query however many results changed
+    rows = db.execute(
+        select(LabResult.id, LabResult.order_id, Patient.user_id)
+        .join(LabOrder, LabResult.order_id == LabOrder.id)
+        .join(Patient, LabOrder.patient_id == Patient.id)
+        .where(LabResult.id.in_(result_ids))
+    ).all()
+    for result_id, order_id, patient_user_id in rows:
+        events.notify(db, (patient_user_id,), "lab_result", id=result_id, order_id=order_id)
+
+@router.put("/results", response_model=BatchResult)
+def update_lab_results(batch: LabResultBatch, atomic: bool = False, db: Session = Depends(get_db), user=Depends(require_roles("lab_worker", "doctor"))):
+    """Record many results from an analyser run in one transaction"""
+    items = batch.items
+    outcomes = BatchOutcomes(len(items))
+    results = {result.id: result for result in db.query(LabResult).filter(LabResult.id.in_({item.id for item in items}))}
+    for index, item in enumerate(items):
+        result = results.get(item.id)
+        if result is None:
+            outcomes.fail(index, "Lab result not found")
+        elif result.result == item.result:
+            outcomes.ok(index, "unchanged", result.id)
+        else:
+            outcomes.ok(index, "updated", result.id)
+    if not outcomes.should_apply(atomic):
+        return outcomes.result(committed=False)
+    # Later lines for the same result win, as if sent one by one
+    changed = set()
+    for item in items:
+        if item.id in results and results[item.id].result != item.result:
+            results[item.id].result = item.result
+            changed.add(item.id)
+    if changed:
+        _notify_results(db, changed)
+    db.commit()
+    for result_id in results:
+        document_cache.invalidate("lab_result", result_id)
+    return outcomes.result(committed=True)
+
 @router.put("/results/{result_id}", response_model=LabResultRead)
 def update_lab_result(result_id: int, update: LabResultCreate, db: Session = Depends(get_db), user=Depends(require_roles("lab_worker", "doctor"))):
     result = db.query(LabResult).filter(LabResult.id == result_id).first()
@@ -169,11 +231,22 @@ def update_lab_result(result_id: int, update: LabResultCreate, db: Session = Dep
         raise HTTPException(status_code=404, detail="Lab result not found")
     for key, value in update.dict(exclude_unset=True).items():
         setattr(result, key, value)
+    _notify_results(db, (result_id,))
     db.commit()
+    document_cache.invalidate("lab_result", result_id)
     db.refresh(result)
     return result
 
 @router.get("/reports/{result_id}/pdf")
-def get_lab_report_pdf(result_id: int):
-    # Placeholder: implement PDF generation
-    return {"pdf_url": f"/static/lab_reports/{result_id}.pdf"} 
\ No newline at end of file
+async def get_lab_report_pdf(result_id: int, request: Request, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "lab_worker", "patient"))):
+    """One lab result as a PDF, streamed while it renders and then served from cache until it changes"""
+    result = (await db.execute(documents.lab_result_stmt(result_id))).unique().scalar_one_or_none()
+    if not result:
+        raise HTTPException(status_code=404, detail="Lab result not found")
+    # patient_id is a patients.id; the patient row is loaded with the order
+    if user.role == "patient" and (result.order.patient is None or result.order.patient.user_id != user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return document_cache.pdf_response(
+        request, "lab_result", result.id, documents.LAB_REPORT, documents.lab_report_values(result.order, [result]),
+        f"lab-result-{result.id}.pdf",
+    )
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.db.schemas.patient import PatientCreate, PatientRead, PatientUpdate
-from app.db.models.patient import Patient
-from app.core.dependencies import get_db, require_roles
+from sqlalchemy import select
 from typing import List
+from app.db.schemas.patient import PatientCreate, PatientRead, PatientSearchResult, PatientUpdate
+from app.db.models.patient import Patient
+from app.db.models.user import User
+from app.db.schemas.pagination import Page
+from app.core.dependencies import get_db, require_roles, get_page_params, get_read_db
+from app.core.pagination import PageParams, paginate
+from app.core.serialization import json_response, page_data, row_dicts, schema_columns
+from app.core.search import MAX_RESULTS, search
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
-@router.get("/", response_model=List[PatientRead])
-def list_patients(db: Session = Depends(get_db), user=Depends(require_roles("admin", "doctor", "hospital_admin"))):
-    return db.query(Patient).all()
+@router.get("/", response_model=Page[PatientRead])
+def list_patients(page: PageParams = Depends(get_page_params), db: Session = Depends(get_read_db), user=Depends(require_roles("admin", "doctor", "hospital_admin"))):
+    return json_response(page_data(paginate(db.query(*schema_columns(Patient, PatientRead)), page, Patient.id)))
+
+@router.get("/search", response_model=List[PatientSearchResult])
+def search_patients(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_roles("admin", "doctor", "hospital_admin")),
+):
+    """Patients whose name, email or phone match ``q``, best match first"""
+    stmt = select(Patient.id, Patient.user_id, User.full_name, User.email, User.phone).join(User, User.id == Patient.user_id)
+    return json_response(row_dicts(search(db, stmt, User, q, limit)))
 
 @router.get("/{patient_id}", response_model=PatientRead)
-def get_patient(patient_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+def get_patient(patient_id: int, db: Session = Depends(get_read_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
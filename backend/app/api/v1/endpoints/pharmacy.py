@@ -1,8 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.schemas.pharmacy import MedicineCreate, MedicineRead, PharmacyOrderCreate, PharmacyOrderRead, InventoryUpdate, InventoryRead
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.schemas.pharmacy import MedicineCreate, MedicineRead, PharmacyOrderCreate, PharmacyOrderRead, InventoryUpdate, InventoryRead, StockReceipt
+from app.db.schemas.batch import BatchResult
+from app.db.schemas.job import JobRead
+from app.db.models.hospital import Hospital
+from app.db.models.patient import Patient
 from app.db.models.pharmacy import Medicine, PharmacyOrder, Inventory
-from app.core.dependencies import get_db, require_roles, get_current_user
+from app.db.schemas.pagination import Page
+from app.core.dependencies import get_async_db, require_roles, get_current_user, get_page_params, get_async_read_db
+from app.core.pagination import PageParams, paginate_async
+from app.core.export import stream_export, model_columns
+from app.core import jobs, response_cache
+from app.core.batch import BatchOutcomes
+from app.core.serialization import json_response, page_data, row_dicts, schema_columns
+from app.core.search import MAX_RESULTS, search
+from app.core.stock import (
+    InsufficientStock,
+    OrderStateConflict,
+    add_to_batches,
+    adjust_batch,
+    adjust_medicine_stock,
+    adjust_medicine_stocks,
+    cancel_order,
+    correct_batch,
+    dispense_order,
+    release_expired,
+    reserve_stock,
+)
+from app.db.loading import with_profile
+from sqlalchemy import select
+from typing import Optional
 from typing import List
 from datetime import datetime
 from app.db.models.user import User
@@ -11,25 +38,46 @@ from app.db.schemas.pharmacy import MedicineResponse, MedicineUpdate
 router = APIRouter(prefix="/pharmacy", tags=["pharmacy"])
 
 # Medicines
-@router.get("/medicines", response_model=List[MedicineResponse])
-def get_medicines(
-    db: Session = Depends(get_db),
+@router.get("/medicines", response_model=Page[MedicineResponse])
+async def get_medicines(
+    request: Request,
+    page: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get medicines based on user role"""
     if current_user.role == "pharmacist":
         # Pharmacist sees all medicines
-        medicines = db.query(Medicine).all()
+        stmt = select(*schema_columns(Medicine, MedicineResponse))
+        variant = "all"
     else:
         # Other users see only available medicines
-        medicines = db.query(Medicine).filter(Medicine.is_available == True).all()
+        stmt = select(*schema_columns(Medicine, MedicineResponse)).where(Medicine.is_available == True)
+        variant = "available"
+
+    async def load():
+        return page_data(await paginate_async(db, stmt, page, Medicine.id, {"name": Medicine.name}, rows=True))
     
-    return [MedicineResponse.from_orm(medicine) for medicine in medicines]
+    return await response_cache.cached_response(request, "medicines", variant, load)
+
+@router.get("/medicines/search", response_model=List[MedicineResponse])
+async def search_medicines(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=MAX_RESULTS),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Medicines whose name, description, category or manufacturer match ``q``, best match first"""
+    stmt = select(*schema_columns(Medicine, MedicineResponse))
+    if current_user.role != "pharmacist":
+        stmt = stmt.where(Medicine.is_available == True)
+    rows = await db.run_sync(lambda session: search(session, stmt, Medicine, q, limit))
+    return json_response(row_dicts(rows))
 
 @router.post("/medicines", response_model=MedicineResponse)
-def create_medicine(
+async def create_medicine(
     medicine: MedicineCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Create a new medicine (pharmacist only)"""
@@ -41,19 +89,20 @@ def create_medicine(
         created_by=current_user.id
     )
     db.add(db_medicine)
-    db.commit()
-    db.refresh(db_medicine)
+    await db.commit()
+    response_cache.invalidate("medicines")
+    await db.refresh(db_medicine)
     return MedicineResponse.from_orm(db_medicine)
 
 @router.put("/medicines/{medicine_id}", response_model=MedicineResponse)
-def update_medicine(
+async def update_medicine(
     medicine_id: int,
     medicine_update: MedicineUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Update medicine information (pharmacist only)"""
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    medicine = await db.get(Medicine, medicine_id)
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
@@ -61,40 +110,43 @@ def update_medicine(
     for key, value in medicine_update.dict(exclude_unset=True).items():
         setattr(medicine, key, value)
     
-    db.commit()
-    db.refresh(medicine)
+    await db.commit()
+    response_cache.invalidate("medicines")
+    await db.refresh(medicine)
     return MedicineResponse.from_orm(medicine)
 
 @router.delete("/medicines/{medicine_id}")
-def delete_medicine(
+async def delete_medicine(
     medicine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Delete a medicine (pharmacist only)"""
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    medicine = await db.get(Medicine, medicine_id)
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
-    db.delete(medicine)
-    db.commit()
+    await db.delete(medicine)
+    await db.commit()
+    response_cache.invalidate("medicines")
     
     return {"message": "Medicine deleted successfully"}
 
 @router.put("/medicines/{medicine_id}/toggle-availability")
-def toggle_medicine_availability(
+async def toggle_medicine_availability(
     medicine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Toggle medicine availability (pharmacist only)"""
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    medicine = await db.get(Medicine, medicine_id)
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
     # Toggle the boolean value
     medicine.is_available = not medicine.is_available
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("medicines")
     
     return {
         "message": f"Medicine {'made available' if medicine.is_available else 'made unavailable'}",
@@ -102,70 +154,136 @@ def toggle_medicine_availability(
     }
 
 # Orders
+async def _patient_user_id(db: AsyncSession, patient_id: int):
+    return (await db.execute(select(Patient.user_id).where(Patient.id == patient_id))).scalar()
+
 @router.post("/orders", response_model=PharmacyOrderRead)
-def create_pharmacy_order(
+async def create_pharmacy_order(
     order: PharmacyOrderCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(require_roles(["patient"]))
 ):
-    new_order = PharmacyOrder(**order.dict(), ordered_at=datetime.utcnow())
+    """Place an order and hold its stock until it is dispensed or expires"""
+    if order.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    if await _patient_user_id(db, order.patient_id) != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    hospital = await db.get(Hospital, order.hospital_id)
+    if hospital is None or hospital.status != "approved":
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    # New orders always start pending; status moves only through the endpoints below.
+    # Patients have no tenant, so the hospital comes from the request and
+    # stock is only taken from that hospital's batches.
+    new_order = PharmacyOrder(**order.dict(exclude={"status"}), status="pending", ordered_at=datetime.utcnow())
     db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    try:
+        # Insert first so the transaction holds the write lock before any reads
+        await db.flush()
+        if await db.get(Medicine, order.medicine_id) is None:
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Medicine not found")
+        await reserve_stock(db, new_order)
+        await db.commit()
+    except InsufficientStock:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Not enough stock for this order")
+    await db.refresh(new_order)
     return new_order
 
+@router.post("/orders/{order_id}/dispense", response_model=PharmacyOrderRead)
+async def dispense_pharmacy_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_roles(["pharmacist"]))
+):
+    """Hand over a pending order; its held stock is consumed"""
+    try:
+        await dispense_order(db, order_id)
+        await db.commit()
+    except OrderStateConflict as e:
+        await db.rollback()
+        if await db.get(PharmacyOrder, order_id) is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        raise HTTPException(status_code=409, detail=str(e))
+    return await db.get(PharmacyOrder, order_id, populate_existing=True)
+
+@router.post("/orders/{order_id}/cancel", response_model=PharmacyOrderRead)
+async def cancel_pharmacy_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_roles(["pharmacist", "patient"]))
+):
+    """Cancel a pending order and return its held stock"""
+    order = await db.get(PharmacyOrder, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if current_user.role == "patient" and await _patient_user_id(db, order.patient_id) != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        await cancel_order(db, order_id)
+        await db.commit()
+    except OrderStateConflict as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    return await db.get(PharmacyOrder, order_id, populate_existing=True)
+
 @router.get("/orders/{order_id}", response_model=PharmacyOrderRead)
-def get_pharmacy_order(
+async def get_pharmacy_order(
     order_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_read_db), 
     current_user: User = Depends(require_roles(["admin", "pharmacist", "doctor", "hospital_admin", "patient"]))
 ):
-    order = db.query(PharmacyOrder).filter(PharmacyOrder.id == order_id).first()
+    order = await db.get(PharmacyOrder, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 # Inventory
-@router.get("/inventory", response_model=List[InventoryRead])
-def list_inventory(
-    db: Session = Depends(get_db), 
+@router.get("/inventory", response_model=Page[InventoryRead])
+async def list_inventory(
+    page: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_async_read_db), 
     current_user: User = Depends(require_roles(["admin", "pharmacist", "hospital_admin"]))
 ):
-    return db.query(Inventory).all()
+    return await paginate_async(db, select(Inventory), page, Inventory.id)
 
 @router.put("/inventory/{inventory_id}", response_model=InventoryRead)
-def update_inventory(
+async def update_inventory(
     inventory_id: int, 
     update: InventoryUpdate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(require_roles(["pharmacist", "hospital_admin"]))
 ):
-    inv = db.query(Inventory).filter(Inventory.id == inventory_id).first()
+    inv = await db.get(Inventory, inventory_id)
     if not inv:
         raise HTTPException(status_code=404, detail="Inventory item not found")
-    inv.quantity = update.stock
-    db.commit()
-    db.refresh(inv)
-    return inv
+    if update.stock < 0:
+        raise HTTPException(status_code=400, detail="Stock cannot be negative")
+    if not await correct_batch(db, inv, update.stock):
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Batch was changed by someone else; reload and retry")
+    await db.commit()
+    return await db.get(Inventory, inventory_id, populate_existing=True)
 
 @router.get("/orders/{order_id}/status")
-def get_order_status(
+async def get_order_status(
     order_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_read_db), 
     current_user: User = Depends(require_roles(["admin", "pharmacist", "doctor", "hospital_admin", "patient"]))
 ):
-    order = db.query(PharmacyOrder).filter(PharmacyOrder.id == order_id).first()
+    order = await db.get(PharmacyOrder, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return {"status": order.status}
 
 @router.get("/inventory-details")
-def get_inventory(
-    db: Session = Depends(get_db),
+async def get_inventory(
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Get pharmacy inventory (pharmacist only)"""
-    inventory = db.query(Inventory).all()
+    result = await db.execute(with_profile(select(Inventory), "pharmacy.inventory"))
+    inventory = result.scalars().all()
     return [
         {
             "id": item.id,
@@ -178,28 +296,31 @@ def get_inventory(
     ]
 
 @router.post("/inventory/add-stock")
-def add_stock(
+async def add_stock(
     medicine_id: int,
-    quantity: int,
     expiry_date: str,
     batch_number: str,
-    db: Session = Depends(get_db),
+    quantity: int = Query(..., gt=0),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
     """Add stock to inventory (pharmacist only)"""
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    medicine = await db.get(Medicine, medicine_id)
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
     # Check if inventory item already exists
-    inventory_item = db.query(Inventory).filter(
+    result = await db.execute(select(Inventory).where(
         Inventory.medicine_id == medicine_id,
         Inventory.batch_number == batch_number
-    ).first()
+    ))
+    inventory_item = result.scalars().first()
     
     if inventory_item:
-        # Update existing inventory
-        inventory_item.quantity += quantity
+        # Increment in SQL so concurrent receipts for a batch are not lost
+        if not await adjust_batch(db, inventory_item.id, quantity):
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Batch was removed by someone else; reload and retry")
     else:
         # Create new inventory item
         inventory_item = Inventory(
@@ -209,46 +330,114 @@ def add_stock(
             batch_number=batch_number
         )
         db.add(inventory_item)
+    await adjust_medicine_stock(db, medicine_id, quantity)
     
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("medicines")
     
     return {"message": f"Added {quantity} units to inventory"}
 
+@router.post("/inventory/receipts", response_model=BatchResult)
+async def receive_stock(
+    receipt: StockReceipt,
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_roles(["pharmacist"]))
+):
+    """Add every line of a delivery note in one transaction (pharmacist only)
+
+    Lines for a batch already in stock add to it, others create it. Unknown
+    medicines fail their line; with ``atomic`` they fail the whole receipt.
+    """
+    items = receipt.items
+    outcomes = BatchOutcomes(len(items))
+    medicine_ids = {item.medicine_id for item in items}
+    known = set((await db.execute(select(Medicine.id).where(Medicine.id.in_(medicine_ids)))).scalars())
+    existing = {
+        (medicine_id, batch_number): inventory_id
+        for inventory_id, medicine_id, batch_number in (await db.execute(
+            select(Inventory.id, Inventory.medicine_id, Inventory.batch_number).where(
+                Inventory.medicine_id.in_(known),
+                Inventory.batch_number.in_({item.batch_number for item in items}),
+            )
+        )).all()
+    }
+
+    batch_deltas, stock_deltas, new_batches, created = {}, {}, {}, []
+    for index, item in enumerate(items):
+        if item.medicine_id not in known:
+            outcomes.fail(index, "Medicine not found")
+            continue
+        key = (item.medicine_id, item.batch_number)
+        stock_deltas[item.medicine_id] = stock_deltas.get(item.medicine_id, 0) + item.quantity
+        if key in existing:
+            batch_deltas[existing[key]] = batch_deltas.get(existing[key], 0) + item.quantity
+            outcomes.ok(index, "updated", existing[key])
+        elif key in new_batches:
+            new_batches[key].quantity += item.quantity
+            created.append((index, "updated", new_batches[key]))
+        else:
+            new_batches[key] = Inventory(
+                medicine_id=item.medicine_id,
+                quantity=item.quantity,
+                expiry_date=item.expiry_date,
+                batch_number=item.batch_number,
+            )
+            created.append((index, "created", new_batches[key]))
+    for index, status, _ in created:
+        outcomes.ok(index, status)
+    if not outcomes.should_apply(atomic):
+        return outcomes.result(committed=False)
+
+    if batch_deltas:
+        await add_to_batches(db, batch_deltas)
+    db.add_all(new_batches.values())
+    if stock_deltas:
+        await adjust_medicine_stocks(db, stock_deltas)
+    await db.commit()
+    for index, status, inventory_item in created:
+        outcomes.ok(index, status, inventory_item.id)
+    response_cache.invalidate("medicines")
+    return outcomes.result(committed=True)
+
+@router.post("/inventory/release-expired")
+async def release_expired_reservations(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_roles(["pharmacist"]))
+):
+    """Return stock held by pending orders past their reservation deadline (pharmacist only)"""
+    released = await release_expired(db)
+    await db.commit()
+    return {"released_units": released}
+
 @router.post("/export-data")
-def export_pharmacy_data(
-    db: Session = Depends(get_db),
+async def export_pharmacy_data(
+    format: str = "ndjson",
+    dataset: Optional[str] = None,
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
-    """Export pharmacy data (pharmacist only)"""
-    medicines = db.query(Medicine).all()
-    inventory = db.query(Inventory).all()
-    
-    # In a real application, this would generate an actual export file
-    # For now, return the data as JSON
-    return {
-        "export_date": datetime.now().isoformat(),
-        "medicines": [MedicineResponse.from_orm(med) for med in medicines],
-        "inventory": [
-            {
-                "id": item.id,
-                "medicine_name": item.medicine.name,
-                "quantity": item.quantity,
-                "expiry_date": item.expiry_date,
-                "batch_number": item.batch_number
-            }
-            for item in inventory
-        ]
+    """Stream pharmacy data as NDJSON or CSV (pharmacist only)"""
+    datasets = {
+        "medicines": select(*model_columns(Medicine)).order_by(Medicine.id),
+        # Join the medicine name in SQL instead of lazy-loading it per row
+        "inventory": select(
+            Inventory.id,
+            Medicine.name.label("medicine_name"),
+            Inventory.quantity,
+            Inventory.expiry_date,
+            Inventory.batch_number
+        ).join(Medicine, Inventory.medicine_id == Medicine.id).order_by(Inventory.id),
     }
+    filename = f"pharmacy_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return stream_export(datasets, format, filename, dataset)
 
-@router.post("/backup-settings")
-def backup_pharmacy_settings(
-    db: Session = Depends(get_db),
+@router.post("/backup-settings", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def backup_pharmacy_settings(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_roles(["pharmacist"]))
 ):
-    """Backup pharmacy settings (pharmacist only)"""
-    # In a real application, this would create a backup file
-    # For now, return a success message
-    return {
-        "message": "Settings backup created successfully",
-        "backup_file": f"pharmacy_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    } 
\ No newline at end of file
+    """Queue a JSON backup of the catalog and this hospital's stock (pharmacist only)"""
+    job = await jobs.enqueue(db, "pharmacy_backup", {}, created_by=current_user.id)
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return jobs.describe(job)
@@ -1,49 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.schemas.prescription import PrescriptionCreate, PrescriptionRead, PrescriptionUpdate
 from app.db.models.prescription import Prescription
-from app.core.dependencies import get_db, require_roles
+from app.db.schemas.pagination import Page
+from app.core.dependencies import get_async_db, require_roles, get_page_params, get_async_read_db
+from app.core import document_cache, documents
+from app.core.pagination import PageParams, paginate_async
+from app.core.serialization import json_response, page_data, schema_columns
 from typing import List
 from datetime import datetime
 
 router = APIRouter(prefix="/prescriptions", tags=["prescriptions"])
 
-@router.get("/", response_model=List[PrescriptionRead])
-def list_prescriptions(db: Session = Depends(get_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+@router.get("/", response_model=Page[PrescriptionRead])
+async def list_prescriptions(page: PageParams = Depends(get_page_params), db: AsyncSession = Depends(get_async_read_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+    stmt = select(*schema_columns(Prescription, PrescriptionRead))
     if user.role == "patient":
-        return db.query(Prescription).filter(Prescription.patient_id == user.id).all()
+        stmt = stmt.where(Prescription.patient_id == user.id)
     elif user.role == "doctor":
-        return db.query(Prescription).filter(Prescription.doctor_id == user.id).all()
-    return db.query(Prescription).all()
+        stmt = stmt.where(Prescription.doctor_id == user.id)
+    return json_response(page_data(await paginate_async(db, stmt, page, Prescription.id, rows=True)))
 
 @router.post("/", response_model=PrescriptionRead)
-def create_prescription(pres: PrescriptionCreate, db: Session = Depends(get_db), user=Depends(require_roles("doctor"))):
+async def create_prescription(pres: PrescriptionCreate, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("doctor"))):
     new_pres = Prescription(**pres.dict(), date_issued=datetime.utcnow())
     db.add(new_pres)
-    db.commit()
-    db.refresh(new_pres)
+    await db.commit()
+    await db.refresh(new_pres)
     return new_pres
 
 @router.put("/{prescription_id}", response_model=PrescriptionRead)
-def update_prescription(prescription_id: int, update: PrescriptionUpdate, db: Session = Depends(get_db), user=Depends(require_roles("doctor", "hospital_admin"))):
-    pres = db.query(Prescription).filter(Prescription.id == prescription_id).first()
+async def update_prescription(prescription_id: int, update: PrescriptionUpdate, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("doctor", "hospital_admin"))):
+    pres = await db.get(Prescription, prescription_id)
     if not pres:
         raise HTTPException(status_code=404, detail="Prescription not found")
     if user.role == "doctor" and pres.doctor_id != user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     for key, value in update.dict(exclude_unset=True).items():
         setattr(pres, key, value)
-    db.commit()
-    db.refresh(pres)
+    await db.commit()
+    document_cache.invalidate("prescription", prescription_id)
+    await db.refresh(pres)
     return pres
 
 @router.get("/{prescription_id}/pdf")
-def get_prescription_pdf(prescription_id: int):
-    # Placeholder: implement PDF generation
-    return {"pdf_url": f"/static/prescriptions/{prescription_id}.pdf"}
+async def get_prescription_pdf(prescription_id: int, request: Request, db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+    """The prescription as a PDF, streamed while it renders and then served from cache until it changes"""
+    pres = (await db.execute(documents.prescription_stmt(prescription_id))).scalar_one_or_none()
+    if not pres:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+    # patient_id is a patients.id; the patient row is loaded with the prescription
+    if user.role == "patient" and (pres.patient is None or pres.patient.user_id != user.id):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return document_cache.pdf_response(
+        request, "prescription", pres.id, documents.PRESCRIPTION, documents.prescription_values(pres), f"prescription-{pres.id}.pdf",
+    )
 
 @router.get("/patients/{patient_id}", response_model=List[PrescriptionRead])
-def get_patient_prescriptions(patient_id: int, db: Session = Depends(get_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
+async def get_patient_prescriptions(patient_id: int, db: AsyncSession = Depends(get_async_read_db), user=Depends(require_roles("admin", "doctor", "hospital_admin", "patient"))):
     if user.role == "patient" and user.id != patient_id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return db.query(Prescription).filter(Prescription.patient_id == patient_id).all() 
\ No newline at end of file
+    result = await db.execute(select(Prescription).where(Prescription.patient_id == patient_id))
+    return result.scalars().all()
@@ -1,33 +1,166 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.core.dependencies import get_db, require_roles
+from app.core.dependencies import get_db, require_roles, get_page_params, get_async_read_db, get_read_db
+from app.core.pagination import PageParams, paginate
+from app.core.serialization import json_response, page_data, row_dicts, schema_columns
+from app.core.search import MAX_RESULTS, search
+from app.core.export import stream_export, model_columns
+from app.core import response_cache, rollups
+from app.core.analytics import cached_analytics
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.pool import pool_metrics
+from app.db.query_metrics import statement_stats
+from app.db import replicas
+from app.core.config import settings
+from app.db.models.hospital import Department, Staff
+from sqlalchemy import func, select
+from typing import Optional
+from datetime import date, datetime, timedelta
 from app.db.models.hospital import Hospital
 from app.db.models.user import User
 from app.db.schemas.hospital import HospitalRead
-from app.db.schemas.user import UserRead
+from app.db.schemas.user import UserHospitalUpdate, UserRead
+from app.db.schemas.pagination import Page
 from typing import List
 
 router = APIRouter(prefix="/system-admin", tags=["system-admin"])
 
 @router.get("/dashboard")
-def dashboard(user=Depends(require_roles("system_admin"))):
-    # Placeholder: implement dashboard logic
-    return {"dashboard": "system-wide stats"}
+def dashboard(db: Session = Depends(get_read_db), user=Depends(require_roles("system_admin"))):
+    """System-wide activity for today and the last 30 days, from the dashboard rollups"""
+    today = date.today()
+    rows = db.execute(rollups.stats_stmt(today - timedelta(days=29), today + timedelta(days=1))).all()
+    hospitals = dict(db.execute(select(Hospital.status, func.count()).group_by(Hospital.status)).all())
+    return {
+        "dashboard": {
+            "today": rollups.totals([row for row in rows if row.day == today]),
+            "last_30_days": rollups.totals(rows),
+            "hospitals_by_status": hospitals,
+        },
+        **rollups.freshness(db.execute(rollups.last_refresh_stmt()).scalar()),
+    }
 
 @router.get("/hospitals", response_model=List[HospitalRead])
-def list_hospitals(db: Session = Depends(get_db), user=Depends(require_roles("system_admin"))):
+def list_hospitals(db: Session = Depends(get_read_db), user=Depends(require_roles("system_admin"))):
     return db.query(Hospital).all()
 
-@router.get("/users", response_model=List[UserRead])
-def list_users(db: Session = Depends(get_db), user=Depends(require_roles("system_admin"))):
-    return db.query(User).all()
+@router.get("/users", response_model=Page[UserRead])
+def list_users(page: PageParams = Depends(get_page_params), db: Session = Depends(get_read_db), user=Depends(require_roles("system_admin"))):
+    # Only the UserRead columns, so hashed_password is never loaded
+    return json_response(page_data(paginate(db.query(*schema_columns(User, UserRead)), page, User.id, {"email": User.email})))
+
+@router.get("/users/search", response_model=List[UserRead])
+def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    role: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_read_db),
+    user=Depends(require_roles("system_admin")),
+):
+    """Users whose name, email or phone match ``q``, best match first"""
+    stmt = select(*schema_columns(User, UserRead))
+    if role:
+        stmt = stmt.where(User.role == role)
+    return json_response(row_dicts(search(db, stmt, User, q, limit)))
+
+@router.put("/users/{user_id}/hospital", response_model=UserRead)
+def assign_user_hospital(user_id: int, update: UserHospitalUpdate, db: Session = Depends(get_db), user=Depends(require_roles("system_admin"))):
+    """Set a staff member's home hospital, which scopes everything they see"""
+    target = db.get(User, user_id)
+    if not target:
+        raise HTTPException(status_code=404, detail="User not found")
+    if update.hospital_id is not None and not db.get(Hospital, update.hospital_id):
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    target.hospital_id = update.hospital_id
+    db.commit()
+    # A hospital admin's hospital list is cached per user
+    response_cache.invalidate("hospitals")
+    db.refresh(target)
+    return target
+
+@router.get("/users/export")
+def export_users(format: str = "ndjson", user=Depends(require_roles("system_admin"))):
+    stmt = select(*model_columns(User, exclude=("hashed_password",))).order_by(User.id)
+    filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return stream_export({"users": stmt}, format, filename)
+
+@router.get("/hospitals/export")
+def export_hospitals(format: str = "ndjson", dataset: Optional[str] = None, user=Depends(require_roles("system_admin"))):
+    datasets = {
+        "hospitals": select(*model_columns(Hospital)).order_by(Hospital.id),
+        "departments": select(*model_columns(Department)).order_by(Department.id),
+        "staff": select(*model_columns(Staff)).order_by(Staff.id),
+    }
+    filename = f"hospitals_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return stream_export(datasets, format, filename, dataset)
 
 @router.get("/reports")
-def cross_hospital_reports(user=Depends(require_roles("system_admin"))):
-    # Placeholder: implement cross-hospital report logic
-    return {"reports": []}
+def cross_hospital_reports(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    user=Depends(require_roles("system_admin"))
+):
+    """Per-hospital activity totals for [start, end] (default: last 30 days)"""
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    rows = db.execute(rollups.stats_stmt(start, end + timedelta(days=1))).all()
+    names = dict(db.execute(select(Hospital.id, Hospital.name)).all())
+    # Activity not tied to a hospital is reported under hospital_id null
+    reports = [
+        {"hospital_id": hospital_id, "hospital_name": names.get(hospital_id), **counts}
+        for hospital_id, counts in sorted(rollups.by_hospital(rows).items(), key=lambda item: (item[0] is None, item[0] or 0))
+    ]
+    return {
+        "start": start,
+        "end": end,
+        "reports": reports,
+        **rollups.freshness(db.execute(rollups.last_refresh_stmt()).scalar()),
+    }
 
 @router.get("/analytics")
-def cross_hospital_analytics(user=Depends(require_roles("system_admin"))):
-    # Placeholder: implement cross-hospital analytics logic
-    return {"analytics": {}} 
\ No newline at end of file
+async def cross_hospital_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    refresh: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    user=Depends(require_roles("system_admin"))
+):
+    """Cross-hospital metrics for [start, end] (default: last 30 days)
+
+    ``activity`` comes from the daily rollups; the rest is computed in the
+    analytics process pool and cached per window unless ``refresh`` is set.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    rows = (await db.execute(rollups.stats_stmt(start, end + timedelta(days=1)))).all()
+    as_of = (await db.execute(rollups.last_refresh_stmt())).scalar()
+    return {
+        "analytics": await cached_analytics(start, end + timedelta(days=1), refresh),
+        "activity": {"totals": rollups.totals(rows), "daily": rollups.daily(rows), **rollups.freshness(as_of)},
+    }
+
+@router.get("/db-pool")
+def db_pool_metrics(user=Depends(require_roles("system_admin"))):
+    return pool_metrics.snapshot()
+
+@router.get("/slow-statements")
+def slow_statements(
+    by: str = "total",
+    limit: int = Query(20, ge=1, le=200),
+    user=Depends(require_roles("system_admin")),
+):
+    """SQL statements ranked by total time, worst single run or call count, since startup"""
+    orderings = ["total", "max", "count"]
+    if by not in orderings:
+        raise HTTPException(status_code=400, detail=f"Invalid ordering. Must be one of: {orderings}")
+    return {"by": by, "statements": statement_stats.slowest(limit, by)}
+
+@router.get("/db-replicas")
+def db_replica_status(user=Depends(require_roles("system_admin"))):
+    """Replication lag of each read replica, as of the last heartbeat check"""
+    return {"max_lag_seconds": settings.REPLICA_MAX_LAG, "replicas": replicas.status()}
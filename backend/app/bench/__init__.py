@@ -0,0 +1,14 @@
+"""Benchmark and load-test harness.
+
+1. ``python -m app.bench.datagen --scale 10k --db sqlite:///bench-10k.db``
+   fills a scratch database with synthetic hospitals, staff, patients and
+   their appointments, prescriptions, lab orders and pharmacy stock.
+2. ``python -m app.bench.run --scale 10k --db sqlite:///bench-10k.db``
+   drives the scripted workloads through ``app.main`` in-process and
+   reports latency percentiles, throughput and SQL statements per request,
+   compared against ``app/bench/baselines/<scale>.json``.
+"""
+
+# Data set sizes, as the number of appointments. Kept here so the runner can
+# read them without importing the app before it has been configured.
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
@@ -0,0 +1,277 @@
+"""Synthetic data for benchmarks.
+
+``--scale`` sets the number of appointments, the largest table; every
+other table is sized from it. Output is deterministic for a given scale
+and ``--seed``. Rows go in with chunked Core inserts, bypassing ORM
+events, so the columns those events maintain (``booked_slot``,
+``hospital_id``) are filled in here.
+
+Patients and doctors are numbered 1..n in their own tables, while their
+users come after the staff, so ``patients.id``/``doctors.id`` never equal
+their ``user_id``, as in a real database. Code that mixes the two up finds
+nothing, or the wrong person, here too.
+
+All users share the password ``BENCH_PASSWORD`` and have emails like
+``patient17@bench.tj``.
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+from sqlalchemy import func, insert, select
+from app.bench import SCALES
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.models.appointment import Appointment, FREE_STATUSES
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.hospital import Department, Hospital, Staff
+from app.db.models.lab import LabOrder, LabResult, LabTest
+from app.db.models.patient import Patient
+from app.db.models.pharmacy import Inventory, Medicine, PharmacyOrder
+from app.db.models.prescription import Prescription
+from app.db.models.user import User
+from app.db.session import create_db_engine
+
+BENCH_PASSWORD = "bench-password"
+EMAIL_DOMAIN = "bench.tj"
+CHUNK_SIZE = 10_000
+# Every doctor works weekdays 09:00-17:00 in 30 minute slots
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 16
+# Share of appointments already in the past
+PAST_SHARE = 0.8
+
+FIRST_NAMES = ("Firdavs", "Nilufar", "Rustam", "Madina", "Jamshed", "Zarina", "Farrukh", "Shabnam", "Bahrom", "Gulnora")
+LAST_NAMES = ("Rahimov", "Saidova", "Karimov", "Nazarova", "Sharipov", "Qodirova", "Davlatov", "Yusufova")
+SPECIALIZATIONS = ("Cardiology", "Neurology", "Pediatrics", "Oncology", "Dermatology", "Surgery", "Therapy")
+MEDICINE_STEMS = (
+    "Paracetamol", "Ibuprofen", "Amoxicillin", "Aspirin", "Metformin", "Omeprazole", "Atorvastatin",
+    "Ciprofloxacin", "Lisinopril", "Cetirizine", "Diclofenac", "Azithromycin", "Losartan", "Insulin",
+)
+CATEGORIES = ("analgesic", "antibiotic", "antidiabetic", "cardiovascular", "antihistamine", "gastro")
+MANUFACTURERS = ("Pfizer", "Bayer", "Sanofi", "Novartis", "Dushanbe Pharm", "Gedeon Richter")
+LAB_TESTS = (
+    "Complete blood count", "Lipid panel", "Blood glucose", "HbA1c", "Liver panel", "Kidney panel",
+    "Thyroid panel", "Urinalysis", "Vitamin D", "Ferritin", "CRP", "Coagulation panel",
+)
+
+@dataclass
+class Sizes:
+    appointments: int
+
+    @property
+    def patients(self):
+        return max(100, self.appointments // 10)
+
+    @property
+    def doctors(self):
+        return max(20, self.appointments // 1000)
+
+    @property
+    def hospitals(self):
+        return max(2, self.doctors // 50)
+
+    @property
+    def prescriptions(self):
+        return self.appointments // 2
+
+    @property
+    def lab_orders(self):
+        return self.appointments // 4
+
+    @property
+    def pharmacy_orders(self):
+        return self.appointments // 4
+
+    @property
+    def medicines(self):
+        return min(20_000, max(200, self.appointments // 100))
+
+def email(role: str, n: int) -> str:
+    return f"{role}{n}@{EMAIL_DOMAIN}"
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _load(engine, table, rows, label: str):
+    start, count = time.perf_counter(), 0
+    for chunk in _chunks(rows):
+        with engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        count += len(chunk)
+    print(f"  {label:<18} {count:>10,} rows  {time.perf_counter() - start:6.1f}s")
+
+def _workday(first_monday: date, index: int) -> date:
+    weeks, weekday = divmod(index, 5)
+    return first_monday + timedelta(days=weeks * 7 + weekday)
+
+def generate(engine, sizes: Sizes, seed: int = 1):
+    rnd = random.Random(seed)
+    hashed = get_password_hash(BENCH_PASSWORD)
+    now = datetime.utcnow().replace(microsecond=0)
+    n_hospitals, n_patients, n_doctors = sizes.hospitals, sizes.patients, sizes.doctors
+
+    # Appointment i goes to doctor i % n_doctors + 1, in that doctor's next free
+    # slot, so (doctor, slot) never repeats
+    workdays = -(-sizes.appointments // (n_doctors * SLOTS_PER_DAY))
+    today = date.today()
+    first_monday = today - timedelta(days=today.weekday() + 7 * int(workdays * PAST_SHARE / 5 + 1))
+    window_start = datetime.combine(first_monday, dtime.min)
+    window_seconds = int((now - window_start).total_seconds())
+
+    def past_time():
+        return window_start + timedelta(seconds=rnd.randrange(window_seconds))
+
+    def person():
+        return f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}"
+
+    def doctor_hospital(doctor_id):
+        return (doctor_id - 1) % n_hospitals + 1
+
+    _load(engine, Hospital.__table__, (
+        {"id": h, "name": f"City Hospital {h}", "address": f"{h} Rudaki Ave, Dushanbe", "status": "approved", "approved_at": now}
+        for h in range(1, n_hospitals + 1)
+    ), "hospitals")
+    _load(engine, Department.__table__, (
+        {"id": h, "name": "General", "hospital_id": h} for h in range(1, n_hospitals + 1)
+    ), "departments")
+
+    # User ids: per-hospital staff and admins, then doctors, then patients
+    staff_roles = ("pharmacist", "lab_worker", "hospital_admin")
+    users = []
+    for role in staff_roles:
+        for h in range(1, n_hospitals + 1):
+            users.append({"id": len(users) + 1, "email": email(role, h), "role": role, "hospital_id": h})
+    for role in ("admin", "system_admin"):
+        users.append({"id": len(users) + 1, "email": email(role, 1), "role": role, "hospital_id": None})
+    # Doctor n and patient n have users doctor_user + n and patient_user + n
+    doctor_user = len(users)
+    patient_user = doctor_user + n_doctors
+    for n in range(1, n_doctors + 1):
+        users.append({"id": doctor_user + n, "email": email("doctor", n), "role": "doctor", "hospital_id": doctor_hospital(n)})
+    for n in range(1, n_patients + 1):
+        users.append({"id": patient_user + n, "email": email("patient", n), "role": "patient", "hospital_id": None})
+    _load(engine, User.__table__, (
+        {**u, "hashed_password": hashed, "full_name": person(), "phone": f"+99290{u['id']:07d}", "is_active": True, "created_at": now}
+        for u in users
+    ), "users")
+    _load(engine, Staff.__table__, (
+        {"user_id": u["id"], "hospital_id": u["hospital_id"], "department_id": u["hospital_id"], "role": u["role"]}
+        for u in users if u["hospital_id"] is not None
+    ), "staff")
+    _load(engine, Patient.__table__, (
+        {"id": n, "user_id": patient_user + n, "phone": f"+99290{n:07d}"} for n in range(1, n_patients + 1)
+    ), "patients")
+    _load(engine, Doctor.__table__, (
+        {"id": n, "user_id": doctor_user + n, "specialization": SPECIALIZATIONS[n % len(SPECIALIZATIONS)], "department": "General"}
+        for n in range(1, n_doctors + 1)
+    ), "doctors")
+    _load(engine, DoctorSchedule.__table__, (
+        {"doctor_id": n, "weekday": weekday, "start_time": dtime(9), "end_time": dtime(17), "slot_minutes": SLOT_MINUTES}
+        for n in range(1, n_doctors + 1) for weekday in range(5)
+    ), "doctor_schedules")
+
+    def appointments():
+        for i in range(sizes.appointments):
+            doctor_id = i % n_doctors + 1
+            day, slot = divmod(i // n_doctors, SLOTS_PER_DAY)
+            when = datetime.combine(_workday(first_monday, day), dtime(9)) + timedelta(minutes=slot * SLOT_MINUTES)
+            if when > now:
+                status = "scheduled"
+            else:
+                status = rnd.choices(("completed", "cancelled", "no-show"), (8, 1, 1))[0]
+            yield {
+                "patient_id": rnd.randint(1, n_patients), "doctor_id": doctor_id, "scheduled_time": when,
+                "status": status, "booked_slot": None if status in FREE_STATUSES else when, "version": 1,
+                "hospital_id": doctor_hospital(doctor_id),
+            }
+    _load(engine, Appointment.__table__, appointments(), "appointments")
+
+    def prescriptions():
+        for _ in range(sizes.prescriptions):
+            doctor_id = rnd.randint(1, n_doctors)
+            yield {
+                "patient_id": rnd.randint(1, n_patients), "doctor_id": doctor_id, "date_issued": past_time(),
+                "medications": f"{rnd.choice(MEDICINE_STEMS)} {rnd.choice((250, 500))} mg twice daily",
+                "hospital_id": doctor_hospital(doctor_id),
+            }
+    _load(engine, Prescription.__table__, prescriptions(), "prescriptions")
+
+    _load(engine, LabTest.__table__, (
+        {"id": n, "name": name, "price": 50 + 10 * n} for n, name in enumerate(LAB_TESTS, 1)
+    ), "lab_tests")
+    lab_orders = [
+        (rnd.randint(1, n_patients), rnd.randint(1, len(LAB_TESTS)), past_time(), rnd.random() < 0.7, rnd.randint(1, n_hospitals))
+        for _ in range(sizes.lab_orders)
+    ]
+    _load(engine, LabOrder.__table__, (
+        {"id": n, "patient_id": p, "test_id": t, "ordered_at": at, "status": "completed" if done else "pending", "hospital_id": h}
+        for n, (p, t, at, done, h) in enumerate(lab_orders, 1)
+    ), "lab_orders")
+    _load(engine, LabResult.__table__, (
+        {"order_id": n, "result": "Within reference range", "reported_at": at + timedelta(hours=rnd.uniform(1, 72))}
+        for n, (_, _, at, done, _) in enumerate(lab_orders, 1) if done
+    ), "lab_results")
+    del lab_orders
+
+    _load(engine, Medicine.__table__, (
+        {
+            "id": n, "name": f"{MEDICINE_STEMS[n % len(MEDICINE_STEMS)]} {(n // len(MEDICINE_STEMS)) % 20 * 25 + 25} mg #{n}",
+            "description": "Tablets, 10 x blister", "price": rnd.randint(5, 500), "stock": rnd.randint(0, 500),
+            "is_available": True, "category": rnd.choice(CATEGORIES), "manufacturer": rnd.choice(MANUFACTURERS),
+            "expiry_date": now + timedelta(days=rnd.randint(30, 900)),
+        }
+        for n in range(1, sizes.medicines + 1)
+    ), "medicines")
+    _load(engine, Inventory.__table__, (
+        {
+            "medicine_id": n, "quantity": rnd.randint(0, 200), "batch_number": f"B{n}-{batch}",
+            "expiry_date": today + timedelta(days=rnd.randint(30, 900)), "hospital_id": rnd.randint(1, n_hospitals),
+        }
+        for n in range(1, sizes.medicines + 1) for batch in range(3)
+    ), "inventory")
+    _load(engine, PharmacyOrder.__table__, (
+        {
+            "patient_id": rnd.randint(1, n_patients), "medicine_id": rnd.randint(1, sizes.medicines),
+            "quantity": rnd.randint(1, 5), "status": rnd.choices(("dispensed", "pending", "cancelled"), (8, 1, 1))[0],
+            "ordered_at": past_time(), "hospital_id": rnd.randint(1, n_hospitals),
+        }
+        for _ in range(sizes.pharmacy_orders)
+    ), "pharmacy_orders")
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.bench.datagen")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--db", required=True, help="SQLAlchemy URL of a scratch database")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate every table first")
+    args = parser.parse_args(argv)
+    # Every bulk insert chunk would be logged as a slow statement
+    logging.getLogger("app.db.query_metrics").setLevel(logging.ERROR)
+
+    engine = create_db_engine(args.db)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            print("Database already has data; pass --reset to replace it")
+            return 1
+    start = time.perf_counter()
+    print(f"Generating the {args.scale} data set into {engine.url.render_as_string(hide_password=True)}")
+    generate(engine, Sizes(SCALES[args.scale]), args.seed)
+    print(f"Done in {time.perf_counter() - start:.1f}s. For dashboard data run DATABASE_URL={args.db} python -m app.core.rollups --full")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,196 @@
+"""Run the benchmark workloads and compare them with a stored baseline.
+
+    python -m app.bench.run --scale 10k --db sqlite:///bench-10k.db
+    python -m app.bench.run --scale 10k --db ... --save-baseline
+    python -m app.bench.run --db ... --base-url http://localhost:8000
+
+Requests go through ``app.main`` in-process unless ``--base-url`` points
+at a running server (which needs ``SERVER_TIMING=true`` and the same
+``JWT_SECRET`` for statement counts and tokens). The exit status is 1 if
+any endpoint regressed against the baseline: p95 latency or throughput
+worse than ``--tolerance``, or more SQL statements per request.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from app.bench import SCALES
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+def percentile(ordered, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+def summarize(samples, wall_seconds: float, expected_statuses=()) -> dict:
+    ordered = sorted(s.seconds for s in samples)
+    counted = [s.statements for s in samples if s.statements >= 0]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s.status >= 400 and s.status not in expected_statuses),
+        "statuses": {str(code): sum(1 for s in samples if s.status == code) for code in sorted({s.status for s in samples})},
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "requests_per_second": round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+        "statements_per_request": round(sum(counted) / len(counted), 2) if counted else None,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for workload, result in results["workloads"].items():
+        for endpoint, now in result["endpoints"].items():
+            then = baseline.get("workloads", {}).get(workload, {}).get("endpoints", {}).get(endpoint)
+            if then is None:
+                continue
+            where = f"{workload} {endpoint}"
+            if now["p95_ms"] > then["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{where}: p95 {then['p95_ms']} ms -> {now['p95_ms']} ms")
+            if now["requests_per_second"] < then["requests_per_second"] * (1 - tolerance):
+                regressions.append(f"{where}: {then['requests_per_second']} -> {now['requests_per_second']} req/s")
+            # Statement counts are deterministic, so any increase is real
+            if None not in (now["statements_per_request"], then["statements_per_request"]) \
+                    and now["statements_per_request"] > then["statements_per_request"] + 0.5:
+                regressions.append(
+                    f"{where}: {then['statements_per_request']} -> {now['statements_per_request']} SQL statements per request"
+                )
+    return regressions
+
+def print_report(results: dict):
+    print(f"\nScale {results['scale']}, concurrency {results['concurrency']}")
+    header = f"  {'endpoint':<34} {'reqs':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'stmts':>6}"
+    for workload, result in results["workloads"].items():
+        print(f"\n{workload}: {result['iterations']} iterations, {result['iterations_per_second']} it/s")
+        print(header)
+        for endpoint, s in result["endpoints"].items():
+            stmts = "-" if s["statements_per_request"] is None else s["statements_per_request"]
+            print(
+                f"  {endpoint:<34} {s['requests']:>6} {s['errors']:>4} {s['p50_ms']:>8} {s['p95_ms']:>8} "
+                f"{s['p99_ms']:>8} {s['requests_per_second']:>8} {stmts:>6}"
+            )
+            if set(s["statuses"]) - {"200"}:
+                print(f"  {'':<34} statuses {s['statuses']}")
+        if "contested_slots" in result:
+            print(f"  {result['contested_slots']} contested slots")
+
+async def run_workload(client, workload, data, iterations: int, concurrency: int, seed: int):
+    from app.bench.workloads import Recorder
+
+    recorder = Recorder(client)
+    remaining = iter(range(iterations))
+
+    async def virtual_user(n: int):
+        rnd = random.Random(seed * 1000 + n)
+        for _ in remaining:
+            await workload(recorder, data, rnd)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(n) for n in range(concurrency)))
+    return recorder, time.perf_counter() - start
+
+async def bench(args) -> dict:
+    import httpx
+    from app.bench import workloads
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        data = workloads.BenchData.load(db)
+    if not data.patients:
+        raise SystemExit("No benchmark data; run python -m app.bench.datagen first")
+
+    results = {"scale": args.scale, "concurrency": args.concurrency, "workloads": {}}
+
+    async def run_all(client):
+        for name in args.workload or workloads.WORKLOADS:
+            workload = workloads.WORKLOADS[name]
+            if name == "booking_contention":
+                data.contested_slots = await workloads.contested_slots(client, data)
+            elif args.warmup:
+                # Booking warms up nothing but would take the contested slots
+                await run_workload(client, workload, data, args.warmup, args.concurrency, args.seed + 1)
+            recorder, wall = await run_workload(client, workload, data, args.iterations, args.concurrency, args.seed)
+            expected = workloads.EXPECTED_STATUSES.get(name, set())
+            results["workloads"][name] = {
+                "iterations": args.iterations,
+                "iterations_per_second": round(args.iterations / wall, 1),
+                "endpoints": {endpoint: summarize(samples, wall, expected) for endpoint, samples in recorder.samples.items()},
+            }
+            if name == "booking_contention":
+                # At most one 200 per slot; more would mean a double booking
+                results["workloads"][name]["contested_slots"] = len(data.contested_slots)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+            await run_all(client)
+    else:
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                await run_all(client)
+    return results
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.bench.run")
+    parser.add_argument("--db", required=True, help="SQLAlchemy URL of a database filled by app.bench.datagen")
+    parser.add_argument("--scale", choices=SCALES, default="10k", help="names the baseline; match the generated data")
+    parser.add_argument("--workload", action="append", help="run only these workloads (repeatable)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--baseline", type=Path, help="baseline JSON (default: app/bench/baselines/<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95/throughput slowdown, as a fraction")
+    parser.add_argument("--output", type=Path, help="also write the results JSON here")
+    args = parser.parse_args(argv)
+
+    # Settings are read at import, so configure the app before importing it
+    os.environ["DATABASE_URL"] = args.db
+    os.environ["SERVER_TIMING"] = "true"
+    os.environ.setdefault("ROLLUP_REFRESH_INTERVAL", "0")
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    from app.bench.workloads import WORKLOADS
+
+    unknown = set(args.workload or ()) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s) {sorted(unknown)}; choose from {list(WORKLOADS)}")
+    # Per-request INFO logging would dominate the timings
+    for name in ("app", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = asyncio.run(bench(args))
+    print_report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.scale}.json"
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; pass --save-baseline to create one")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {baseline_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,128 @@
+"""Scripted workloads for ``app.bench.run``.
+
+A workload is an async function run once per iteration by every virtual
+user; it issues its requests through a ``Recorder``, which times them and
+reads the SQL statement count from the ``Server-Timing`` header.
+"""
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import List
+from sqlalchemy import func, select
+from app.bench.datagen import BENCH_PASSWORD, email
+from app.core.security import create_access_token
+from app.db.models.doctor import Doctor
+from app.db.models.patient import Patient
+from app.db.models.pharmacy import Medicine
+from app.db.models.user import User
+
+API = "/api/v1"
+SEARCH_PREFIXES = ("par", "ibu", "amox", "asp", "met", "ome", "cet", "pfizer", "bayer", "insulin 50")
+_STATEMENTS = re.compile(r'db;[^,]*desc="(\d+) statements"')
+
+@dataclass
+class Sample:
+    seconds: float
+    status: int
+    statements: int
+
+@dataclass
+class BenchData:
+    """What the workloads need to know about the generated data set."""
+    patients: int
+    doctor_ids: List[int]
+    hospitals: int
+    medicines: int
+    # Slots the booking workload fights over, as (doctor_id, start)
+    contested_slots: list = field(default_factory=list)
+
+    @classmethod
+    def load(cls, db):
+        return cls(
+            patients=db.execute(select(func.count()).select_from(Patient)).scalar(),
+            doctor_ids=db.execute(select(Doctor.id).order_by(Doctor.id)).scalars().all(),
+            hospitals=db.execute(select(func.count()).select_from(User).where(User.role == "pharmacist")).scalar(),
+            medicines=db.execute(select(func.count()).select_from(Medicine)).scalar(),
+        )
+
+def token(role: str, n: int = 1) -> dict:
+    value = create_access_token({"sub": email(role, n), "role": role}, expires_delta=timedelta(hours=2))
+    return {"Authorization": f"Bearer {value}"}
+
+class Recorder:
+    """Wraps an httpx.AsyncClient and keeps one Sample per request."""
+
+    def __init__(self, client):
+        self.client = client
+        self.samples = defaultdict(list)
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, API + url, **kwargs)
+        seconds = time.perf_counter() - start
+        match = _STATEMENTS.search(response.headers.get("server-timing", ""))
+        self.samples[name].append(Sample(seconds, response.status_code, int(match.group(1)) if match else -1))
+        return response
+
+async def login_storm(rec: Recorder, data: BenchData, rnd: random.Random):
+    """Patients logging in; dominated by password hashing."""
+    n = rnd.randint(1, data.patients)
+    await rec.request("POST /auth/login", "POST", "/auth/login", params={"email": email("patient", n), "password": BENCH_PASSWORD})
+
+async def patient_dashboard(rec: Recorder, data: BenchData, rnd: random.Random):
+    """What the patient home screen loads."""
+    headers = token("patient", rnd.randint(1, data.patients))
+    await rec.request("GET /auth/me", "GET", "/auth/me", headers=headers)
+    await rec.request("GET /appointments/", "GET", "/appointments/", params={"limit": 20, "sort": "-scheduled_time"}, headers=headers)
+    await rec.request("GET /prescriptions/", "GET", "/prescriptions/", params={"limit": 20}, headers=headers)
+    await rec.request(
+        "GET /appointments/available-slots", "GET", "/appointments/available-slots",
+        params={"doctor_id": rnd.choice(data.doctor_ids), "limit": 5}, headers=headers,
+    )
+
+async def pharmacist_inventory(rec: Recorder, data: BenchData, rnd: random.Random):
+    """A pharmacist paging through the catalog, searching it and checking stock."""
+    headers = token("pharmacist", rnd.randint(1, data.hospitals))
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 50, **({"cursor": cursor} if cursor else {})}
+        response = await rec.request("GET /pharmacy/medicines", "GET", "/pharmacy/medicines", params=params, headers=headers)
+        cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        if not cursor:
+            break
+    await rec.request(
+        "GET /pharmacy/medicines/search", "GET", "/pharmacy/medicines/search",
+        params={"q": rnd.choice(SEARCH_PREFIXES)}, headers=headers,
+    )
+    await rec.request("GET /pharmacy/inventory-details", "GET", "/pharmacy/inventory-details", headers=headers)
+
+async def booking_contention(rec: Recorder, data: BenchData, rnd: random.Random):
+    """Many patients booking the same few free slots; all but one per slot get 409."""
+    n = rnd.randint(1, data.patients)
+    doctor_id, start = rnd.choice(data.contested_slots)
+    await rec.request("POST /appointments/", "POST", "/appointments/", headers=token("patient", n), json={
+        "patient_id": n, "doctor_id": doctor_id, "scheduled_time": start,
+    })
+
+async def contested_slots(client, data: BenchData, doctors: int = 3, per_doctor: int = 4):
+    """Pick the next free slots of a few doctors for ``booking_contention``."""
+    slots = []
+    for doctor_id in data.doctor_ids[:doctors]:
+        response = await client.get(
+            f"{API}/appointments/available-slots", params={"doctor_id": doctor_id, "limit": per_doctor}, headers=token("admin"),
+        )
+        response.raise_for_status()
+        slots += [(doctor_id, slot["start"]) for slot in response.json()["slots"]]
+    return slots
+
+WORKLOADS = {
+    "login_storm": login_storm,
+    "patient_dashboard": patient_dashboard,
+    "pharmacist_inventory": pharmacist_inventory,
+    "booking_contention": booking_contention,
+}
+# Responses these workloads expect besides 2xx
+EXPECTED_STATUSES = {"booking_contention": {409}}
@@ -0,0 +1,210 @@
+"""Cross-hospital analytics computed with pandas over chunked column extracts.
+
+Each metric streams only the columns it needs, ``ANALYTICS_CHUNK_SIZE`` rows
+at a time, and folds per-chunk group-bys together, so memory stays bounded
+by the number of groups rather than the number of rows.
+
+``python -m app.core.analytics --start 2024-01-01 --end 2024-03-31`` prints
+the same JSON the /system-admin/analytics endpoint serves.
+"""
+import argparse
+import json
+import sys
+from datetime import date, datetime, time, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, or_, select
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.process_pool import BoundedProcessPool
+from app.db.models.appointment import Appointment, FREE_STATUSES
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.hospital import Staff
+from app.db.models.lab import LabOrder, LabResult, LabTest
+from app.db.models.pharmacy import Medicine, PharmacyOrder
+from app.db.session import engine
+
+ANALYTICS_CHUNK_SIZE = 50_000
+# Past appointments still in one of these states were never attended
+NO_SHOW_STATUSES = ("no-show", "no_show", "missed", "scheduled", "pending", "confirmed")
+# Orders in these states consumed no stock
+UNFILLED_ORDER_STATUSES = ("cancelled", "expired")
+
+analytics_pool = BoundedProcessPool(
+    "analytics", settings.ANALYTICS_WORKERS, settings.ANALYTICS_MAX_PENDING
+)
+# Keyed by (start, end)
+analytics_cache = TTLCache(maxsize=64, ttl=settings.ANALYTICS_CACHE_TTL)
+
+def iter_frames(conn, stmt, chunk_size: int = ANALYTICS_CHUNK_SIZE):
+    result = conn.execute(stmt.execution_options(yield_per=chunk_size))
+    columns = list(result.keys())
+    for rows in result.partitions():
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+def _fold(frames, aggregate):
+    """Sum the per-chunk aggregates of ``frames`` into one frame."""
+    total = None
+    for frame in frames:
+        part = aggregate(frame)
+        total = part if total is None else total.add(part, fill_value=0)
+    return total
+
+def _records(frame: pd.DataFrame):
+    # NaN is not valid JSON; report missing ratios as null
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+def _not_in(column, values):
+    return or_(column.is_(None), column.not_in(values))
+
+def doctor_hospitals(conn) -> pd.Series:
+    # A doctor counts towards the first hospital that lists them as staff
+    stmt = (
+        select(Doctor.id.label("doctor_id"), func.min(Staff.hospital_id).label("hospital_id"))
+        .outerjoin(Staff, Staff.user_id == Doctor.user_id)
+        .group_by(Doctor.id)
+    )
+    frame = pd.DataFrame(conn.execute(stmt).all(), columns=["doctor_id", "hospital_id"])
+    return frame.set_index("doctor_id")["hospital_id"].astype("Int64")
+
+def no_show_rates(conn, lo: datetime, hi: datetime, hospitals: pd.Series):
+    hi = min(hi, datetime.utcnow())
+    stmt = select(Appointment.doctor_id, Appointment.status).where(
+        Appointment.scheduled_time >= lo,
+        Appointment.scheduled_time < hi,
+        _not_in(Appointment.status, FREE_STATUSES),
+    )
+    counts = _fold(iter_frames(conn, stmt), lambda df: pd.DataFrame({
+        "doctor_id": df["doctor_id"],
+        "appointments": 1,
+        "no_shows": df["status"].isin(NO_SHOW_STATUSES).astype(np.int64),
+    }).groupby("doctor_id").sum())
+    if counts is None:
+        return []
+    counts["hospital_id"] = hospitals.reindex(counts.index)
+    per_hospital = counts.groupby("hospital_id", dropna=False)[["appointments", "no_shows"]].sum().reset_index()
+    per_hospital["no_show_rate"] = per_hospital["no_shows"] / per_hospital["appointments"]
+    return _records(per_hospital)
+
+def doctor_utilisation(conn, start: date, end: date, hospitals: pd.Series):
+    """Booked slots over template capacity per doctor, for days in [start, end)."""
+    lo, hi = datetime.combine(start, time.min), datetime.combine(end, time.min)
+    stmt = select(Appointment.doctor_id).where(
+        Appointment.scheduled_time >= lo,
+        Appointment.scheduled_time < hi,
+        _not_in(Appointment.status, FREE_STATUSES),
+    )
+    booked = _fold(iter_frames(conn, stmt), lambda df: df.groupby("doctor_id").size().to_frame("booked"))
+    templates = pd.DataFrame(
+        conn.execute(select(
+            DoctorSchedule.doctor_id, DoctorSchedule.weekday, DoctorSchedule.start_time,
+            DoctorSchedule.end_time, DoctorSchedule.slot_minutes,
+        )).all(),
+        columns=["doctor_id", "weekday", "start_time", "end_time", "slot_minutes"],
+    )
+    # How many times each weekday occurs in the window
+    weekday_counts = np.bincount(pd.date_range(start, end - timedelta(days=1)).weekday, minlength=7)
+    if templates.empty:
+        capacity = pd.DataFrame(columns=["capacity"], index=pd.Index([], name="doctor_id"))
+    else:
+        minutes = (
+            pd.to_timedelta(templates["end_time"].astype(str)) - pd.to_timedelta(templates["start_time"].astype(str))
+        ).dt.total_seconds() // 60
+        slots_per_day = (minutes // templates["slot_minutes"]).clip(lower=0)
+        templates["capacity"] = slots_per_day * weekday_counts[templates["weekday"].to_numpy()]
+        capacity = templates.groupby("doctor_id")[["capacity"]].sum()
+    if booked is None:
+        booked = pd.DataFrame(columns=["booked"], index=pd.Index([], name="doctor_id"))
+    frame = booked.join(capacity, how="outer").fillna(0)
+    if frame.empty:
+        return []
+    frame["hospital_id"] = hospitals.reindex(frame.index)
+    frame["utilisation"] = frame["booked"] / frame["capacity"].replace(0, np.nan)
+    return _records(frame.reset_index().astype({"doctor_id": "int64", "booked": "int64", "capacity": "int64"}))
+
+def lab_turnaround(conn, lo: datetime, hi: datetime):
+    """Hours from LabOrder.ordered_at to LabResult.reported_at, per test."""
+    stmt = (
+        select(LabOrder.test_id, LabOrder.ordered_at, LabResult.reported_at)
+        .join(LabOrder, LabResult.order_id == LabOrder.id)
+        .where(LabResult.reported_at >= lo, LabResult.reported_at < hi)
+    )
+    parts = []
+    for df in iter_frames(conn, stmt):
+        hours = (pd.to_datetime(df["reported_at"]) - pd.to_datetime(df["ordered_at"])).dt.total_seconds() / 3600
+        parts.append(pd.DataFrame({"test_id": df["test_id"].to_numpy(), "hours": hours.to_numpy(dtype=np.float32)}))
+    if not parts:
+        return []
+    # Quantiles need every value, so keep just the two narrow columns
+    frame = pd.concat(parts, ignore_index=True)
+    stats = frame.groupby("test_id")["hours"].agg(
+        results="size", mean_hours="mean", median_hours="median", p90_hours=lambda s: s.quantile(0.9)
+    ).reset_index()
+    names = dict(conn.execute(select(LabTest.id, LabTest.name)).all())
+    stats.insert(1, "test_name", stats["test_id"].map(names))
+    return _records(stats.astype({"mean_hours": "float64", "median_hours": "float64", "p90_hours": "float64"}).round(2))
+
+def medicine_consumption(conn, lo: datetime, hi: datetime):
+    """Units ordered per medicine and month, excluding cancelled or expired orders."""
+    stmt = select(PharmacyOrder.medicine_id, PharmacyOrder.quantity, PharmacyOrder.ordered_at).where(
+        PharmacyOrder.ordered_at >= lo,
+        PharmacyOrder.ordered_at < hi,
+        _not_in(PharmacyOrder.status, UNFILLED_ORDER_STATUSES),
+    )
+    monthly = _fold(iter_frames(conn, stmt), lambda df: df.assign(
+        month=pd.to_datetime(df["ordered_at"]).dt.strftime("%Y-%m")
+    ).groupby(["medicine_id", "month"])[["quantity"]].sum())
+    if monthly is None:
+        return []
+    names = dict(conn.execute(select(Medicine.id, Medicine.name)).all())
+    monthly = monthly.astype("int64").reset_index()
+    return [
+        {
+            "medicine_id": int(medicine_id),
+            "medicine_name": names.get(medicine_id),
+            "units": int(group["quantity"].sum()),
+            "monthly": dict(zip(group["month"], group["quantity"].astype(int).tolist())),
+        }
+        for medicine_id, group in monthly.groupby("medicine_id")
+    ]
+
+def compute(start: date, end: date) -> dict:
+    """All metrics for days in [start, end); runs in a worker process or the CLI."""
+    lo, hi = datetime.combine(start, time.min), datetime.combine(end, time.min)
+    with engine.connect() as conn:
+        hospitals = doctor_hospitals(conn)
+        return {
+            "start": start.isoformat(),
+            "end": (end - timedelta(days=1)).isoformat(),
+            "generated_at": datetime.utcnow().isoformat(),
+            "no_show_rates": no_show_rates(conn, lo, hi, hospitals),
+            "doctor_utilisation": doctor_utilisation(conn, start, end, hospitals),
+            "lab_turnaround": lab_turnaround(conn, lo, hi),
+            "medicine_consumption": medicine_consumption(conn, lo, hi),
+        }
+
+async def cached_analytics(start: date, end: date, refresh: bool = False) -> dict:
+    key = (start, end)
+    result = None if refresh else analytics_cache.get(key)
+    if result is None:
+        result = await analytics_pool.run(compute, start, end)
+        analytics_cache.set(key, result)
+    return result
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.core.analytics")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="inclusive")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    result = compute(args.start, args.end + timedelta(days=1))
+    text = json.dumps(result, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
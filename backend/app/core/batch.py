@@ -0,0 +1,39 @@
+"""Per-item outcomes for the batch write endpoints.
+
+Batch handlers validate every item with a few set-based reads, then apply
+the valid ones with bulk statements and a single commit. Invalid items are
+reported and skipped; with ``atomic`` set, one invalid item means nothing
+is written.
+"""
+from typing import Optional
+
+class BatchOutcomes:
+    def __init__(self, size: int):
+        self._items = [None] * size
+
+    def ok(self, index: int, status: str, id: Optional[int] = None):
+        self._items[index] = {"index": index, "status": status, "id": id, "detail": None}
+
+    def fail(self, index: int, detail: str):
+        self._items[index] = {"index": index, "status": "failed", "id": None, "detail": detail}
+
+    def failed(self, index: int) -> bool:
+        return self._items[index] is not None and self._items[index]["status"] == "failed"
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for item in self._items if item["status"] == "failed")
+
+    def should_apply(self, atomic: bool) -> bool:
+        return not (atomic and self.failures)
+
+    def result(self, committed: bool) -> dict:
+        items = self._items
+        if not committed:
+            items = [item if item["status"] == "failed" else {**item, "status": "skipped"} for item in items]
+        return {
+            "committed": committed,
+            "applied": sum(1 for item in items if item["status"] not in ("failed", "skipped")),
+            "failed": self.failures,
+            "items": items,
+        }
@@ -0,0 +1,41 @@
+"""Content-addressed file store for generated documents and backups.
+
+A blob is named by the SHA-256 of its bytes, so storing the same document
+twice keeps one copy and a key always names the same content. Files live
+under BLOB_STORE_DIR, fanned out by the first two hex digits of the key.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from app.core.config import settings
+
+_KEY = re.compile(r"[0-9a-f]{64}")
+
+def key_for(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def path(key: str) -> Path:
+    if not _KEY.fullmatch(key):
+        raise ValueError(f"Not a blob key: {key!r}")
+    return Path(settings.BLOB_STORE_DIR) / key[:2] / key
+
+def exists(key: str) -> bool:
+    return path(key).exists()
+
+def put(data: bytes) -> str:
+    key = key_for(data)
+    target = path(key)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write aside and rename, so readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return key
@@ -3,13 +3,127 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def async_url(url: str) -> str:
+    """Swap the blocking DBAPI driver in ``url`` for its asyncio counterpart."""
+    for sync_prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("mysql+pymysql://", "mysql+aiomysql://"),
+        ("mysql://", "mysql+aiomysql://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
 class Settings:
     SQLITE_DB_URL = os.getenv("SQLITE_DB_URL", "sqlite:///./hms_tajikistan.db")
+    # Server database (e.g. mysql+pymysql://...); takes precedence over SQLite
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    # URL for async handlers; derived from the sync URL when unset
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
     JWT_SECRET = os.getenv("JWT_SECRET")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    # Authenticated users are cached by token subject; writes to a user
+    # invalidate it in-process, the TTL bounds staleness across workers
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+    # bcrypt cost factor; stored hashes with a different cost are rehashed at login
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Hashing runs in its own process pool; requests past the queue limit get a 429
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    # Fail any request that runs more SQL statements than this (0 disables).
+    # Meant for test runs, to catch N+1 lazy loading regressions.
+    SQL_STATEMENT_BUDGET = int(os.getenv("SQL_STATEMENT_BUDGET", "0"))
+    # Seconds a pending pharmacy order holds its stock before it is released
+    STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", "900"))
+    # Dashboard rollups are rebuilt every ROLLUP_REFRESH_INTERVAL seconds
+    # (0 disables) for a window of days around today; older days only change
+    # on a full rebuild (python -m app.core.rollups --full)
+    ROLLUP_REFRESH_INTERVAL = int(os.getenv("ROLLUP_REFRESH_INTERVAL", "300"))
+    ROLLUP_LOOKBACK_DAYS = int(os.getenv("ROLLUP_LOOKBACK_DAYS", "3"))
+    # Appointments are booked ahead, so future days are refreshed too
+    ROLLUP_LOOKAHEAD_DAYS = int(os.getenv("ROLLUP_LOOKAHEAD_DAYS", "60"))
+    # Cross-hospital analytics run in their own process pool and are cached
+    # per date window
+    ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "1"))
+    ANALYTICS_MAX_PENDING = int(os.getenv("ANALYTICS_MAX_PENDING", "4"))
+    ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "600"))
+    # Catalog response cache: "memory" (per process) or "redis" (shared, needs
+    # the redis package). Writes invalidate it; the TTL bounds staleness from
+    # changes that do not, such as stock moving with every order.
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    # Seconds the search vocabulary used for typo matching is cached; new
+    # words match exactly at once and by near-spelling after this
+    SEARCH_VOCAB_TTL = int(os.getenv("SEARCH_VOCAB_TTL", "300"))
+    # Background jobs (PDFs, backups) run in a process pool of this size in
+    # every API process; 0 runs none there, leaving them to standalone
+    # workers (python -m app.core.jobs)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    # Seconds between checks for due jobs; jobs queued in-process start at once
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Seconds before the first retry; doubles with every further attempt
+    JOB_RETRY_BACKOFF = int(os.getenv("JOB_RETRY_BACKOFF", "5"))
+    # A job still running after this many seconds is presumed lost and retried
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # Content-addressed store for job output
+    BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "./blobs")
+    # Rendered prescription and lab report PDFs, kept until their row changes
+    DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", "./document_cache")
+    # Push channel (/events): how many events a connection may fall behind
+    # before it is told to resync, and seconds between keep-alive pings
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "64"))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "25"))
+
+    # Require "Authorization: Bearer <token>" on /metrics when set
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # Add a Server-Timing header (total, DB time, slowest statements) to
+    # every response; it shows internals, so it is off by default
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+    # Log SQL statements at least this slow (0 disables)
+    SLOW_STATEMENT_MS = int(os.getenv("SLOW_STATEMENT_MS", "500"))
+    # Distinct statements tracked for /system-admin/slow-statements
+    STATEMENT_STATS_SIZE = int(os.getenv("STATEMENT_STATS_SIZE", "1000"))
+
+    # Comma-separated read replica URLs (sync drivers) for read-only handlers;
+    # empty sends everything to the primary
+    READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+    # Replicas further behind the primary's heartbeat than this are skipped
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))
+    # Seconds between primary heartbeats and replica lag checks
+    REPLICA_HEARTBEAT_INTERVAL = float(os.getenv("REPLICA_HEARTBEAT_INTERVAL", "1"))
+    # Local testing only: copy the SQLite primary into SQLite replica files
+    # this often (0 disables; see python -m app.db.replicas sync)
+    REPLICA_SQLITE_COPY_INTERVAL = float(os.getenv("REPLICA_SQLITE_COPY_INTERVAL", "0"))
+
+    # Connection pool profile for server databases
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # SQLite tuning, applied as PRAGMAs on every new connection.
+    # WAL lets readers run alongside a writer; NORMAL skips the fsync per commit.
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Negative values are KiB, so -65536 is a 64 MiB page cache per connection
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
 
     @property
     def SQLALCHEMY_DATABASE_URI(self):
-        return self.SQLITE_DB_URL
+        return self.DATABASE_URL or self.SQLITE_DB_URL
+
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self):
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return async_url(self.SQLALCHEMY_DATABASE_URI)
 
 settings = Settings() 
\ No newline at end of file
@@ -1,10 +1,16 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.pagination import PageParams, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.principal import Principal, principal_cache, load_principal
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.db import replicas, tenancy
 from app.db.models.user import User
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -15,28 +21,73 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Read-only handlers: SELECTs may be served by a read replica (app.db.replicas)
+
+def get_read_db():
+    db = replicas.ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with replicas.AsyncReadSessionLocal() as db:
+        yield db
+
+def get_page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor, sort=sort)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
     if not settings.JWT_SECRET:
         raise credentials_exception
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        username = payload.get("sub")
-        if not isinstance(username, str):
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    if not isinstance(payload.get("sub"), str):
+        raise credentials_exception
+    return payload
+
+async def get_current_user(claims: dict = Depends(get_token_claims)) -> Principal:
+    """Resolve the token subject to a cached Principal; only a cache miss hits the DB."""
+    email = claims["sub"]
+    principal = principal_cache.get(email)
+    if principal is None:
+        principal = await run_in_threadpool(load_principal, email)
+    if principal is None or principal.is_active is False:
+        raise credentials_exception
+    # The token's role claim is stale once the stored role changes
+    if claims.get("role") is not None and claims["role"] != principal.role:
         raise credentials_exception
-    return user
+    # Sessions used by the rest of this request only see the user's hospital
+    tenancy.activate(tenancy.tenant_for(principal))
+    replicas.current_user_id.set(principal.id)
+    return principal
 
 def require_roles(*roles):
-    def role_checker(user: User = Depends(get_current_user)):
+    # Accept both require_roles("a", "b") and require_roles(["a", "b"])
+    if len(roles) == 1 and isinstance(roles[0], (list, tuple, set)):
+        roles = tuple(roles[0])
+
+    async def role_checker(claims: dict = Depends(get_token_claims)):
+        # Trust the signed role claim to reject early, before any user lookup
+        if claims.get("role") is not None and claims["role"] not in roles:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        user = await get_current_user(claims)
         if user.role not in roles:
             raise HTTPException(status_code=403, detail="Not enough permissions")
         return user
@@ -0,0 +1,64 @@
+"""Rendered documents served from disk until the row behind them changes.
+
+An entry is ``DOCUMENT_CACHE_DIR/<kind>/<row id>/<hash>.pdf``, where the
+hash covers the template and every value the document shows, so a changed
+row simply misses. Writes to the row also call ``invalidate`` so superseded
+renders do not pile up. The hash doubles as the ETag: a client holding the
+current version gets a 304 without the file being read at all.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from app.core.config import settings
+
+def _row_dir(kind: str, row_id: int) -> Path:
+    return Path(settings.DOCUMENT_CACHE_DIR) / kind / str(int(row_id))
+
+def content_hash(template, values: dict) -> str:
+    data = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(f"{template.digest}\0{data}".encode()).hexdigest()
+
+def invalidate(kind: str, row_id: int):
+    shutil.rmtree(_row_dir(kind, row_id), ignore_errors=True)
+
+def _tee(target: Path, chunks):
+    """Pass ``chunks`` through while saving them to ``target``."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    done = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        # Only a complete document is published; readers never see a partial one
+        os.replace(tmp, target)
+        done = True
+    except FileNotFoundError:
+        # Invalidated while rendering; the client still got its copy
+        pass
+    finally:
+        if not done:
+            Path(tmp).unlink(missing_ok=True)
+
+def pdf_response(request: Request, kind: str, row_id: int, template, values: dict, filename: str) -> Response:
+    """Serve ``template`` filled with ``values``: 304, cached file, or a fresh render streamed as it is written."""
+    digest = content_hash(template, values)
+    headers = {
+        "ETag": f'"{digest}"',
+        "Content-Disposition": f'inline; filename="{filename}"',
+        # Revalidate every time; an unchanged document costs a 304
+        "Cache-Control": "private, no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    cached = _row_dir(kind, row_id) / f"{digest}.pdf"
+    if cached.exists():
+        return FileResponse(cached, media_type="application/pdf", headers=headers)
+    # A sync iterator, so Starlette renders it in the threadpool, off the event loop
+    return StreamingResponse(_tee(cached, template.stream(values)), media_type="application/pdf", headers=headers)
@@ -0,0 +1,138 @@
+"""Documents: PDF templates, the rows behind them, and background job handlers.
+
+The ``*_stmt`` selects work with both sync and async sessions; the
+``*_values`` functions turn what they load into the fields a template
+shows. Job handlers take a sync session plus the job's params and return
+``(data, content_type, filename)``. They run in job worker processes,
+under the tenant scope of the user who queued the job.
+"""
+import json
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, joinedload
+from app.core import pdf
+from app.db.models.doctor import Doctor
+from app.db.models.lab import LabOrder, LabResult
+from app.db.models.patient import Patient
+from app.db.models.pharmacy import Inventory, Medicine
+from app.db.models.prescription import Prescription
+
+PRESCRIPTION = pdf.Template("Prescription #{id}", """
+Patient: {patient}
+Doctor: {doctor}
+Issued: {issued}
+
+Medications:
+  - {medications*}
+
+Notes:
+{notes*}
+""")
+
+LAB_REPORT = pdf.Template("Lab report, order #{order_id}", """
+Patient: {patient}
+Test: {test}
+Ordered: {ordered}
+Status: {status}
+
+{results*}
+""")
+
+class DocumentNotFound(Exception):
+    """The row a job was queued for is gone; retrying will not help."""
+
+def _name(person) -> str:
+    return person.user.full_name if person is not None and person.user is not None else "-"
+
+def _when(value, fmt: str = "%Y-%m-%d %H:%M") -> str:
+    return value.strftime(fmt) if value else "-"
+
+def _medications(value):
+    # Stored as a JSON list or as comma-separated text
+    try:
+        items = json.loads(value) if value else []
+    except ValueError:
+        items = value.split(",")
+    if not isinstance(items, list):
+        items = [items]
+    return [str(item).strip() for item in items if str(item).strip()]
+
+def prescription_stmt(prescription_id: int):
+    return select(Prescription).where(Prescription.id == prescription_id).options(
+        joinedload(Prescription.patient).joinedload(Patient.user),
+        joinedload(Prescription.doctor).joinedload(Doctor.user),
+    )
+
+def prescription_values(pres: Prescription) -> dict:
+    return {
+        "id": pres.id,
+        "patient": _name(pres.patient),
+        "doctor": _name(pres.doctor),
+        "issued": _when(pres.date_issued, "%Y-%m-%d"),
+        "medications": _medications(pres.medications),
+        "notes": pres.notes.splitlines() if pres.notes else ["-"],
+    }
+
+def lab_order_stmt(order_id: int):
+    return select(LabOrder).where(LabOrder.id == order_id).options(
+        joinedload(LabOrder.patient).joinedload(Patient.user), joinedload(LabOrder.test),
+    )
+
+def lab_result_stmt(result_id: int):
+    # Joined, so the order comes back in the same query
+    return select(LabResult).join(LabResult.order).where(LabResult.id == result_id).options(
+        contains_eager(LabResult.order).joinedload(LabOrder.patient).joinedload(Patient.user),
+        contains_eager(LabResult.order).joinedload(LabOrder.test),
+    )
+
+def lab_report_values(order: LabOrder, results) -> dict:
+    lines = []
+    for result in results:
+        lines += [f"Result #{result.id} (reported {_when(result.reported_at)}):", *(result.result or "-").splitlines(), ""]
+    return {
+        "order_id": order.id,
+        "patient": _name(order.patient),
+        "test": order.test.name if order.test else "-",
+        "ordered": _when(order.ordered_at),
+        "status": order.status,
+        "results": lines or ["No results reported yet."],
+    }
+
+def prescription_pdf(db, prescription_id: int):
+    pres = db.execute(prescription_stmt(prescription_id)).scalar_one_or_none()
+    if pres is None:
+        raise DocumentNotFound(f"Prescription {prescription_id} not found")
+    return PRESCRIPTION.render(prescription_values(pres)), "application/pdf", f"prescription-{pres.id}.pdf"
+
+def lab_report_pdf(db, order_id: int, result_id: int = None):
+    """Report for a lab order; all of its results, or only ``result_id``."""
+    order = db.execute(lab_order_stmt(order_id)).scalar_one_or_none()
+    if order is None:
+        raise DocumentNotFound(f"Lab order {order_id} not found")
+    stmt = select(LabResult).where(LabResult.order_id == order_id).order_by(LabResult.reported_at, LabResult.id)
+    if result_id is not None:
+        stmt = stmt.where(LabResult.id == result_id)
+    results = db.execute(stmt).scalars().all()
+    suffix = f"-result-{result_id}" if result_id is not None else ""
+    return LAB_REPORT.render(lab_report_values(order, results)), "application/pdf", f"lab-order-{order.id}{suffix}.pdf"
+
+def pharmacy_backup(db):
+    """Catalog and stock batches as JSON; batches are limited to the job's hospital."""
+    medicines = db.execute(select(Medicine).order_by(Medicine.id)).scalars().all()
+    batches = db.execute(select(Inventory).order_by(Inventory.id)).scalars().all()
+    data = {
+        "medicines": [
+            {c.name: getattr(m, c.name) for c in Medicine.__table__.columns} for m in medicines
+        ],
+        "inventory": [
+            {c.name: getattr(b, c.name) for c in Inventory.__table__.columns} for b in batches
+        ],
+    }
+    # No timestamp inside, so unchanged settings back up to the same blob
+    body = json.dumps(data, default=str, sort_keys=True, indent=1).encode()
+    return body, "application/json", "pharmacy-backup.json"
+
+HANDLERS = {
+    "prescription_pdf": prescription_pdf,
+    "lab_report_pdf": lab_report_pdf,
+    "pharmacy_backup": pharmacy_backup,
+}
@@ -0,0 +1,120 @@
+"""In-process pub/sub behind the /events push channels (SSE and WebSocket).
+
+Each connection subscribes to its user's topic. Handlers queue events on
+their session with ``notify``; like principal invalidation, they are
+published once the transaction commits and dropped on rollback. An event
+is encoded once however many connections receive it.
+
+A connection buffers at most EVENTS_QUEUE_SIZE events. One that falls
+further behind loses the oldest and is sent a ``resync`` event, telling
+the client to reload through the list endpoints, so slow readers cannot
+pile up memory. An idle connection costs one parked coroutine.
+
+Delivery is per process: behind several workers, a client hears about the
+writes handled by the worker it is connected to.
+"""
+import asyncio
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core import metrics
+from app.core.config import settings
+from app.core.serialization import dumps
+
+RESYNC = ("resync", '{"type":"resync"}')
+
+def user_topic(user_id: int) -> str:
+    return f"user:{user_id}"
+
+class Subscription:
+    __slots__ = ("_messages", "_ready", "_lagged")
+
+    def __init__(self, size: int):
+        self._messages = deque(maxlen=size)
+        self._ready = asyncio.Event()
+        self._lagged = False
+
+    def put(self, message):
+        if len(self._messages) == self._messages.maxlen:
+            self._lagged = True
+            metrics.events_dropped.inc()
+        self._messages.append(message)
+        self._ready.set()
+
+    async def get(self, timeout: float):
+        """Every buffered ``(type, json)`` message; empty if none came within ``timeout``."""
+        if not self._messages:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        messages = list(self._messages)
+        self._messages.clear()
+        if self._lagged:
+            self._lagged = False
+            messages.insert(0, RESYNC)
+        return messages
+
+class Broker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._topics = defaultdict(set)
+        self._loop = None
+
+    @contextmanager
+    def subscribe(self, transport: str, *topics: str):
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.queue_size)
+        for topic in topics:
+            self._topics[topic].add(subscription)
+        metrics.event_subscribers.inc(transport)
+        try:
+            yield subscription
+        finally:
+            metrics.event_subscribers.inc(transport, amount=-1)
+            for topic in topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def _deliver(self, topic: str, message):
+        for subscription in self._topics.get(topic, ()):
+            subscription.put(message)
+
+    def publish(self, topic: str, message):
+        if topic not in self._topics:
+            return
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(topic, message)
+        elif not loop.is_closed():
+            # From a sync handler in the threadpool
+            loop.call_soon_threadsafe(self._deliver, topic, message)
+
+broker = Broker(settings.EVENTS_QUEUE_SIZE)
+
+def notify(session, user_ids, event_type: str, **data):
+    """Publish ``event_type`` to the topics of ``user_ids`` once ``session`` commits."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        session.info.setdefault("pending_events", []).append((user_ids, event_type, data))
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    for user_ids, event_type, data in session.info.pop("pending_events", ()):
+        message = (event_type, dumps({"type": event_type, **data}).decode())
+        metrics.events_published.inc(event_type)
+        for user_id in user_ids:
+            broker.publish(user_topic(user_id), message)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("pending_events", None)
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from app.db.replicas import ReadSessionLocal
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Rows fetched per server-side cursor round-trip
+EXPORT_BATCH_SIZE = 1000
+
+def model_columns(model, exclude=()):
+    """Columns of a mapped model's table, minus any that must never leave the server."""
+    return [column for column in model.__table__.columns if column.key not in exclude]
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def iter_rows(stmt) -> Iterator[dict]:
+    """Yield rows of a Core select one at a time using a server-side cursor.
+
+    The generator owns its session because it outlives the request handler.
+    """
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            yield dict(row._mapping)
+    finally:
+        db.close()
+
+def iter_ndjson(datasets: Dict[str, object]) -> Iterator[str]:
+    tag = len(datasets) > 1
+    for name, stmt in datasets.items():
+        for row in iter_rows(stmt):
+            if tag:
+                row = {"dataset": name, **row}
+            yield json.dumps(row, default=_json_default) + "\n"
+
+def iter_csv(stmt) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in stmt.selected_columns])
+    for row in iter_rows(stmt):
+        writer.writerow(row.values())
+        # Flush the buffer every row so memory stays bounded by one line
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_export(datasets: Dict[str, object], fmt: str, filename: str, dataset: Optional[str] = None) -> StreamingResponse:
+    """Stream one or more named selects as NDJSON or CSV.
+
+    NDJSON can interleave several datasets (each line tagged with its name);
+    CSV has a single header, so it needs ``dataset`` to pick one.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Must be one of: {list(EXPORT_FORMATS)}")
+    if dataset is not None:
+        if dataset not in datasets:
+            raise HTTPException(status_code=400, detail=f"Invalid dataset. Must be one of: {list(datasets)}")
+        datasets = {dataset: datasets[dataset]}
+    if fmt == "csv":
+        if len(datasets) > 1:
+            raise HTTPException(status_code=400, detail=f"CSV export needs a dataset. Must be one of: {list(datasets)}")
+        body = iter_csv(next(iter(datasets.values())))
+    else:
+        body = iter_ndjson(datasets)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,201 @@
+"""Durable background jobs for slow work such as PDFs and backups.
+
+Jobs are rows in ``jobs``. A worker claims due jobs with a compare-and-set
+UPDATE that takes a lease, runs them in a process pool and puts the output
+in the blob store, where identical output is kept once. Failures are
+retried with exponential backoff up to ``max_attempts``; a job whose worker
+died is taken over once its lease runs out.
+
+Every API process runs a worker loop unless JOB_WORKERS is 0; more workers
+can run on their own with ``python -m app.core.jobs [--workers N]``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select, update
+from app.core import blob_store, events
+from app.core.config import settings
+from app.core.documents import HANDLERS, DocumentNotFound
+from app.core.process_pool import BoundedProcessPool
+from app.db.models.job import Job
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.db.tenancy import tenant_scope
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# The worker loop never claims more jobs than there are workers
+job_pool = BoundedProcessPool("jobs", max(settings.JOB_WORKERS, 1), max(settings.JOB_WORKERS, 1))
+# Set when a job is queued or finishes, so this process's loop need not wait for the next poll
+_wakeup = None
+
+def _params_json(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+async def enqueue(db, kind: str, params: dict, created_by: int = None) -> Job:
+    """Queue ``kind`` with ``params``, or return the same user's job for it still in flight."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    params_json = _params_json(params)
+    key = hashlib.sha256(f"{kind}:{params_json}".encode()).hexdigest()
+    job = (await db.execute(
+        select(Job).where(Job.dedupe_key == key, Job.created_by == created_by, Job.status.in_(ACTIVE_STATUSES)).limit(1)
+    )).scalar_one_or_none()
+    if job is not None:
+        return job
+    now = datetime.utcnow()
+    job = Job(
+        kind=kind, params=params_json, dedupe_key=key, status="queued", attempts=0,
+        max_attempts=settings.JOB_MAX_ATTEMPTS, run_after=now, created_by=created_by, created_at=now,
+    )
+    db.add(job)
+    await db.commit()
+    if _wakeup is not None:
+        _wakeup.set()
+    return job
+
+def describe(job: Job) -> dict:
+    """A JobRead for ``job``, with links to poll it and fetch its result."""
+    status_url = f"/api/v1/jobs/{job.id}"
+    return {
+        "id": job.id, "kind": job.kind, "status": job.status, "attempts": job.attempts,
+        "max_attempts": job.max_attempts, "error": job.error, "created_at": job.created_at,
+        "finished_at": job.finished_at, "status_url": status_url,
+        "result_url": f"{status_url}/result" if job.status == "succeeded" else None,
+    }
+
+def _claimable(now: datetime):
+    return and_(
+        Job.attempts < Job.max_attempts,
+        or_(
+            and_(Job.status == "queued", Job.run_after <= now),
+            # Its worker died or hung; the lease ran out
+            and_(Job.status == "running", Job.locked_until < now),
+        ),
+    )
+
+async def claim(db, limit: int):
+    """Take up to ``limit`` due jobs for this worker."""
+    now = datetime.utcnow()
+    # Lost on its last attempt: give up rather than run it again
+    await db.execute(
+        update(Job).where(Job.status == "running", Job.locked_until < now, Job.attempts >= Job.max_attempts)
+        .values(status="failed", error="Worker lost while running the job", locked_until=None, finished_at=now)
+    )
+    candidates = (await db.execute(
+        select(Job.id).where(_claimable(now)).order_by(Job.run_after).limit(limit)
+    )).scalars().all()
+    claimed = []
+    for job_id in candidates:
+        # Another worker may have taken it since the SELECT
+        result = await db.execute(
+            update(Job).where(Job.id == job_id, _claimable(now)).values(
+                status="running", attempts=Job.attempts + 1,
+                locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            )
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    await db.commit()
+    if not claimed:
+        return []
+    return (await db.execute(
+        select(Job.id, Job.kind, Job.params, Job.hospital_id, Job.attempts, Job.max_attempts, Job.created_by).where(Job.id.in_(claimed))
+    )).all()
+
+def execute(kind: str, params_json: str, hospital_id):
+    """Run one job in a job_pool process; returns (blob key, content type, filename)."""
+    with tenant_scope(hospital_id), SessionLocal() as db:
+        data, content_type, filename = HANDLERS[kind](db, **json.loads(params_json))
+    return blob_store.put(data), content_type, filename
+
+async def _finish(job, **values):
+    async with AsyncSessionLocal() as db:
+        # Only while still ours; a job that outlived its lease may have been taken over
+        result = await db.execute(
+            update(Job).where(Job.id == job.id, Job.status == "running", Job.attempts == job.attempts)
+            .values(locked_until=None, **values)
+        )
+        if result.rowcount == 1 and values["status"] != "queued":
+            # Reaches the user only when they are connected to this process
+            succeeded = values["status"] == "succeeded"
+            events.notify(
+                db, (job.created_by,), "job", id=job.id, kind=job.kind, status=values["status"],
+                error=values.get("error"), result_url=f"/api/v1/jobs/{job.id}/result" if succeeded else None,
+            )
+        await db.commit()
+
+async def run_job(job):
+    try:
+        key, content_type, filename = await job_pool.run(execute, job.kind, job.params, job.hospital_id)
+    except Exception as exc:
+        error = str(exc) or type(exc).__name__
+        now = datetime.utcnow()
+        if isinstance(exc, DocumentNotFound) or job.attempts >= job.max_attempts:
+            logger.warning("Job %s (%s) failed: %s", job.id, job.kind, error)
+            await _finish(job, status="failed", error=error, finished_at=now)
+        else:
+            delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            logger.info("Job %s (%s) attempt %s failed, retrying in %ss: %s", job.id, job.kind, job.attempts, delay, error)
+            await _finish(job, status="queued", error=error, run_after=now + timedelta(seconds=delay))
+    else:
+        await _finish(
+            job, status="succeeded", error=None, result_key=key, content_type=content_type,
+            filename=filename, finished_at=datetime.utcnow(),
+        )
+
+async def work(concurrency: int, poll_interval: float):
+    """Claim and run jobs until cancelled."""
+    global _wakeup
+    _wakeup = wakeup = asyncio.Event()
+    running = set()
+
+    def done(task):
+        running.discard(task)
+        wakeup.set()
+
+    try:
+        while True:
+            wakeup.clear()
+            free = concurrency - len(running)
+            if free > 0:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        jobs = await claim(db, free)
+                except Exception:
+                    logger.exception("Claiming jobs failed")
+                    jobs = []
+                for job in jobs:
+                    task = asyncio.create_task(run_job(job))
+                    running.add(task)
+                    task.add_done_callback(done)
+            try:
+                await asyncio.wait_for(wakeup.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        # Interrupted jobs are retried by whichever worker finds their lease expired
+        for task in running:
+            task.cancel()
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m app.core.jobs", description="Run a standalone job worker")
+    parser.add_argument("--workers", type=int, default=max(settings.JOB_WORKERS, 1))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    job_pool.max_workers = job_pool.max_pending = args.workers
+    try:
+        asyncio.run(work(args.workers, settings.JOB_POLL_INTERVAL))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        job_pool.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,218 @@
+"""Request, SQL and threadpool metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request by route template and keeps
+a ``RequestTiming`` in a context variable; the SQL hooks in
+``app.db.query_metrics`` add each statement's time to it, including
+statements run from threadpool workers. ``render`` produces the
+``/metrics`` page.
+"""
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from anyio import to_thread
+from app.core.config import settings
+from app.db.pool import pool_metrics
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Per-request SQL statements kept for the Server-Timing header
+SLOWEST_PER_REQUEST = 3
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, *labels, value: float):
+        # For totals kept elsewhere, such as the pool's
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in self._values.items()]
+
+class Gauge(Counter):
+    pass
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {labels: list(state) for labels, state in self._values.items()}
+        samples = []
+        for labels, state in values.items():
+            total = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                total += count
+                samples.append((f"{self.name}_bucket", labels + (_number(bound),), total))
+            samples.append((f"{self.name}_sum", labels, state[-1]))
+            samples.append((f"{self.name}_count", labels, total))
+        return samples
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+requests_total = Counter("hms_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+request_seconds = Histogram("hms_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+# By method only: the route is not known until the request has been routed
+in_flight = Gauge("hms_http_requests_in_flight", "HTTP requests being handled", ("method",))
+request_db_seconds = Histogram("hms_http_request_db_seconds", "SQL time per HTTP request", ("method", "route"))
+request_statements = Histogram(
+    "hms_http_request_sql_statements", "SQL statements per HTTP request", ("method", "route"), STATEMENT_BUCKETS
+)
+statements_total = Counter("hms_sql_statements_total", "SQL statements executed", ("operation",))
+statement_seconds = Histogram("hms_sql_statement_duration_seconds", "SQL statement latency", ("operation",))
+threadpool_size = Gauge("hms_threadpool_size", "Worker threads available to sync handlers and dependencies")
+threadpool_busy = Gauge("hms_threadpool_busy", "Worker threads in use")
+threadpool_waiting = Gauge("hms_threadpool_waiting", "Tasks queued for a worker thread")
+threadpool_saturated = Counter(
+    "hms_threadpool_saturated_requests_total", "Requests that arrived with every worker thread busy"
+)
+pool_checked_out = Gauge("hms_db_pool_checked_out", "Database connections checked out")
+pool_wait_seconds = Counter("hms_db_pool_wait_seconds_total", "Time spent waiting for a database connection")
+pool_timeouts = Counter("hms_db_pool_timeouts_total", "Database connection checkouts that timed out")
+event_subscribers = Gauge("hms_event_subscribers", "Open push connections", ("transport",))
+events_published = Counter("hms_events_published_total", "Push events published after commit", ("type",))
+events_dropped = Counter("hms_events_dropped_total", "Push events dropped because a connection fell behind")
+
+METRICS = (
+    requests_total, request_seconds, in_flight, request_db_seconds, request_statements,
+    statements_total, statement_seconds, threadpool_size, threadpool_busy, threadpool_waiting,
+    threadpool_saturated, pool_checked_out, pool_wait_seconds, pool_timeouts,
+    event_subscribers, events_published, events_dropped,
+)
+
+class RequestTiming:
+    """SQL work done while handling one request."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        # [(seconds, statement)], slowest first
+        self.slowest = []
+
+    def add(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_seconds += seconds
+        if len(self.slowest) < SLOWEST_PER_REQUEST or seconds > self.slowest[-1][0]:
+            self.slowest = sorted(self.slowest + [(seconds, statement)], reverse=True)[:SLOWEST_PER_REQUEST]
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+def _threadpool_stats():
+    # Only valid inside the event loop
+    return to_thread.current_default_thread_limiter().statistics()
+
+def _collect_gauges():
+    stats = _threadpool_stats()
+    threadpool_size.set(value=stats.total_tokens)
+    threadpool_busy.set(value=stats.borrowed_tokens)
+    threadpool_waiting.set(value=stats.tasks_waiting)
+    pool = pool_metrics.snapshot()
+    pool_checked_out.set(value=pool["checked_out"])
+    pool_wait_seconds.set(value=pool["wait_seconds_total"])
+    pool_timeouts.set(value=pool["timeouts"])
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    _collect_gauges()
+    lines = []
+    for metric in METRICS:
+        kind = {Histogram: "histogram", Gauge: "gauge"}.get(type(metric), "counter")
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+        for name, labels, value in metric.samples():
+            names = metric.labels + (("le",) if name.endswith("_bucket") else ())
+            pairs = ",".join(f'{key}="{_escape(label)}"' for key, label in zip(names, labels))
+            lines.append(f"{name}{{{pairs}}} {_number(value)}" if pairs else f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+def server_timing(total: float, timing: RequestTiming) -> str:
+    parts = [
+        f"app;dur={total * 1000:.1f}",
+        f'db;dur={timing.db_seconds * 1000:.1f};desc="{timing.statements} statements"',
+    ]
+    for i, (seconds, _) in enumerate(timing.slowest, 1):
+        parts.append(f"sql{i};dur={seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+def _route(scope) -> str:
+    # Templates like /api/v1/patients/{patient_id} keep the label set small
+    route = scope.get("route")
+    if getattr(route, "path", None) is None:
+        return "unmatched"
+    return route.path
+
+class MetricsMiddleware:
+    """Times HTTP requests and optionally reports it in ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        stats = _threadpool_stats()
+        if stats.borrowed_tokens >= stats.total_tokens:
+            threadpool_saturated.inc()
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    value = server_timing(time.perf_counter() - start, timing)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.inc(method, amount=-1)
+            current_timing.reset(token)
+            elapsed = time.perf_counter() - start
+            route = _route(scope)
+            requests_total.inc(method, route, str(status))
+            request_seconds.observe(method, route, value=elapsed)
+            request_db_seconds.observe(method, route, value=timing.db_seconds)
+            request_statements.observe(method, route, value=timing.statements)
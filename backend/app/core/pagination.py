@@ -0,0 +1,122 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+    sort: Optional[str] = None
+
+def _encode_value(value):
+    # JSON has no date types, so tag them to round-trip through the cursor
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+def encode_cursor(sort: Optional[str], value, last_id: int) -> str:
+    payload = {"s": sort, "v": _encode_value(value), "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict) or not isinstance(payload.get("id"), int):
+            raise ValueError("malformed cursor")
+        payload["v"] = _decode_value(payload.get("v"))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+def _keyset(query, params: PageParams, id_column, sort_columns: Optional[Dict[str, object]]):
+    """Filter and order an ORM query or Core select for one keyset page.
+
+    Returns the limited query (one row over the page size) and the sort column.
+    """
+    sort_columns = sort_columns or {}
+    descending = bool(params.sort) and params.sort.startswith("-")
+    sort_name = params.sort.lstrip("-") if params.sort else None
+    if sort_name is not None and sort_name not in sort_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort key. Must be one of: {sorted(sort_columns)}"
+        )
+    sort_column = sort_columns.get(sort_name)
+
+    if params.cursor:
+        payload = decode_cursor(params.cursor)
+        # A cursor is only meaningful for the ordering that produced it
+        if payload.get("s") != params.sort:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        last_id = payload["id"]
+        if sort_column is None:
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            query = query.filter(or_(
+                sort_column < payload["v"],
+                and_(sort_column == payload["v"], id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > payload["v"],
+                and_(sort_column == payload["v"], id_column > last_id)
+            ))
+
+    order_by = []
+    if sort_column is not None:
+        order_by.append(sort_column.desc() if descending else sort_column.asc())
+    order_by.append(id_column.desc() if descending else id_column.asc())
+
+    # Fetch one extra row to learn whether another page exists
+    return query.order_by(*order_by).limit(params.limit + 1), sort_column
+
+def _page(rows, params: PageParams, sort_column) -> dict:
+    items = rows[:params.limit]
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        last = items[-1]
+        last_value = getattr(last, sort_column.key) if sort_column is not None else None
+        next_cursor = encode_cursor(params.sort, last_value, last.id)
+
+    return {"items": items, "next_cursor": next_cursor, "limit": params.limit}
+
+def paginate(query, params: PageParams, id_column, sort_columns: Optional[Dict[str, object]] = None) -> dict:
+    """Apply keyset pagination on (sort key, id) and return one page.
+
+    ``sort_columns`` maps the sort names a handler accepts to non-nullable
+    columns; prefix the name with ``-`` in the request to sort descending.
+    """
+    query, sort_column = _keyset(query, params, id_column, sort_columns)
+    return _page(query.all(), params, sort_column)
+
+async def paginate_async(db, stmt, params: PageParams, id_column, sort_columns: Optional[Dict[str, object]] = None, rows: bool = False) -> dict:
+    """``paginate`` for a ``select()`` run on an AsyncSession.
+
+    Items are the selected entity, or with ``rows=True`` the Core rows of a
+    column select.
+    """
+    stmt, sort_column = _keyset(stmt, params, id_column, sort_columns)
+    result = await db.execute(stmt)
+    rows = result.all() if rows else result.scalars().all()
+    return _page(rows, params, sort_column)
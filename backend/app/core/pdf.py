@@ -0,0 +1,140 @@
+"""Minimal PDF writer for generated documents.
+
+Text only, in the PDF standard fonts, so it needs no font files or
+third-party packages. Those fonts cover Latin-1 only; other characters are
+written as "?". The output depends only on the input (no timestamps or
+random IDs), so the same document always produces the same bytes and is
+stored once in the blob store.
+
+Documents are laid out by a ``Template``, compiled once, and written page
+by page by ``stream`` so a response can start before the last page is done.
+"""
+import hashlib
+import string
+import textwrap
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+FONT_SIZE = 10
+LEADING = 14
+WRAP_COLUMNS = 95
+# Room below the two-line page header
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING - 3
+
+# Objects every document shares: 1 catalog, 2 page tree (written last), 3-4 fonts
+_HEADER = b"%PDF-1.4\n"
+_CATALOG = b"<< /Type /Catalog /Pages 2 0 R >>"
+_FONTS = (
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+)
+_PAGE = (
+    b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+    b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %%d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT)
+)
+
+def _text(value) -> bytes:
+    data = str(value).encode("cp1252", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def wrap(lines):
+    """Break ``lines`` at WRAP_COLUMNS; blank lines are kept."""
+    return [part for line in lines for part in (textwrap.wrap(str(line), WRAP_COLUMNS) or [""])]
+
+def _page_stream(title: bytes, number: int, total: int, lines) -> bytes:
+    top = PAGE_HEIGHT - MARGIN
+    out = [
+        b"BT /F2 13 Tf %d %d Td (%s) Tj ET" % (MARGIN, top, title),
+        b"BT /F1 8 Tf %d %d Td (Page %d of %d) Tj ET" % (PAGE_WIDTH - MARGIN - 60, top, number, total),
+        b"BT /F1 %d Tf %d TL %d %d Td" % (FONT_SIZE, LEADING, MARGIN, top - 3 * LEADING),
+    ]
+    out += [b"(%s) Tj T*" % _text(line) for line in lines]
+    out.append(b"ET")
+    return b"\n".join(out)
+
+def stream(title: str, lines):
+    """Yield a PDF of ``lines`` under ``title``, paginated on A4, one page at a time."""
+    lines = wrap(lines)
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    title = _text(title)
+    written = len(_HEADER)
+    offsets = {}
+
+    def obj(number: int, body: bytes) -> bytes:
+        nonlocal written
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        offsets[number] = written
+        written += len(chunk)
+        return chunk
+
+    yield _HEADER + obj(1, _CATALOG) + obj(3, _FONTS[0]) + obj(4, _FONTS[1])
+    kids = []
+    for number, page_lines in enumerate(pages, 1):
+        content = _page_stream(title, number, len(pages), page_lines)
+        content_obj = 3 + 2 * number
+        kids.append(b"%d 0 R" % (content_obj + 1))
+        yield (
+            obj(content_obj, b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+            + obj(content_obj + 1, _PAGE % content_obj)
+        )
+    tail = obj(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids)))
+    size = len(offsets) + 1
+    tail += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    tail += b"".join(b"%010d 00000 n \n" % offsets[number] for number in range(1, size))
+    tail += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, written)
+    yield tail
+
+def render(title: str, lines) -> bytes:
+    return b"".join(stream(title, lines))
+
+class Template:
+    """A document layout, parsed once and filled per document.
+
+    ``title`` and each line of ``body`` may hold ``{field}`` placeholders. A
+    line with a ``{field*}`` placeholder is repeated once per item of that
+    list field, and left out when the list is empty.
+    """
+
+    def __init__(self, title: str, body: str):
+        self.source = (title, body)
+        # Part of every cache key built on this template, so editing it
+        # retires documents rendered from the old version
+        self.digest = hashlib.sha256(f"{title}\0{body}".encode()).hexdigest()
+        self._title = self._compile(title)
+        self._lines = [self._compile(line) for line in body.strip("\n").split("\n")]
+
+    @staticmethod
+    def _compile(line: str):
+        parts, repeat = [], None
+        for literal, field, _, _ in string.Formatter().parse(line):
+            parts.append((literal, None))
+            if field is None:
+                continue
+            if field.endswith("*"):
+                field = repeat = field[:-1]
+            parts.append((None, field))
+        return tuple(parts), repeat
+
+    @staticmethod
+    def _fill(compiled, values, item=None) -> str:
+        parts, repeat = compiled
+        return "".join(
+            literal if field is None else str(item if field == repeat else values[field])
+            for literal, field in parts
+        )
+
+    def lines(self, values: dict):
+        out = []
+        for compiled in self._lines:
+            repeat = compiled[1]
+            if repeat is None:
+                out.append(self._fill(compiled, values))
+            else:
+                out += [self._fill(compiled, values, item) for item in values[repeat]]
+        return out
+
+    def stream(self, values: dict):
+        return stream(self._fill(self._title, values), self.lines(values))
+
+    def render(self, values: dict) -> bytes:
+        return b"".join(self.stream(values))
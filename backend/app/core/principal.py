@@ -0,0 +1,72 @@
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models.user import User
+from app.db.session import SessionLocal
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of an authenticated user, safe to share across requests."""
+    id: int
+    email: str
+    full_name: str
+    role: str
+    phone: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    gender: Optional[str] = None
+    address: Optional[str] = None
+    is_active: Optional[bool] = True
+    hospital_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+# Keyed by token subject (the user's email)
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+def load_principal(email: str) -> Optional[Principal]:
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+    principal_cache.set(email, principal)
+    return principal
+
+def invalidate_principal(email: str):
+    principal_cache.delete(email)
+
+def _stale_emails(user: User):
+    # Include the previous email too, in case this write changed it
+    history = inspect(user).attrs.email.history
+    return {user.email, *history.deleted}
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    emails = _stale_emails(target)
+    for email in emails:
+        invalidate_principal(email)
+    # Invalidate again once committed, so a request that reloaded the user
+    # between flush and commit cannot leave the old row cached
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_principals", set()).update(emails)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for email in session.info.pop("stale_principals", ()):
+        invalidate_principal(email)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("stale_principals", None)
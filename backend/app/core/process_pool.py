@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class PoolSaturated(Exception):
+    """Raised instead of queueing when a pool already has ``max_pending`` jobs."""
+
+    def __init__(self, name: str):
+        super().__init__(f"{name} pool is saturated")
+        self.name = name
+
+class BoundedProcessPool:
+    """Process pool for CPU-bound work with a cap on running + queued jobs.
+
+    Callers past the cap fail fast with PoolSaturated rather than waiting in
+    an unbounded queue. Workers are spawned lazily on first use.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, so workers never inherit open DB connections or locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise PoolSaturated(self.name)
+            self.pending += 1
+        try:
+            executor = self._get_executor()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # A dead worker poisons the executor; start fresh on the next call
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
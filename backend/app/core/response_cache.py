@@ -0,0 +1,110 @@
+"""Shared response cache for read-mostly catalog endpoints.
+
+Entries are the encoded JSON body plus its ETag, keyed by namespace, a
+role-dependent variant and the request URL. Writes call ``invalidate`` on
+a namespace, which bumps its generation so older keys are never read again
+(they age out of the backend on their own). A matching ``If-None-Match``
+gets a 304 straight from the cache, without touching the database.
+"""
+import hashlib
+import itertools
+import threading
+from fastapi import Request, Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.serialization import dumps
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generations = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries.set(key, value)
+
+    def generation(self, namespace):
+        return self.generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self.generations[namespace] = next(self._counter)
+
+class RedisBackend:
+    """Same interface backed by Redis, so every worker shares entries and invalidations."""
+
+    def __init__(self, url: str, ttl: int):
+        import redis  # optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(f"response:{key}")
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode(), body
+
+    def set(self, key, value):
+        etag, body = value
+        self.client.set(f"response:{key}", etag.encode() + b"\n" + body, ex=self.ttl)
+
+    def generation(self, namespace):
+        return int(self.client.get(f"response-gen:{namespace}") or 0)
+
+    def bump(self, namespace):
+        self.client.incr(f"response-gen:{namespace}")
+
+def _make_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_TTL)
+    return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+
+backend = _make_backend()
+
+def _key(request: Request, namespace: str, variant: str):
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f"{namespace}:{backend.generation(namespace)}:{variant}:{request.url.path}?{query}"
+
+def _encode(data):
+    body = dumps(data)
+    return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+def _respond(request: Request, etag: str, body: bytes):
+    # Views differ per role, so only the client may keep a copy, and it
+    # must revalidate every time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    candidates = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def cached_response(request: Request, namespace: str, variant: str, build):
+    """Serve ``await build()`` as JSON, from the cache when possible.
+
+    ``build`` returns plain data (see ``app.core.serialization``); it is
+    encoded as is, so it must already have the shape of the route's
+    response_model.
+    """
+    key = _key(request, namespace, variant)
+    entry = backend.get(key)
+    if entry is None:
+        entry = _encode(await build())
+        backend.set(key, entry)
+    return _respond(request, *entry)
+
+def cached_response_sync(request: Request, namespace: str, variant: str, build):
+    """``cached_response`` for sync endpoints; ``build`` is a plain callable."""
+    key = _key(request, namespace, variant)
+    entry = backend.get(key)
+    if entry is None:
+        entry = _encode(build())
+        backend.set(key, entry)
+    return _respond(request, *entry)
+
+def invalidate(namespace: str):
+    backend.bump(namespace)
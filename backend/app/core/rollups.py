@@ -0,0 +1,162 @@
+"""Per-hospital, per-day counters behind the dashboards.
+
+hospital_daily_stats is rebuilt from the fact tables with one
+INSERT ... SELECT ... GROUP BY per metric, for a window of days around
+today. Dashboards then read O(days x hospitals) rows instead of scanning
+appointments, prescriptions and lab/pharmacy orders.
+
+Run a refresh by hand with ``python -m app.core.rollups [--full]``.
+"""
+import asyncio
+import logging
+import sys
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import delete, func, insert, literal, select
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.models.analytics import HospitalDailyStat, RollupRefresh
+from app.db.models.appointment import Appointment
+from app.db.models.doctor import Doctor
+from app.db.models.hospital import Staff
+from app.db.models.lab import LabOrder, LabResult
+from app.db.models.pharmacy import PharmacyOrder
+from app.db.models.prescription import Prescription
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def _doctor_hospitals():
+    # A doctor counts towards the first hospital that lists them as staff
+    return (
+        select(Staff.user_id, func.min(Staff.hospital_id).label("hospital_id"))
+        .group_by(Staff.user_id)
+        .subquery()
+    )
+
+def _by_doctor_hospital(fact, time_col, start, end, *criteria):
+    # Rows from before tenancy have no hospital_id; fall back to the doctor's
+    staff = _doctor_hospitals()
+    hospital_id = func.coalesce(fact.hospital_id, staff.c.hospital_id)
+    day = func.date(time_col)
+    return (
+        select(hospital_id, day, func.count())
+        .select_from(fact)
+        .join(Doctor, fact.doctor_id == Doctor.id)
+        .outerjoin(staff, staff.c.user_id == Doctor.user_id)
+        .where(time_col >= start, time_col < end, *criteria)
+        .group_by(hospital_id, day)
+    )
+
+def _by_hospital(hospital_col, time_col, start, end):
+    day = func.date(time_col)
+    return select(hospital_col, day, func.count()).where(time_col >= start, time_col < end).group_by(hospital_col, day)
+
+METRICS = {
+    "appointments": lambda s, e: _by_doctor_hospital(Appointment, Appointment.scheduled_time, s, e),
+    "appointments_cancelled": lambda s, e: _by_doctor_hospital(
+        Appointment, Appointment.scheduled_time, s, e, Appointment.status == "cancelled"
+    ),
+    "prescriptions": lambda s, e: _by_doctor_hospital(Prescription, Prescription.date_issued, s, e),
+    "lab_orders": lambda s, e: _by_hospital(LabOrder.hospital_id, LabOrder.ordered_at, s, e),
+    "lab_results": lambda s, e: _by_hospital(
+        LabOrder.hospital_id, LabResult.reported_at, s, e
+    ).join_from(LabResult, LabOrder, LabResult.order_id == LabOrder.id),
+    "pharmacy_orders": lambda s, e: _by_hospital(PharmacyOrder.hospital_id, PharmacyOrder.ordered_at, s, e),
+}
+
+TIME_COLUMNS = (
+    Appointment.scheduled_time,
+    Prescription.date_issued,
+    LabOrder.ordered_at,
+    LabResult.reported_at,
+    PharmacyOrder.ordered_at,
+)
+
+def refresh(db, start: date, end: date):
+    """Recompute the rows for days in [start, end) in a single transaction."""
+    lo, hi = datetime.combine(start, time.min), datetime.combine(end, time.min)
+    db.execute(delete(HospitalDailyStat).where(HospitalDailyStat.day >= start, HospitalDailyStat.day < end))
+    for metric, build in METRICS.items():
+        db.execute(insert(HospitalDailyStat).from_select(
+            ["hospital_id", "day", "value", "metric"],
+            build(lo, hi).add_columns(literal(metric)),
+        ))
+    db.add(RollupRefresh(from_day=start, to_day=end, finished_at=datetime.utcnow()))
+    db.commit()
+
+def recent_window(today: date = None):
+    today = today or date.today()
+    return (
+        today - timedelta(days=settings.ROLLUP_LOOKBACK_DAYS),
+        today + timedelta(days=settings.ROLLUP_LOOKAHEAD_DAYS + 1),
+    )
+
+def full_window(db):
+    bounds = [db.execute(select(func.min(col), func.max(col))).one() for col in TIME_COLUMNS]
+    lows = [lo for lo, _ in bounds if lo is not None]
+    highs = [hi for _, hi in bounds if hi is not None]
+    if not lows:
+        return None
+    return min(lows).date(), max(highs).date() + timedelta(days=1)
+
+def refresh_recent():
+    with SessionLocal() as db:
+        refresh(db, *recent_window())
+
+async def refresh_periodically(interval: int):
+    while True:
+        try:
+            await run_in_threadpool(refresh_recent)
+        except Exception:
+            logger.exception("Dashboard rollup refresh failed")
+        await asyncio.sleep(interval)
+
+# Read side; statements work with both sync and async sessions
+
+def last_refresh_stmt():
+    return select(func.max(RollupRefresh.finished_at))
+
+def stats_stmt(start: date, end: date, hospital_ids=None):
+    stmt = select(HospitalDailyStat.hospital_id, HospitalDailyStat.day, HospitalDailyStat.metric, HospitalDailyStat.value).where(
+        HospitalDailyStat.day >= start, HospitalDailyStat.day < end
+    )
+    if hospital_ids is not None:
+        stmt = stmt.where(HospitalDailyStat.hospital_id.in_(hospital_ids))
+    return stmt.order_by(HospitalDailyStat.day)
+
+def totals(rows):
+    result = dict.fromkeys(METRICS, 0)
+    for _, _, metric, value in rows:
+        result[metric] += value
+    return result
+
+def daily(rows):
+    days = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for _, day, metric, value in rows:
+        days[day][metric] += value
+    return [{"day": day, **counts} for day, counts in sorted(days.items())]
+
+def by_hospital(rows):
+    hospitals = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for hospital_id, _, metric, value in rows:
+        hospitals[hospital_id][metric] += value
+    return hospitals
+
+def freshness(as_of: datetime):
+    """How old the figures are; None until the first refresh has run."""
+    age = (datetime.utcnow() - as_of).total_seconds() if as_of else None
+    return {"as_of": as_of, "age_seconds": age}
+
+def main(argv):
+    with SessionLocal() as db:
+        window = full_window(db) if "--full" in argv else recent_window()
+        if window is None:
+            print("No activity to roll up")
+            return 0
+        refresh(db, *window)
+    print(f"Refreshed hospital_daily_stats for {window[0]} .. {window[1] - timedelta(days=1)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
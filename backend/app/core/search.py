@@ -0,0 +1,109 @@
+"""Ranked full-text search over the indexes in ``app.db.fts``.
+
+Each word of a query matches as a prefix, and all words must match, so
+"asp 50" finds "Aspirin 500 mg". If that leaves fewer than ``limit`` hits,
+words of ``FUZZY_MIN_LENGTH`` letters or more are widened to indexed terms
+within one edit (two for long words), and those hits rank after the exact
+ones. MySQL gets prefix matching only.
+
+Functions take a sync Session; async handlers go through ``run_sync``.
+"""
+import re
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.dialects.mysql import match
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.fts import INDEXED_COLUMNS, fts_table, vocab_table
+
+MAX_RESULTS = 50
+MAX_QUERY_WORDS = 8
+FUZZY_MIN_LENGTH = 4
+# Spellings tried per word, most widespread first
+FUZZY_CANDIDATES = 5
+# bm25 column weights, in INDEXED_COLUMNS order
+WEIGHTS = {
+    "medicines": (10.0, 1.0, 3.0, 3.0),
+    "users": (10.0, 5.0, 5.0),
+}
+
+_WORD = re.compile(r"\w+")
+# (table, first letter) -> [(term, documents)]. Counting documents per term
+# reads whole doclists, far too slow to repeat for every query.
+_vocabulary = TTLCache(maxsize=1024, ttl=settings.SEARCH_VOCAB_TTL)
+
+def words(query: str):
+    return [word.lower() for word in _WORD.findall(query)][:MAX_QUERY_WORDS]
+
+def max_edits(word: str) -> int:
+    if len(word) < FUZZY_MIN_LENGTH:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+def within_edits(a: str, b: str, limit: int) -> bool:
+    """Whether ``a`` becomes ``b`` in at most ``limit`` insertions, deletions,
+    substitutions or adjacent transpositions."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+def similar_terms(db, table_name: str, word: str):
+    edits = max_edits(word)
+    if not edits:
+        return []
+    # Typos rarely hit the first letter, so only that slice of the
+    # vocabulary is compared
+    key = (table_name, word[0])
+    terms = _vocabulary.get(key)
+    if terms is None:
+        terms = db.execute(text(
+            f"SELECT term, doc FROM {vocab_table(table_name)} WHERE term >= :lo AND term < :hi"
+        ), {"lo": word[0], "hi": chr(ord(word[0]) + 1)}).all()
+        _vocabulary.set(key, terms)
+    found = [(doc, term) for term, doc in terms if term != word and within_edits(word, term, edits)]
+    return [term for _, term in sorted(found, reverse=True)[:FUZZY_CANDIDATES]]
+
+def _expression(alternatives):
+    # Words are \w+ runs, so quoting them is enough to keep FTS5 syntax out
+    return " AND ".join("(" + " OR ".join(group) + ")" for group in alternatives)
+
+def _ranked(stmt, model, expression: str, limit: int):
+    name = fts_table(model.__table__.name)
+    fts = table(name, column("rowid"))
+    return (
+        stmt.join(fts, fts.c.rowid == model.id)
+        .where(literal_column(name).op("MATCH")(expression))
+        .order_by(func.bm25(literal_column(name), *WEIGHTS[model.__table__.name]))
+        .limit(limit)
+    )
+
+def search(db, stmt, model, query: str, limit: int):
+    """Rows of ``stmt``, a select over ``model`` (medicines or users), that
+    match ``query``, best first."""
+    terms = words(query)
+    if not terms:
+        return []
+    table_name = model.__table__.name
+    if db.get_bind().dialect.name == "mysql":
+        score = match(*(getattr(model, c) for c in INDEXED_COLUMNS[table_name]), against=" ".join(f"+{w}*" for w in terms)).in_boolean_mode()
+        return db.execute(stmt.where(score).order_by(score.desc()).limit(limit)).all()
+
+    rows = db.execute(_ranked(stmt, model, _expression([f'"{w}"*'] for w in terms), limit)).all()
+    if len(rows) < limit:
+        alternatives = [[f'"{w}"*', *(f'"{t}"' for t in similar_terms(db, table_name, w))] for w in terms]
+        if any(len(group) > 1 for group in alternatives):
+            # A superset of the exact hits; keep those first
+            seen = set(rows)
+            wider = db.execute(_ranked(stmt, model, _expression(alternatives), limit + len(rows))).all()
+            rows += [row for row in wider if row not in seen][:limit - len(rows)]
+    return rows
@@ -0,0 +1,153 @@
+import heapq
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select
+from app.db.models.appointment import Appointment, FREE_STATUSES
+from app.db.models.doctor import DoctorSchedule
+
+MAX_HORIZON_DAYS = 60
+SLOT_SEARCH_BUDGET = 0.25  # seconds
+# Keeps each IN (...) list comfortably under SQLite's bound-parameter limit
+DOCTOR_CHUNK_SIZE = 500
+
+def naive_utc(value: datetime) -> datetime:
+    """Times are stored as naive UTC; convert an aware ``value`` to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def check_templates(entries):
+    """Reason ``entries`` cannot be a weekly schedule, or None if they can.
+
+    Slots from one day's templates must not overlap and must fill each
+    template exactly, so every slot start is a distinct booked_slot value.
+    """
+    by_day = sorted(entries, key=lambda e: (e.weekday, e.start_time))
+    for entry in by_day:
+        if entry.start_time >= entry.end_time:
+            return "start_time must be before end_time"
+        if entry.slot_minutes <= 0:
+            return "slot_minutes must be positive"
+        span = datetime.combine(date.min, entry.end_time) - datetime.combine(date.min, entry.start_time)
+        if span % timedelta(minutes=entry.slot_minutes):
+            return "slot_minutes must divide the time between start_time and end_time"
+    for prev, entry in zip(by_day, by_day[1:]):
+        if prev.weekday == entry.weekday and entry.start_time < prev.end_time:
+            return f"Templates overlap on weekday {entry.weekday}"
+    return None
+
+def day_slots(templates, day: date):
+    """Candidate (start, end) slots for one day, sorted by start."""
+    slots = []
+    for t in templates:
+        if t.weekday != day.weekday():
+            continue
+        step = timedelta(minutes=t.slot_minutes)
+        start = datetime.combine(day, t.start_time)
+        close = datetime.combine(day, t.end_time)
+        while start + step <= close:
+            slots.append((start, start + step))
+            start += step
+    slots.sort()
+    return slots
+
+def free_slots(candidates, booked):
+    """Drop candidates that overlap a booking.
+
+    Both inputs are sorted, so a single sweep with one pointer into the
+    bookings is enough. A booking is treated as occupying the slot length of
+    the candidate it falls in, since appointments only store a start time.
+    """
+    free = []
+    i = 0
+    for start, end in candidates:
+        while i < len(booked) and booked[i] < start:
+            i += 1
+        if i < len(booked) and booked[i] < end:
+            continue
+        free.append((start, end))
+    return free
+
+async def load_templates(db, doctor_ids):
+    templates = defaultdict(list)
+    for offset in range(0, len(doctor_ids), DOCTOR_CHUNK_SIZE):
+        chunk = doctor_ids[offset:offset + DOCTOR_CHUNK_SIZE]
+        result = await db.execute(select(DoctorSchedule).where(DoctorSchedule.doctor_id.in_(chunk)))
+        for t in result.scalars():
+            templates[t.doctor_id].append(t)
+    return templates
+
+async def is_slot_start(db, doctor_id: int, when: datetime) -> bool:
+    """True if ``when`` starts one of the doctor's template slots.
+
+    Doctors without templates accept any time. Aligning bookings to slot
+    starts lets the unique (doctor_id, booked_slot) index catch overlaps.
+    """
+    templates = (await load_templates(db, [doctor_id])).get(doctor_id)
+    if not templates:
+        return True
+    return any(start == when for start, _ in day_slots(templates, when.date()))
+
+async def _booked_times(db, doctor_ids, window_start, window_end):
+    booked = defaultdict(list)
+    for offset in range(0, len(doctor_ids), DOCTOR_CHUNK_SIZE):
+        chunk = doctor_ids[offset:offset + DOCTOR_CHUNK_SIZE]
+        # Served by ix_appointments_doctor_scheduled
+        stmt = (
+            select(Appointment.doctor_id, Appointment.scheduled_time)
+            .where(
+                Appointment.doctor_id.in_(chunk),
+                Appointment.scheduled_time >= window_start,
+                Appointment.scheduled_time < window_end,
+                Appointment.status.not_in(FREE_STATUSES),
+            )
+        )
+        for doctor_id, scheduled_time in (await db.execute(stmt)).all():
+            booked[doctor_id].append(scheduled_time)
+    for times in booked.values():
+        times.sort()
+    return booked
+
+async def find_free_slots(db, doctor_ids, start: datetime, limit: int, days: int = MAX_HORIZON_DAYS, budget: float = SLOT_SEARCH_BUDGET):
+    """Return the earliest ``limit`` free slots across ``doctor_ids``.
+
+    Days are searched in order and only the bookings for the day being
+    searched are loaded. The search stops early once ``budget`` seconds have
+    passed; ``complete`` is False in that case.
+    """
+    deadline = time.monotonic() + budget
+    days = min(days, MAX_HORIZON_DAYS)
+    templates = await load_templates(db, list(doctor_ids))
+    active = sorted(templates)
+    found = []
+    day = start.date()
+    last_day = day + timedelta(days=days)
+    complete = True
+    while day < last_day and len(found) < limit and active:
+        if time.monotonic() > deadline:
+            complete = False
+            break
+        per_doctor = {}
+        for doctor_id in active:
+            candidates = [s for s in day_slots(templates[doctor_id], day) if s[0] >= start]
+            if candidates:
+                per_doctor[doctor_id] = candidates
+        if per_doctor:
+            window_start = min(c[0][0] for c in per_doctor.values())
+            window_end = max(c[-1][1] for c in per_doctor.values())
+            booked = await _booked_times(db, list(per_doctor), window_start, window_end)
+            streams = [
+                [(s, e, doctor_id) for s, e in free_slots(candidates, booked.get(doctor_id, []))]
+                for doctor_id, candidates in per_doctor.items()
+            ]
+            for slot_start, slot_end, doctor_id in heapq.merge(*streams):
+                found.append({"doctor_id": doctor_id, "start": slot_start, "end": slot_end})
+                if len(found) >= limit:
+                    break
+        day += timedelta(days=1)
+    return {
+        "slots": found,
+        "complete": complete,
+        "searched_until": datetime.combine(day, datetime.min.time()),
+    }
@@ -0,0 +1,173 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import bindparam, case, func, or_, select, update
+from app.core import events
+from app.core.config import settings
+from app.db.models.patient import Patient
+from app.db.models.pharmacy import Inventory, Medicine, PharmacyOrder, StockReservation
+
+# Passes over the batch list before giving up, in case concurrent orders keep
+# taking the units a pass has just seen
+ALLOCATION_ATTEMPTS = 3
+
+class InsufficientStock(Exception):
+    def __init__(self, medicine_id: int, requested: int):
+        super().__init__(f"Not enough stock of medicine {medicine_id} for {requested} units")
+        self.medicine_id = medicine_id
+        self.requested = requested
+
+class OrderStateConflict(Exception):
+    """The order or its reservations were moved on by another request."""
+
+async def _execute_cas(db, stmt) -> bool:
+    # Set-based UPDATE; the WHERE clause is the only guard, so skip syncing
+    # ORM objects in the session
+    result = await db.execute(stmt.execution_options(synchronize_session=False))
+    return result.rowcount > 0
+
+async def adjust_batch(db, inventory_id: int, delta: int) -> bool:
+    """Add ``delta`` units to a batch in one statement.
+
+    Decrements only apply if the batch holds enough units, so concurrent
+    writers cannot drive it negative or lose each other's updates.
+    """
+    stmt = update(Inventory).where(Inventory.id == inventory_id).values(quantity=Inventory.quantity + delta)
+    if delta < 0:
+        stmt = stmt.where(Inventory.quantity >= -delta)
+    return await _execute_cas(db, stmt)
+
+async def adjust_medicine_stock(db, medicine_id: int, delta: int):
+    # Medicine.stock is a denormalised total of the batches; clamp at zero in
+    # case it was out of step before batches were tracked
+    stock = func.coalesce(Medicine.stock, 0) + delta
+    await _execute_cas(db, update(Medicine).where(Medicine.id == medicine_id).values(stock=case((stock > 0, stock), else_=0)))
+
+async def correct_batch(db, batch: Inventory, quantity: int) -> bool:
+    """Set ``batch`` to a counted ``quantity`` and move Medicine.stock by the difference.
+
+    Fails if the batch changed since it was read, so a reservation made in
+    between is not overwritten.
+    """
+    if not await _execute_cas(db, update(Inventory).where(
+        Inventory.id == batch.id, Inventory.quantity == batch.quantity
+    ).values(quantity=quantity)):
+        return False
+    await adjust_medicine_stock(db, batch.medicine_id, quantity - batch.quantity)
+    return True
+
+def _clamped_stock(delta):
+    stock = func.coalesce(Medicine.__table__.c.stock, 0) + delta
+    return case((stock > 0, stock), else_=0)
+
+async def add_to_batches(db, deltas: dict):
+    """``adjust_batch`` for many batches at once: one executemany UPDATE.
+
+    ``deltas`` maps inventory ids to units to add. Core statements, so the
+    ids must already have passed the caller's tenant filter.
+    """
+    table = Inventory.__table__
+    stmt = update(table).where(table.c.id == bindparam("b_id")).values(quantity=table.c.quantity + bindparam("b_delta"))
+    await db.execute(stmt, [{"b_id": inventory_id, "b_delta": delta} for inventory_id, delta in deltas.items()])
+
+async def adjust_medicine_stocks(db, deltas: dict):
+    """``adjust_medicine_stock`` for many medicines: one executemany UPDATE."""
+    table = Medicine.__table__
+    stmt = update(table).where(table.c.id == bindparam("b_id")).values(stock=_clamped_stock(bindparam("b_delta")))
+    await db.execute(stmt, [{"b_id": medicine_id, "b_delta": delta} for medicine_id, delta in deltas.items()])
+
+async def reserve_stock(db, order: PharmacyOrder):
+    """Hold ``order.quantity`` units of the order's hospital, taking the earliest-expiring batches first.
+
+    Runs in the caller's transaction; on InsufficientStock the caller rolls
+    back, which also undoes any batches already taken.
+    """
+    await release_expired(db, order.medicine_id)
+    remaining = order.quantity
+    expires_at = datetime.utcnow() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    for _ in range(ALLOCATION_ATTEMPTS):
+        batches = (await db.execute(
+            select(Inventory.id, Inventory.quantity)
+            .where(
+                Inventory.hospital_id == order.hospital_id,
+                Inventory.medicine_id == order.medicine_id,
+                Inventory.quantity > 0,
+                or_(Inventory.expiry_date.is_(None), Inventory.expiry_date >= date.today()),
+            )
+            # FEFO; batches without an expiry date go last
+            .order_by(Inventory.expiry_date.is_(None), Inventory.expiry_date, Inventory.id)
+        )).all()
+        for inventory_id, available in batches:
+            take = min(available, remaining)
+            if await adjust_batch(db, inventory_id, -take):
+                db.add(StockReservation(order_id=order.id, inventory_id=inventory_id, quantity=take, expires_at=expires_at))
+                remaining -= take
+                if not remaining:
+                    break
+        if not remaining or not batches:
+            break
+    if remaining:
+        raise InsufficientStock(order.medicine_id, order.quantity)
+    await adjust_medicine_stock(db, order.medicine_id, -order.quantity)
+
+async def _release(db, reservation_id: int, inventory_id: int, medicine_id: int, quantity: int) -> bool:
+    claimed = await _execute_cas(db, update(StockReservation).where(
+        StockReservation.id == reservation_id, StockReservation.status == "held"
+    ).values(status="released"))
+    if claimed:
+        await adjust_batch(db, inventory_id, quantity)
+        await adjust_medicine_stock(db, medicine_id, quantity)
+    return claimed
+
+def _notify_order(db, order_id: int, patient_user_id: int, status: str):
+    events.notify(db, (patient_user_id,), "pharmacy_order", id=order_id, status=status)
+
+def _held(stmt):
+    return stmt.join(Inventory, StockReservation.inventory_id == Inventory.id).where(StockReservation.status == "held")
+
+async def release_expired(db, medicine_id: int = None) -> int:
+    """Return stock held by pending orders past their deadline; returns units released."""
+    stmt = _held(select(
+        StockReservation.id, StockReservation.order_id, StockReservation.inventory_id,
+        Inventory.medicine_id, StockReservation.quantity, Patient.user_id,
+    )).join(PharmacyOrder, StockReservation.order_id == PharmacyOrder.id).outerjoin(
+        Patient, PharmacyOrder.patient_id == Patient.id
+    ).where(StockReservation.expires_at < datetime.utcnow())
+    if medicine_id is not None:
+        stmt = stmt.where(Inventory.medicine_id == medicine_id)
+    released = 0
+    for reservation_id, order_id, inventory_id, med_id, quantity, patient_user_id in (await db.execute(stmt)).all():
+        if await _release(db, reservation_id, inventory_id, med_id, quantity):
+            released += quantity
+            if await _execute_cas(db, update(PharmacyOrder).where(
+                PharmacyOrder.id == order_id, PharmacyOrder.status == "pending"
+            ).values(status="expired")):
+                _notify_order(db, order_id, patient_user_id, "expired")
+    return released
+
+async def _claim_order(db, order_id: int, status: str):
+    if not await _execute_cas(db, update(PharmacyOrder).where(
+        PharmacyOrder.id == order_id, PharmacyOrder.status == "pending"
+    ).values(status=status)):
+        raise OrderStateConflict(f"Order {order_id} is no longer pending")
+    # Topics are per user; the order names the patients row
+    patient_user_id = (await db.execute(
+        select(Patient.user_id).join(PharmacyOrder, PharmacyOrder.patient_id == Patient.id).where(PharmacyOrder.id == order_id)
+    )).scalar()
+    _notify_order(db, order_id, patient_user_id, status)
+
+async def cancel_order(db, order_id: int):
+    await _claim_order(db, order_id, "cancelled")
+    rows = (await db.execute(_held(select(
+        StockReservation.id, StockReservation.inventory_id, Inventory.medicine_id, StockReservation.quantity,
+    )).where(StockReservation.order_id == order_id))).all()
+    for row in rows:
+        await _release(db, *row)
+
+async def dispense_order(db, order_id: int):
+    await _claim_order(db, order_id, "dispensed")
+    if not await _execute_cas(db, update(StockReservation).where(
+        StockReservation.order_id == order_id, StockReservation.status == "held"
+    ).values(status="dispensed")):
+        if (await db.execute(select(StockReservation.id).where(StockReservation.order_id == order_id).limit(1))).first() is None:
+            return  # placed before stock was reserved
+        # Expired and released by a sweep between the order read and now
+        raise OrderStateConflict(f"Stock reservation for order {order_id} has expired")
@@ -1,10 +1,15 @@
-from app.db.models.user import Base
+from app.db.base_class import Base
 from app.db.models.user import User
 from app.db.models.patient import Patient
-from app.db.models.doctor import Doctor
+from app.db.models.doctor import Doctor, DoctorSchedule
 from app.db.models.appointment import Appointment
 from app.db.models.prescription import Prescription
 from app.db.models.lab import LabTest, LabOrder, LabResult
-from app.db.models.pharmacy import Medicine, PharmacyOrder, Inventory
+from app.db.models.pharmacy import Medicine, PharmacyOrder, Inventory, StockReservation
 from app.db.models.hospital import Hospital, Department, Staff
-# ... import other models as you create them 
\ No newline at end of file
+from app.db.models.analytics import HospitalDailyStat, RollupRefresh
+from app.db.models.replication import ReplicationHeartbeat
+from app.db.models.job import Job
+# ... import other models as you create them 
+# Full-text index DDL, attached to the tables above
+from app.db import fts
@@ -0,0 +1,5 @@
+from sqlalchemy.orm import declarative_base
+
+# Every model shares this registry so cross-module ForeignKeys and
+# relationship("...") targets resolve, and one metadata holds all tables.
+Base = declarative_base()
@@ -0,0 +1,77 @@
+"""Full-text indexes over medicines and users.
+
+On SQLite each table gets an external-content FTS5 table (no second copy of
+the text) kept in step by triggers, plus an fts5vocab table over its terms
+for typo-tolerant lookups. On MySQL a FULLTEXT index does the same job.
+
+The DDL runs after ``create_all`` creates the base table and from the
+migration that introduced it; ``rebuild`` re-indexes existing rows.
+"""
+from sqlalchemy import DDL, event, text
+from app.db.models.pharmacy import Medicine
+from app.db.models.user import User
+
+# Base table -> indexed columns, most important first
+INDEXED_COLUMNS = {
+    "medicines": ("name", "description", "category", "manufacturer"),
+    "users": ("full_name", "email", "phone"),
+}
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+def vocab_table(table: str) -> str:
+    return f"{table}_fts_vocab"
+
+def is_fts_table(name: str) -> bool:
+    """Whether ``name`` belongs to an FTS index (including FTS5 shadow tables)."""
+    return any(name.startswith(fts_table(table)) for table in INDEXED_COLUMNS)
+
+def sqlite_ddl(table: str):
+    fts, columns = fts_table(table), INDEXED_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        # Prefix indexes make 2- and 3-character prefix queries index lookups
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE VIRTUAL TABLE {vocab_table(table)} USING fts5vocab({fts}, 'row')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        # Only edits to indexed columns touch the index, not e.g. stock updates
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+def sqlite_drop_ddl(table: str):
+    fts = fts_table(table)
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TABLE IF EXISTS {vocab_table(table)}",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+def mysql_ddl(table: str):
+    return [f"CREATE FULLTEXT INDEX {fts_table(table)} ON {table} ({', '.join(INDEXED_COLUMNS[table])})"]
+
+def mysql_drop_ddl(table: str):
+    return [f"DROP INDEX {fts_table(table)} ON {table}"]
+
+def rebuild(conn, table: str):
+    """Re-index every row of ``table``; FULLTEXT indexes need no rebuild."""
+    if conn.dialect.name == "sqlite":
+        fts = fts_table(table)
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+for _model in (Medicine, User):
+    _table = _model.__table__.name
+    for _statement in sqlite_ddl(_table):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    for _statement in mysql_ddl(_table):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="mysql"))
+    for _statement in sqlite_drop_ddl(_table):
+        event.listen(_model.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,15 @@
+from sqlalchemy.orm import joinedload
+from app.db.models.pharmacy import Inventory
+
+# Loader options per endpoint, so a handler that touches a relationship
+# fetches it together with the parent rows instead of one SELECT per row.
+# Add a profile together with the handler that uses it; the test suite runs
+# with SQL_STATEMENT_BUDGET set, so a lazy load per row fails there.
+# Built lazily: creating loader options configures the mappers.
+LOAD_PROFILES = {
+    "pharmacy.inventory": lambda: (joinedload(Inventory.medicine),),
+}
+
+def with_profile(query, name: str):
+    """Apply the named loading profile to an ORM query."""
+    return query.options(*LOAD_PROFILES[name]())
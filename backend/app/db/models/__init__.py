@@ -1,8 +1,11 @@
 from .user import User
 from .patient import Patient
-from .doctor import Doctor
+from .doctor import Doctor, DoctorSchedule
 from .appointment import Appointment
 from .prescription import Prescription
 from .lab import LabTest, LabOrder, LabResult
-from .pharmacy import Medicine, PharmacyOrder, Inventory
-from .hospital import Hospital, Department, Staff 
\ No newline at end of file
+from .pharmacy import Medicine, PharmacyOrder, Inventory, StockReservation
+from .hospital import Hospital, Department, Staff
+from .analytics import HospitalDailyStat, RollupRefresh
+from .replication import ReplicationHeartbeat
+from .job import Job
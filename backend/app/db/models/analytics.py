@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Index
+from app.db.base_class import Base
+
+class HospitalDailyStat(Base):
+    """Per-hospital, per-day counter rebuilt from the fact tables by app.core.rollups.
+
+    hospital_id is NULL for activity that cannot be tied to a hospital.
+    """
+    __tablename__ = "hospital_daily_stats"
+    __table_args__ = (
+        Index("ix_hospital_daily_stats_hospital_day", "hospital_id", "day"),
+        Index("ix_hospital_daily_stats_day", "day"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=True)
+    day = Column(Date, nullable=False)
+    metric = Column(String(40), nullable=False)
+    value = Column(Integer, nullable=False, default=0)
+
+class RollupRefresh(Base):
+    """One completed refresh of hospital_daily_stats; the newest row dates the figures."""
+    __tablename__ = "rollup_refreshes"
+    id = Column(Integer, primary_key=True, index=True)
+    from_day = Column(Date, nullable=False)
+    to_day = Column(Date, nullable=False)
+    finished_at = Column(DateTime, nullable=False, index=True)
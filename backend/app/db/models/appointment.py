@@ -1,17 +1,39 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index, event
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from app.db.base_class import Base
+from app.db.tenancy import HospitalScoped
 import datetime
 
-Base = declarative_base()
+# Appointments in these states no longer hold their slot
+FREE_STATUSES = ("cancelled",)
 
-class Appointment(Base):
+class Appointment(HospitalScoped, Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Patient/doctor appointment lists filter on the party and sort by time
+        Index("ix_appointments_patient_scheduled", "patient_id", "scheduled_time"),
+        Index("ix_appointments_doctor_scheduled", "doctor_id", "scheduled_time"),
+        # One live booking per doctor and start time; NULLs (freed slots) never collide
+        Index("uq_appointments_doctor_slot", "doctor_id", "booked_slot", unique=True),
+        Index("ix_appointments_hospital_scheduled", "hospital_id", "scheduled_time"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
-    scheduled_time = Column(DateTime, nullable=False)
+    scheduled_time = Column(DateTime, nullable=False, index=True)
     status = Column(String(30), default="scheduled")
     notes = Column(Text)
+    # Mirrors scheduled_time while the appointment holds its slot, else NULL
+    booked_slot = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     patient = relationship("Patient")
-    doctor = relationship("Doctor") 
\ No newline at end of file
+    doctor = relationship("Doctor")
+
+    # Updates are issued as UPDATE ... WHERE version = :seen and fail with
+    # StaleDataError if another writer got there first
+    __mapper_args__ = {"version_id_col": version}
+
+@event.listens_for(Appointment, "before_insert")
+@event.listens_for(Appointment, "before_update")
+def _sync_booked_slot(mapper, connection, target):
+    target.booked_slot = None if target.status in FREE_STATUSES else target.scheduled_time 
\ No newline at end of file
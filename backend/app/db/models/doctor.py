@@ -1,8 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Time
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
+from app.db.base_class import Base
 
 class Doctor(Base):
     __tablename__ = "doctors"
@@ -11,5 +9,16 @@ class Doctor(Base):
     specialization = Column(String(100))
     bio = Column(Text)
     phone = Column(String(20))
-    department = Column(String(100))
-    user = relationship("User") 
\ No newline at end of file
+    department = Column(String(100), index=True)
+    user = relationship("User")
+
+class DoctorSchedule(Base):
+    """Weekly working-hour template; free slots are generated from these."""
+    __tablename__ = "doctor_schedules"
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
+    weekday = Column(Integer, nullable=False)  # 0 = Monday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    slot_minutes = Column(Integer, nullable=False, default=30)
+    doctor = relationship("Doctor") 
\ No newline at end of file
@@ -1,8 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
+from app.db.base_class import Base
 
 class Hospital(Base):
     __tablename__ = "hospitals"
@@ -10,20 +8,29 @@ class Hospital(Base):
     name = Column(String(100), nullable=False)
     address = Column(String(255))
     info = Column(Text)
+    phone = Column(String(20))
+    email = Column(String(120))
+    status = Column(String(20), default="pending", index=True)  # pending, approved, rejected
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
+    approved_at = Column(DateTime)
+    approved_by = Column(Integer, ForeignKey("users.id"))
+    rejection_reason = Column(Text)
+    rejected_at = Column(DateTime)
+    rejected_by = Column(Integer, ForeignKey("users.id"))
 
 class Department(Base):
     __tablename__ = "departments"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False)
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False, index=True)
     hospital = relationship("Hospital")
 
 class Staff(Base):
     __tablename__ = "staff"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False)
-    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True, index=True)
     role = Column(String(50))
     user = relationship("User")
     hospital = relationship("Hospital")
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
+from app.db.base_class import Base
+from app.db.tenancy import HospitalScoped
+import datetime
+
+class Job(HospitalScoped, Base):
+    """Background work run by app.core.jobs, e.g. rendering a PDF."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers look for due jobs by status, oldest first
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index("ix_jobs_hospital_created", "hospital_id", "created_at"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    params = Column(Text, nullable=False, default="{}")  # JSON
+    # SHA-256 of kind and params; a queued or running job is reused for the same work
+    dedupe_key = Column(String(64), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    # End of the running worker's lease; after it the job is taken over
+    locked_until = Column(DateTime)
+    error = Column(Text)
+    # Blob store key of the output
+    result_key = Column(String(64))
+    content_type = Column(String(100))
+    filename = Column(String(255))
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime)
@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from app.db.base_class import Base
+from app.db.tenancy import HospitalScoped, scoped_through
 import datetime
 
-Base = declarative_base()
-
 class LabTest(Base):
     __tablename__ = "lab_tests"
     id = Column(Integer, primary_key=True, index=True)
@@ -12,20 +11,25 @@ class LabTest(Base):
     description = Column(Text)
     price = Column(Integer)
 
-class LabOrder(Base):
+class LabOrder(HospitalScoped, Base):
     __tablename__ = "lab_orders"
+    __table_args__ = (
+        Index("ix_lab_orders_patient_status", "patient_id", "status"),
+        Index("ix_lab_orders_hospital_ordered", "hospital_id", "ordered_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    test_id = Column(Integer, ForeignKey("lab_tests.id"), nullable=False)
+    test_id = Column(Integer, ForeignKey("lab_tests.id"), nullable=False, index=True)
     status = Column(String(30), default="pending")
-    ordered_at = Column(DateTime, default=datetime.datetime.utcnow)
+    ordered_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     patient = relationship("Patient")
     test = relationship("LabTest")
 
+@scoped_through(LabOrder, "order_id")
 class LabResult(Base):
     __tablename__ = "lab_results"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("lab_orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("lab_orders.id"), nullable=False, index=True)
     result = Column(Text)
-    reported_at = Column(DateTime, default=datetime.datetime.utcnow)
+    reported_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     order = relationship("LabOrder") 
\ No newline at end of file
@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Date, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from app.db.base_class import Base
+from app.db.tenancy import HospitalScoped
 import datetime
 
-Base = declarative_base()
-
 class Medicine(Base):
     __tablename__ = "medicines"
     id = Column(Integer, primary_key=True, index=True)
@@ -16,24 +15,54 @@ class Medicine(Base):
     is_available = Column(Boolean, default=True)
     category = Column(String(50))
     manufacturer = Column(String(100))
-    created_by = Column(Integer, ForeignKey("users.id"))
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
 
-class PharmacyOrder(Base):
+class PharmacyOrder(HospitalScoped, Base):
     __tablename__ = "pharmacy_orders"
+    __table_args__ = (
+        # Order queues are worked oldest-first within a status
+        Index("ix_pharmacy_orders_status_ordered", "status", "ordered_at"),
+        Index("ix_pharmacy_orders_hospital_ordered", "hospital_id", "ordered_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    medicine_id = Column(Integer, ForeignKey("medicines.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     status = Column(String(30), default="pending")
-    ordered_at = Column(DateTime, default=datetime.datetime.utcnow)
+    ordered_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     patient = relationship("Patient")
     medicine = relationship("Medicine")
 
-class Inventory(Base):
+class Inventory(HospitalScoped, Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        # add_stock looks batches up by (medicine, batch number)
+        Index("ix_inventory_medicine_batch", "medicine_id", "batch_number"),
+        Index("ix_inventory_hospital_medicine", "hospital_id", "medicine_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     medicine_id = Column(Integer, ForeignKey("medicines.id"), nullable=False)
     quantity = Column(Integer, default=0)
     expiry_date = Column(Date)
     batch_number = Column(String(50))
-    medicine = relationship("Medicine") 
\ No newline at end of file
+    medicine = relationship("Medicine")
+
+class StockReservation(Base):
+    """Units taken from one inventory batch for one order.
+
+    The units leave Inventory.quantity when reserved; a held reservation
+    that expires or is cancelled puts them back.
+    """
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # The expiry sweep looks for held reservations past their deadline
+        Index("ix_stock_reservations_status_expires", "status", "expires_at"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("pharmacy_orders.id"), nullable=False, index=True)
+    inventory_id = Column(Integer, ForeignKey("inventory.id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="held")  # held, dispensed, released
+    expires_at = Column(DateTime, nullable=False)
+    order = relationship("PharmacyOrder")
+    inventory = relationship("Inventory") 
\ No newline at end of file
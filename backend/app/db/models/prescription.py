@@ -1,16 +1,20 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
+from app.db.base_class import Base
+from app.db.tenancy import HospitalScoped
 import datetime
 
-Base = declarative_base()
-
-class Prescription(Base):
+class Prescription(HospitalScoped, Base):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        Index("ix_prescriptions_patient_issued", "patient_id", "date_issued"),
+        Index("ix_prescriptions_doctor_issued", "doctor_id", "date_issued"),
+        Index("ix_prescriptions_hospital_issued", "hospital_id", "date_issued"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
-    date_issued = Column(DateTime, default=datetime.datetime.utcnow)
+    date_issued = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     medications = Column(Text)  # JSON or comma-separated list
     notes = Column(Text)
     patient = relationship("Patient")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, DateTime, Integer
+from app.db.base_class import Base
+
+class ReplicationHeartbeat(Base):
+    """One row the primary rewrites every few seconds; a replica's copy of it
+    shows how far behind the primary that replica is."""
+    __tablename__ = "replication_heartbeat"
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
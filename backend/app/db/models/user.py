@@ -1,7 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, func
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, func
+from app.db.base_class import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -15,4 +13,6 @@ class User(Base):
     gender = Column(String(10))
     address = Column(String(255))
     is_active = Column(Boolean, default=True)
+    # Home hospital of staff; their requests only see that hospital's data
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
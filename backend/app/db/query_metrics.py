@@ -0,0 +1,86 @@
+"""Time every SQL statement an engine runs.
+
+Each statement is added to the current request's ``RequestTiming``, to the
+``hms_sql_*`` metrics, and to a table of per-statement totals that
+``/system-admin/slow-statements`` ranks. Statements slower than
+``SLOW_STATEMENT_MS`` are also logged.
+"""
+import logging
+import threading
+import time
+from sqlalchemy import event
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StatementStats:
+    """Count, total and worst time per distinct statement text."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def observe(self, statement: str, seconds: float):
+        with self._lock:
+            entry = self._stats.get(statement)
+            if entry is None:
+                # Statements are parameterised, so a full table means new
+                # shapes (e.g. IN lists of new lengths) are no longer tracked
+                if len(self._stats) >= self.maxsize:
+                    return
+                entry = self._stats[statement] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def slowest(self, limit: int, by: str = "total"):
+        key = {"total": 1, "max": 2, "count": 0}[by]
+        with self._lock:
+            entries = sorted(self._stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+        return [
+            {
+                "statement": statement,
+                "count": count,
+                "total_seconds": round(total, 6),
+                "avg_seconds": round(total / count, 6),
+                "max_seconds": round(worst, 6),
+            }
+            for statement, (count, total, worst) in entries
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+statement_stats = StatementStats(settings.STATEMENT_STATS_SIZE)
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[:1]
+    return word[0].upper() if word else "OTHER"
+
+def install_query_metrics(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        operation = _operation(statement)
+        metrics.statements_total.inc(operation)
+        metrics.statement_seconds.observe(operation, value=seconds)
+        statement_stats.observe(statement, seconds)
+        timing = metrics.current_timing.get()
+        if timing is not None:
+            timing.add(statement, seconds)
+        if settings.SLOW_STATEMENT_MS and seconds * 1000 >= settings.SLOW_STATEMENT_MS:
+            logger.warning("Slow SQL statement (%.0f ms): %s", seconds * 1000, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
@@ -0,0 +1,89 @@
+"""EXPLAIN QUERY PLAN check for the hot endpoint queries.
+
+Run ``python -m app.db.query_plans`` to check the indexes declared on the
+models (against a fresh in-memory schema), or add ``--live`` to check the
+configured database. Exits non-zero if any query scans a whole table.
+"""
+import sys
+from datetime import date
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import sqlite
+from app.db.base import Base
+from app.db.models.analytics import HospitalDailyStat
+from app.db.models.appointment import Appointment
+from app.db.models.hospital import Hospital
+from app.db.models.job import Job
+from app.db.models.lab import LabOrder
+from app.db.models.pharmacy import Inventory, PharmacyOrder
+from app.db.models.prescription import Prescription
+
+# One select per hot endpoint, mirroring its filter and sort
+HOT_QUERIES = {
+    "appointments.list_appointments[patient]": select(Appointment)
+        .where(Appointment.patient_id == 1)
+        .order_by(Appointment.scheduled_time, Appointment.id),
+    "appointments.list_appointments[doctor]": select(Appointment)
+        .where(Appointment.doctor_id == 1)
+        .order_by(Appointment.scheduled_time, Appointment.id),
+    "prescriptions.list_prescriptions[patient]": select(Prescription)
+        .where(Prescription.patient_id == 1)
+        .order_by(Prescription.id),
+    "prescriptions.list_prescriptions[doctor]": select(Prescription)
+        .where(Prescription.doctor_id == 1)
+        .order_by(Prescription.id),
+    "lab.patient_orders": select(LabOrder)
+        .where(LabOrder.patient_id == 1, LabOrder.status == "pending"),
+    "pharmacy.order_queue": select(PharmacyOrder)
+        .where(PharmacyOrder.status == "pending")
+        .order_by(PharmacyOrder.ordered_at),
+    "pharmacy.add_stock": select(Inventory)
+        .where(Inventory.medicine_id == 1, Inventory.batch_number == "B1"),
+    "hospitals.get_hospitals": select(Hospital)
+        .where(Hospital.status == "approved"),
+    "hospitals.get_hospital_analytics": select(HospitalDailyStat)
+        .where(HospitalDailyStat.hospital_id == 1, HospitalDailyStat.day >= date(2024, 1, 1), HospitalDailyStat.day < date(2024, 2, 1))
+        .order_by(HospitalDailyStat.day),
+    "system_admin.dashboard": select(HospitalDailyStat)
+        .where(HospitalDailyStat.day >= date(2024, 1, 1), HospitalDailyStat.day < date(2024, 2, 1))
+        .order_by(HospitalDailyStat.day),
+    "rollups.refresh[appointments]": select(Appointment.doctor_id)
+        .where(Appointment.scheduled_time >= date(2024, 1, 1), Appointment.scheduled_time < date(2024, 2, 1)),
+    "jobs.claim": select(Job.id)
+        .where(Job.status == "queued", Job.run_after <= date(2024, 1, 1))
+        .order_by(Job.run_after),
+}
+
+def full_scans(conn, stmt):
+    """Return the plan lines of ``stmt`` that scan a table instead of searching it."""
+    compiled = stmt.compile(dialect=sqlite.dialect(paramstyle="named"))
+    plan = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"), compiled.params).fetchall()
+    # SQLite reports index lookups as SEARCH and full passes as SCAN
+    return [row[-1] for row in plan if row[-1].startswith("SCAN")]
+
+def check_query_plans(engine):
+    offenders = {}
+    with engine.connect() as conn:
+        for name, stmt in HOT_QUERIES.items():
+            scans = full_scans(conn, stmt)
+            if scans:
+                offenders[name] = scans
+    return offenders
+
+def main(argv):
+    if "--live" in argv:
+        from app.db.session import engine
+    else:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+    if engine.dialect.name != "sqlite":
+        print(f"EXPLAIN QUERY PLAN check only supports SQLite, not {engine.dialect.name}")
+        return 2
+    offenders = check_query_plans(engine)
+    for name, scans in offenders.items():
+        print(f"FULL SCAN {name}: {'; '.join(scans)}")
+    if not offenders:
+        print(f"All {len(HOT_QUERIES)} hot queries use an index")
+    return 1 if offenders else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
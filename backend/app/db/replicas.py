@@ -0,0 +1,207 @@
+"""Route read-only handlers to read replicas.
+
+Handlers opt in by depending on ``get_read_db`` / ``get_async_read_db``
+instead of ``get_db`` / ``get_async_db``. Their sessions send plain SELECTs
+to a replica and everything else (flushes, DML, SELECT ... FOR UPDATE, and
+any read after the session's first write) to the primary.
+
+Lag is measured with a heartbeat: the primary rewrites one row every
+``REPLICA_HEARTBEAT_INTERVAL`` seconds and each replica's copy of that row
+says how far behind it is. A replica is used only if it is within
+``REPLICA_MAX_LAG`` and, for a user who wrote recently, has caught up to
+that write; otherwise the read goes to the primary. Routing only reads
+state the background ``monitor`` task keeps up to date, so it never blocks.
+
+For local testing, replicas can be SQLite files copied from a SQLite
+primary with ``python -m app.db.replicas sync`` (or periodically, see
+``REPLICA_SQLITE_COPY_INTERVAL``).
+"""
+import asyncio
+import itertools
+import logging
+import sqlite3
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event, exc, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
+from app.core.config import async_url, settings
+from app.db.models.replication import ReplicationHeartbeat
+from app.db.session import async_engine, create_async_db_engine, create_db_engine, engine
+
+logger = logging.getLogger(__name__)
+
+# Set per request by get_current_user, for read-your-writes
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+# user id -> time of their last committed write; older writes are covered by
+# the lag limit anyway
+recent_writes = TTLCache(maxsize=100_000, ttl=settings.REPLICA_MAX_LAG)
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_db_engine(url)
+        self.async_engine = create_async_db_engine(async_url(url))
+        # Primary heartbeat the replica has caught up to; None if unreachable
+        self.seen_at: Optional[datetime] = None
+
+    def poll(self):
+        try:
+            with self.engine.connect() as conn:
+                self.seen_at = conn.execute(select(ReplicationHeartbeat.beat_at)).scalar()
+        except exc.SQLAlchemyError:
+            if self.seen_at is not None:
+                logger.warning("Read replica %s is unreachable; reading from the primary", self.engine.url)
+            self.seen_at = None
+
+    def usable(self, now: datetime, wrote_at: Optional[datetime]) -> bool:
+        if self.seen_at is None or (now - self.seen_at).total_seconds() > settings.REPLICA_MAX_LAG:
+            return False
+        return wrote_at is None or self.seen_at >= wrote_at
+
+replicas = [Replica(url) for url in settings.READ_REPLICA_URLS]
+_turn = itertools.count()
+
+def pick(user_id: Optional[int] = None) -> Optional[Replica]:
+    """A replica fresh enough for ``user_id``, round-robin; None means the primary."""
+    if not replicas:
+        return None
+    now = datetime.utcnow()
+    wrote_at = recent_writes.get(user_id) if user_id is not None else None
+    usable = [replica for replica in replicas if replica.usable(now, wrote_at)]
+    return usable[next(_turn) % len(usable)] if usable else None
+
+def _plain_select(clause) -> bool:
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+class RoutingSession(Session):
+    """Reads from one replica, chosen on first use, until the session writes."""
+
+    def _replica_bind(self, replica: Replica):
+        return replica.engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or self.info.get("wrote") or not _plain_select(clause):
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        if "replica" not in self.info:
+            self.info["replica"] = pick(current_user_id.get())
+        replica = self.info["replica"]
+        if replica is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+        return self._replica_bind(replica)
+
+class AsyncRoutingSession(RoutingSession):
+    def _replica_bind(self, replica: Replica):
+        return replica.async_engine.sync_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=AsyncRoutingSession
+)
+
+@event.listens_for(Session, "after_flush")
+def _mark_written(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _remember_write(session):
+    if not session.info.get("wrote"):
+        return
+    if not isinstance(session, RoutingSession):
+        # A routing session keeps reading from the primary once it has written
+        del session.info["wrote"]
+    user_id = current_user_id.get()
+    if user_id is not None and replicas:
+        recent_writes.set(user_id, datetime.utcnow())
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    if not isinstance(session, RoutingSession):
+        session.info.pop("wrote", None)
+
+def beat():
+    """Rewrite the primary's heartbeat row."""
+    with engine.begin() as conn:
+        now = datetime.utcnow()
+        if not conn.execute(update(ReplicationHeartbeat).where(ReplicationHeartbeat.id == 1).values(beat_at=now)).rowcount:
+            conn.execute(ReplicationHeartbeat.__table__.insert().values(id=1, beat_at=now))
+
+def _sqlite_path(url) -> Optional[str]:
+    parsed = make_url(str(url))
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+def copy_sqlite_replicas():
+    """Copy the SQLite primary over every SQLite replica file (local testing)."""
+    source_path = _sqlite_path(engine.url)
+    if source_path is None:
+        raise RuntimeError("Copying replicas needs a file-backed SQLite primary")
+    beat()
+    source = sqlite3.connect(source_path)
+    try:
+        for replica in replicas:
+            target_path = _sqlite_path(replica.url)
+            if target_path is None:
+                continue
+            target = sqlite3.connect(target_path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+def tick(copy_sqlite: bool = False):
+    if copy_sqlite:
+        copy_sqlite_replicas()
+    else:
+        beat()
+    for replica in replicas:
+        replica.poll()
+
+async def monitor(interval: float):
+    """Heartbeat the primary and poll replica lag until cancelled."""
+    copy_every = settings.REPLICA_SQLITE_COPY_INTERVAL
+    last_copy = 0.0
+    while True:
+        copy_sqlite = bool(copy_every) and time.monotonic() - last_copy >= copy_every
+        try:
+            await run_in_threadpool(tick, copy_sqlite)
+            if copy_sqlite:
+                last_copy = time.monotonic()
+        except Exception:
+            logger.exception("Replica heartbeat failed")
+        await asyncio.sleep(interval)
+
+def status():
+    now = datetime.utcnow()
+    return [
+        {
+            "url": make_url(replica.url).render_as_string(hide_password=True),
+            "seen_at": replica.seen_at,
+            "lag_seconds": (now - replica.seen_at).total_seconds() if replica.seen_at else None,
+            "usable": replica.usable(now, None),
+        }
+        for replica in replicas
+    ]
+
+def main(argv):
+    if argv[:1] != ["sync"]:
+        print("usage: python -m app.db.replicas sync")
+        return 2
+    if not replicas:
+        print("READ_REPLICA_URLS is empty")
+        return 1
+    copy_sqlite_replicas()
+    print(f"Copied the primary into {len(replicas)} replica(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
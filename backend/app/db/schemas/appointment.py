@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+from app.db.schemas.batch import MAX_BATCH_ITEMS
 
 class AppointmentBase(BaseModel):
     scheduled_time: datetime
@@ -15,11 +16,23 @@ class AppointmentUpdate(BaseModel):
     scheduled_time: Optional[datetime] = None
     status: Optional[str] = None
     notes: Optional[str] = None
+    # Version the client last read; the update is rejected if it is stale
+    version: Optional[int] = None
 
 class AppointmentRead(AppointmentBase):
     id: int
     patient_id: int
     doctor_id: int
+    version: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class AppointmentStatusChange(BaseModel):
+    id: int
+    status: str
+    # As in AppointmentUpdate: rejected if the appointment changed since
+    version: Optional[int] = None
+
+class AppointmentStatusBatch(BaseModel):
+    items: List[AppointmentStatusChange] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
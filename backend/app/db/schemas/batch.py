@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Largest batch one request may carry; a delivery note rarely exceeds 500 lines
+MAX_BATCH_ITEMS = 1000
+
+class BatchItemOutcome(BaseModel):
+    # Position of the item in the request
+    index: int
+    # created, updated, unchanged, failed, or skipped when nothing was committed
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    # False when nothing was written: an atomic batch with a failed item
+    committed: bool
+    applied: int
+    failed: int
+    items: List[BatchItemOutcome]
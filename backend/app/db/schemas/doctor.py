@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime, time
 
 class DoctorBase(BaseModel):
     specialization: Optional[str] = None
@@ -18,4 +19,28 @@ class DoctorRead(DoctorBase):
     user_id: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class DoctorScheduleEntry(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = Monday
+    start_time: time
+    end_time: time
+    slot_minutes: int = Field(default=30, ge=5, le=240)
+
+    class Config:
+        from_attributes = True
+
+class DoctorScheduleRead(BaseModel):
+    doctor_id: int
+    schedule: List[DoctorScheduleEntry]
+
+class AvailableSlot(BaseModel):
+    doctor_id: int
+    start: datetime
+    end: datetime
+
+class AvailableSlots(BaseModel):
+    slots: List[AvailableSlot]
+    # False when the time budget ran out before the whole window was searched
+    complete: bool
+    searched_until: datetime
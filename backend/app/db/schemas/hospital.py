@@ -1,19 +1,38 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from app.db.schemas.batch import MAX_BATCH_ITEMS
 
 class HospitalBase(BaseModel):
     name: str
     address: Optional[str] = None
     info: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
 
 class HospitalCreate(HospitalBase):
     pass
 
+class HospitalUpdate(BaseModel):
+    name: Optional[str] = None
+    address: Optional[str] = None
+    info: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+
 class HospitalRead(HospitalBase):
     id: int
     class Config:
         from_attributes = True
 
+class HospitalResponse(HospitalBase):
+    id: int
+    status: Optional[str] = None
+    created_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
 class DepartmentBase(BaseModel):
     name: str
     hospital_id: int
@@ -38,4 +57,13 @@ class StaffCreate(StaffBase):
 class StaffRead(StaffBase):
     id: int
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class StaffImportItem(BaseModel):
+    email: str
+    # Department name; created in the hospital if it does not exist yet
+    department: Optional[str] = Field(default=None, max_length=100)
+    role: Optional[str] = Field(default=None, max_length=50)
+
+class StaffImport(BaseModel):
+    items: List[StaffImportItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+from app.db.schemas.batch import MAX_BATCH_ITEMS
 
 class LabTestBase(BaseModel):
     name: str
@@ -40,4 +41,11 @@ class LabResultRead(LabResultBase):
     id: int
     reported_at: datetime
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class LabResultBatchItem(BaseModel):
+    id: int
+    result: Optional[str] = None
+
+class LabResultBatch(BaseModel):
+    items: List[LabResultBatchItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
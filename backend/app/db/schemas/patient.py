@@ -18,4 +18,10 @@ class PatientRead(PatientBase):
     user_id: int
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+class PatientSearchResult(BaseModel):
+    id: int
+    user_id: int
+    full_name: str
+    email: str
+    phone: Optional[str] = None
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+from app.db.schemas.batch import MAX_BATCH_ITEMS
 
 class MedicineBase(BaseModel):
     name: str
@@ -46,17 +47,21 @@ class PharmacyOrderBase(BaseModel):
     status: Optional[str] = "pending"
 
 class PharmacyOrderCreate(PharmacyOrderBase):
-    pass
+    # The hospital whose pharmacy fills the order
+    hospital_id: int
 
 class PharmacyOrderRead(PharmacyOrderBase):
     id: int
+    hospital_id: Optional[int] = None
     ordered_at: datetime
     class Config:
         from_attributes = True
 
 class InventoryBase(BaseModel):
     medicine_id: int
-    stock: int
+    quantity: int
+    expiry_date: Optional[date] = None
+    batch_number: Optional[str] = None
 
 class InventoryUpdate(BaseModel):
     stock: int
@@ -64,4 +69,13 @@ class InventoryUpdate(BaseModel):
 class InventoryRead(InventoryBase):
     id: int
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class StockReceiptItem(BaseModel):
+    medicine_id: int
+    quantity: int = Field(gt=0)
+    expiry_date: date
+    batch_number: str = Field(min_length=1, max_length=50)
+
+class StockReceipt(BaseModel):
+    items: List[StockReceiptItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
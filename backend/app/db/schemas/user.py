@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -21,18 +21,23 @@ class UserLogin(BaseModel):
 
 class UserResponse(UserBase):
     id: int
-    created_at: str
+    hospital_id: Optional[int] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class UserHospitalUpdate(BaseModel):
+    hospital_id: Optional[int] = None
+
 class PasswordChange(BaseModel):
     current_password: str
     new_password: str
 
 class UserRead(UserBase):
     id: int
-    created_at: str
+    hospital_id: Optional[int] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True 
\ No newline at end of file
@@ -1,6 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import MeteredQueuePool, pool_metrics
+from app.db.query_metrics import install_query_metrics
+from app.db.statement_guard import install_statement_guard
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) 
\ No newline at end of file
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}")
+    cursor.close()
+
+def create_db_engine(url: str):
+    """Build an engine using the pool/PRAGMA profile from Settings."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        kwargs = {}
+        if parsed.database not in (None, "", ":memory:"):
+            # In-memory databases keep SQLAlchemy's default pool: each new
+            # connection would otherwise open a separate, empty database
+            kwargs = {
+                "poolclass": MeteredQueuePool,
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_timeout": settings.DB_POOL_TIMEOUT,
+            }
+        engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    event.listen(engine, "connect", pool_metrics.on_connect)
+    event.listen(engine, "checkout", pool_metrics.on_checkout)
+    event.listen(engine, "checkin", pool_metrics.on_checkin)
+    install_query_metrics(engine)
+    install_statement_guard(engine)
+    return engine
+
+def create_async_db_engine(url: str):
+    """Async counterpart of create_db_engine (aiosqlite / aiomysql)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        engine = create_async_engine(url)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_async_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    event.listen(engine.sync_engine, "connect", pool_metrics.on_connect)
+    event.listen(engine.sync_engine, "checkout", pool_metrics.on_checkout)
+    event.listen(engine.sync_engine, "checkin", pool_metrics.on_checkin)
+    install_query_metrics(engine.sync_engine)
+    install_statement_guard(engine.sync_engine)
+    return engine
+
+engine = create_db_engine(settings.SQLALCHEMY_DATABASE_URI)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_db_engine(settings.ASYNC_SQLALCHEMY_DATABASE_URI)
+# Objects stay readable after commit; async sessions cannot lazy-refresh them
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+
+_current_counter: ContextVar = ContextVar("statement_counter", default=None)
+
+class StatementBudgetExceeded(RuntimeError):
+    pass
+
+class StatementCounter:
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.count = 0
+
+@contextmanager
+def count_statements(budget: Optional[int] = None):
+    """Count SQL statements run in this context, failing once ``budget`` is exceeded.
+
+    The counter is a mutable object in a context variable, so statements run
+    from threadpool workers spawned inside the context are counted too.
+    """
+    counter = StatementCounter(budget)
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+def install_statement_guard(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter = _current_counter.get()
+        if counter is None:
+            return
+        counter.count += 1
+        if counter.budget is not None and counter.count > counter.budget:
+            raise StatementBudgetExceeded(
+                f"Request ran more than {counter.budget} SQL statements; "
+                f"likely an N+1 lazy load. Last statement: {statement}"
+            )
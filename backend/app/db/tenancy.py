@@ -0,0 +1,107 @@
+"""Per-hospital tenancy for the fact tables.
+
+Models that mix in ``HospitalScoped`` carry a ``hospital_id``. While a
+tenant is active, every ORM SELECT, UPDATE and DELETE through a Session
+only sees that hospital's rows, and new rows are stamped with it.
+
+Models registered with ``scoped_through`` have no column of their own and
+are filtered by the hospital of their parent row instead.
+
+The tenant comes from ``session.info["hospital_id"]`` when set, else from
+the request: ``get_current_user`` activates it for staff. Staff without a
+home hospital get ``UNASSIGNED``, which matches no rows; only admins and
+system admins go unfiltered. Pass ``execution_options(all_hospitals=True)``
+to see across tenants on purpose. Core statements run on an engine or
+connection (rollups, analytics, exports) are never filtered.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import Column, ForeignKey, Integer, event, select
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
+
+# Roles whose users only work inside their own hospital
+TENANT_ROLES = ("hospital_admin", "doctor", "pharmacist", "lab_worker")
+# Roles that work across all hospitals
+UNSCOPED_ROLES = ("admin", "system_admin")
+# Tenant of staff not yet assigned to a hospital; no row has this id
+UNASSIGNED = -1
+
+current_hospital: ContextVar[Optional[int]] = ContextVar("current_hospital", default=None)
+
+class HospitalScoped:
+    """Rows owned by one hospital; NULL for rows from before tenancy."""
+
+    @declared_attr
+    def hospital_id(cls):
+        # Indexed through each table's composite (hospital_id, ...) index
+        return Column(Integer, ForeignKey("hospitals.id"), nullable=True)
+
+class NoHomeHospital(PermissionError):
+    """Staff without a home hospital tried to create hospital-owned rows."""
+
+# (model, foreign key attribute, parent model) registered by scoped_through
+_scoped_through = []
+
+def scoped_through(parent, foreign_key: str):
+    """Class decorator: scope a model's rows by the hospital of their ``parent`` row."""
+    def register(cls):
+        _scoped_through.append((cls, foreign_key, parent))
+        return cls
+    return register
+
+def tenant_for(user) -> Optional[int]:
+    if user.role not in TENANT_ROLES:
+        return None
+    return user.hospital_id if user.hospital_id is not None else UNASSIGNED
+
+def can_access(user, hospital_id: int) -> bool:
+    tenant = tenant_for(user)
+    if tenant is None:
+        return user.role in UNSCOPED_ROLES
+    return tenant == hospital_id
+
+def activate(hospital_id: Optional[int]):
+    current_hospital.set(hospital_id)
+
+@contextmanager
+def tenant_scope(hospital_id: Optional[int]):
+    """Run a block (a script, a job) as ``hospital_id``; None lifts the filter."""
+    token = current_hospital.set(hospital_id)
+    try:
+        yield
+    finally:
+        current_hospital.reset(token)
+
+def session_tenant(session) -> Optional[int]:
+    if "hospital_id" in session.info:
+        return session.info["hospital_id"]
+    return current_hospital.get()
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_by_tenant(state):
+    if not (state.is_select or state.is_update or state.is_delete):
+        return
+    if state.execution_options.get("all_hospitals"):
+        return
+    hospital_id = session_tenant(state.session)
+    if hospital_id is None:
+        return
+    options = [with_loader_criteria(
+        HospitalScoped, lambda cls: cls.hospital_id == hospital_id, include_aliases=True,
+    )]
+    for model, foreign_key, parent in _scoped_through:
+        owned = select(parent.id).where(parent.hospital_id == hospital_id)
+        options.append(with_loader_criteria(model, getattr(model, foreign_key).in_(owned), include_aliases=True))
+    state.statement = state.statement.options(*options)
+
+@event.listens_for(Session, "before_flush")
+def _stamp_new_rows(session, flush_context, instances):
+    hospital_id = session_tenant(session)
+    if hospital_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, HospitalScoped) and obj.hospital_id is None:
+            if hospital_id == UNASSIGNED:
+                raise NoHomeHospital("No home hospital is assigned to this account")
+            obj.hospital_id = hospital_id
@@ -1,10 +1,70 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+import hmac
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core import jobs, metrics
+from app.core.analytics import analytics_pool
+from app.core.process_pool import PoolSaturated
+from app.core.rollups import refresh_periodically
+from app.core.security import password_pool
+from app.db import replicas, tenancy
+from app.db.statement_guard import count_statements
 
-app = FastAPI(title="HMS Tajikistan API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    rollups = None
+    if settings.ROLLUP_REFRESH_INTERVAL:
+        rollups = asyncio.create_task(refresh_periodically(settings.ROLLUP_REFRESH_INTERVAL))
+    heartbeat = None
+    if replicas.replicas and settings.REPLICA_HEARTBEAT_INTERVAL:
+        heartbeat = asyncio.create_task(replicas.monitor(settings.REPLICA_HEARTBEAT_INTERVAL))
+    job_worker = None
+    if settings.JOB_WORKERS:
+        job_worker = asyncio.create_task(jobs.work(settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL))
+    yield
+    for task in (rollups, heartbeat, job_worker):
+        if task is not None:
+            task.cancel()
+    password_pool.shutdown()
+    analytics_pool.shutdown()
+    jobs.job_pool.shutdown()
+
+app = FastAPI(title="HMS Tajikistan API", lifespan=lifespan)
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Server busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(tenancy.NoHomeHospital)
+async def no_home_hospital_handler(request: Request, exc: tenancy.NoHomeHospital):
+    return JSONResponse(status_code=403, content={"detail": str(exc)})
+
+if settings.SQL_STATEMENT_BUDGET:
+    @app.middleware("http")
+    async def statement_budget(request: Request, call_next):
+        with count_statements(settings.SQL_STATEMENT_BUDGET):
+            return await call_next(request)
+
+# Added last so it wraps the other middleware and sees the full request time
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def root():
     return {"message": "HMS Tajikistan Backend Running"} 
\ No newline at end of file
@@ -1,6 +1,6 @@
 from sqlalchemy import create_engine, text
 from app.core.config import settings
-from app.db.models.user import Base
+from app.db.base import Base
 from app.db.session import engine
 
 def init_db():
@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point them at a scratch database first
+_scratch = tempfile.mkdtemp(prefix="hms-tests-")
+os.environ.update({
+    "SQLITE_DB_URL": f"sqlite:///{_scratch}/test.db",
+    "JWT_SECRET": "test-secret",
+    # Every request in the suite runs under this budget, so N+1 lazy loading fails tests
+    "SQL_STATEMENT_BUDGET": "25",
+    "JOB_WORKERS": "0",
+    "ROLLUP_REFRESH_INTERVAL": "0",
+    "BCRYPT_ROUNDS": "4",
+    "BLOB_STORE_DIR": f"{_scratch}/blobs",
+    "DOCUMENT_CACHE_DIR": f"{_scratch}/documents",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core import response_cache
+from app.core.principal import principal_cache
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.models.patient import Patient
+from app.db.models.user import User
+from app.db.session import SessionLocal, engine
+from app.main import app
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(engine)
+
+@pytest.fixture(autouse=True)
+def db(schema):
+    """Empty tables per test and a session to seed them with."""
+    with engine.begin() as conn:
+        # SQLite does not enforce foreign keys here, so the order does not matter
+        for table in Base.metadata.tables.values():
+            conn.execute(table.delete())
+    principal_cache.clear()
+    response_cache.backend.entries.clear()
+    with SessionLocal() as session:
+        yield session
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture
+def make_user(db):
+    def make(role: str, hospital_id: int = None, **values) -> User:
+        user = User(
+            email=values.pop("email", f"{role}-{db.query(User).count() + 1}@test.tj"),
+            hashed_password="x", full_name=role, role=role, hospital_id=hospital_id, **values,
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+@pytest.fixture
+def auth():
+    def headers(user: User) -> dict:
+        return {"Authorization": "Bearer " + create_access_token({"sub": user.email, "role": user.role})}
+    return headers
+
+@pytest.fixture
+def patient(db, make_user):
+    """A patient user and their record, with patients.id != users.id."""
+    other, user = make_user("patient"), make_user("patient")
+    # Rows in the opposite order, so each record's id is the other one's user id
+    record = Patient(user_id=user.id)
+    db.add(record)
+    db.flush()
+    db.add(Patient(user_id=other.id))
+    db.commit()
+    assert record.id != user.id
+    return user, record
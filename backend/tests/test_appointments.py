@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, time
+from app.db.models.appointment import Appointment
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.hospital import Hospital
+from app.db.models.patient import Patient
+from app.db.models.user import User
+
+@pytest.fixture
+def doctors(db, patient, make_user):
+    """Three doctors whose doctors.id differ from their users.id; the patients' users come first."""
+    hospital = Hospital(name="H1", status="approved")
+    db.add(hospital)
+    db.commit()
+    users = [make_user("doctor", hospital_id=hospital.id) for _ in range(3)]
+    records = [Doctor(user_id=user.id) for user in users]
+    db.add_all(records)
+    db.flush()
+    # 2030-01-07 is a Monday
+    db.add_all(DoctorSchedule(doctor_id=record.id, weekday=0, start_time=time(9), end_time=time(12), slot_minutes=30) for record in records)
+    db.commit()
+    assert all(record.id != user.id for user, record in zip(users, records))
+    return list(zip(users, records))
+
+@pytest.fixture
+def other_patient(db, patient):
+    # The fixture's other patient: their users.id is the first patient's patients.id
+    user, _ = patient
+    record = db.query(Patient).filter(Patient.user_id != user.id).one()
+    return db.get(User, record.user_id), record
+
+def _appointment(db, record, doctor, status="scheduled"):
+    appt = Appointment(
+        patient_id=record.id, doctor_id=doctor.id, scheduled_time=datetime(2030, 1, 7, 9),
+        status=status, hospital_id=doctor.user.hospital_id,
+    )
+    db.add(appt)
+    db.commit()
+    return appt
+
+def test_patient_books_only_for_themselves(client, patient, other_patient, doctors, auth):
+    user, record = patient
+    _, doctor = doctors[0]
+    booking = {"doctor_id": doctor.id, "scheduled_time": "2030-01-07T09:00:00"}
+    response = client.post("/api/v1/appointments/", json={**booking, "patient_id": other_patient[1].id}, headers=auth(user))
+    assert response.status_code == 403
+    response = client.post("/api/v1/appointments/", json={**booking, "patient_id": record.id}, headers=auth(user))
+    assert response.status_code == 200, response.text
+
+def test_appointment_lists_resolve_the_callers_record(client, db, patient, other_patient, doctors, auth):
+    (first_user, first), (_, second), _ = doctors
+    mine = _appointment(db, patient[1], first)
+    _appointment(db, other_patient[1], second)
+    for user in (patient[0], first_user):
+        items = client.get("/api/v1/appointments/", headers=auth(user)).json()["items"]
+        assert [item["id"] for item in items] == [mine.id]
+
+def test_only_the_appointments_patient_can_change_it(client, db, patient, other_patient, doctors, auth):
+    user, record = patient
+    appt = _appointment(db, record, doctors[0][1])
+    update = {"notes": "Running late"}
+    for path in (f"/api/v1/appointments/{appt.id}", f"/api/v1/appointments/{appt.id}/reschedule"):
+        assert client.put(path, json=update, headers=auth(other_patient[0])).status_code == 403
+        assert client.put(path, json=update, headers=auth(user)).status_code == 200
+    assert client.delete(f"/api/v1/appointments/{appt.id}", headers=auth(other_patient[0])).status_code == 403
+    assert client.delete(f"/api/v1/appointments/{appt.id}", headers=auth(user)).status_code == 200
+
+def test_only_the_appointments_doctor_starts_the_consultation(client, db, patient, doctors, auth):
+    (first_user, first), (second_user, _), _ = doctors
+    appt = _appointment(db, patient[1], first, status="confirmed")
+    path = f"/api/v1/appointments/{appt.id}/start-consultation"
+    assert client.post(path, headers=auth(second_user)).status_code == 403
+    assert client.put(f"/api/v1/appointments/{appt.id}", json={"notes": "x"}, headers=auth(second_user)).status_code == 403
+    assert client.post(path, headers=auth(first_user)).status_code == 200
+
+def test_doctors_change_only_their_own_appointments_statuses(client, db, patient, doctors, auth):
+    (first_user, first), _, (third_user, third) = doctors
+    # The first doctor's users.id is the third doctor's doctors.id
+    assert first_user.id == third.id
+    appt = _appointment(db, patient[1], third)
+    batch = {"items": [{"id": appt.id, "status": "confirmed"}]}
+    refused = client.post("/api/v1/appointments/status-changes", json=batch, headers=auth(first_user)).json()
+    assert refused["items"][0]["status"] == "failed"
+    accepted = client.post("/api/v1/appointments/status-changes", json=batch, headers=auth(third_user)).json()
+    assert accepted["items"][0]["status"] == "updated", accepted
+    db.expire_all()
+    assert db.get(Appointment, appt.id).status == "confirmed"
@@ -0,0 +1,43 @@
+import pytest
+from app.db.models.doctor import Doctor
+from app.db.models.hospital import Hospital
+from app.db.models.lab import LabOrder, LabResult, LabTest
+from app.db.models.patient import Patient
+from app.db.models.prescription import Prescription
+
+@pytest.fixture
+def records(db, patient, make_user):
+    """A prescription and a lab result for each of the fixture's two patients."""
+    hospital = Hospital(name="H1", status="approved")
+    db.add_all([hospital, LabTest(name="CBC")])
+    db.flush()
+    doctor = Doctor(user_id=make_user("doctor", hospital_id=hospital.id).id)
+    db.add(doctor)
+    db.flush()
+    documents = {}
+    for record in db.query(Patient).all():
+        order = LabOrder(patient_id=record.id, test_id=1, hospital_id=hospital.id)
+        prescription = Prescription(patient_id=record.id, doctor_id=doctor.id, medications="Aspirin 500 mg", hospital_id=hospital.id)
+        db.add_all([order, prescription])
+        db.flush()
+        result = LabResult(order_id=order.id, result="Hb 140")
+        db.add(result)
+        db.flush()
+        documents[record.user_id] = {
+            "prescription": f"/api/v1/prescriptions/{prescription.id}/pdf",
+            "lab result": f"/api/v1/lab/reports/{result.id}/pdf",
+        }
+    db.commit()
+    return documents
+
+def test_patients_download_only_their_own_documents(client, db, patient, records, auth):
+    user, record = patient
+    other = next(user_id for user_id in records if user_id != user.id)
+    # The other patient's users.id is this patient's patients.id
+    assert other == record.id
+    for kind, url in records[user.id].items():
+        response = client.get(url, headers=auth(user))
+        assert response.status_code == 200, kind
+        assert response.content.startswith(b"%PDF")
+    for kind, url in records[other].items():
+        assert client.get(url, headers=auth(user)).status_code == 403, kind
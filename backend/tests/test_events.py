@@ -0,0 +1,58 @@
+import pytest
+from datetime import date, time
+from app.core import events
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.hospital import Hospital
+from app.db.models.pharmacy import Inventory, Medicine
+
+@pytest.fixture
+def published(monkeypatch):
+    """(topic, event type) of everything published, whether or not anyone listens."""
+    sent = []
+    monkeypatch.setattr(events.broker, "publish", lambda topic, message: sent.append((topic, message[0])))
+    return sent
+
+@pytest.fixture
+def hospital(db):
+    hospital = Hospital(name="H1", status="approved")
+    db.add(hospital)
+    db.commit()
+    return hospital
+
+def test_pharmacy_order_events_reach_the_patients_user(client, db, hospital, patient, make_user, auth, published):
+    user, record = patient
+    medicine = Medicine(name="Aspirin", price=5, stock=5)
+    db.add(medicine)
+    db.flush()
+    db.add(Inventory(medicine_id=medicine.id, quantity=5, batch_number="B1", expiry_date=date(2030, 1, 1), hospital_id=hospital.id))
+    db.commit()
+    created = client.post("/api/v1/pharmacy/orders", json={
+        "patient_id": record.id, "medicine_id": medicine.id, "quantity": 1, "hospital_id": hospital.id,
+    }, headers=auth(user))
+    assert created.status_code == 200, created.text
+
+    pharmacist = make_user("pharmacist", hospital_id=hospital.id)
+    dispensed = client.post(f"/api/v1/pharmacy/orders/{created.json()['id']}/dispense", headers=auth(pharmacist))
+    assert dispensed.status_code == 200, dispensed.text
+    assert published == [(events.user_topic(user.id), "pharmacy_order")]
+
+def test_appointment_events_reach_the_patients_and_doctors_users(client, db, hospital, patient, make_user, auth, published):
+    user, record = patient
+    # Another doctor first, so doctors.id != users.id
+    for _ in range(2):
+        doctor_user = make_user("doctor", hospital_id=hospital.id)
+        doctor = Doctor(user_id=doctor_user.id)
+        db.add(doctor)
+        db.flush()
+    assert doctor.id != doctor_user.id
+    # 2030-01-07 is a Monday
+    db.add(DoctorSchedule(doctor_id=doctor.id, weekday=0, start_time=time(9), end_time=time(12), slot_minutes=30))
+    db.commit()
+
+    response = client.post("/api/v1/appointments/", json={
+        "patient_id": record.id, "doctor_id": doctor.id, "scheduled_time": "2030-01-07T09:00:00",
+    }, headers=auth(user))
+    assert response.status_code == 200, response.text
+    assert sorted(published) == sorted([
+        (events.user_topic(user.id), "appointment"), (events.user_topic(doctor_user.id), "appointment"),
+    ])
@@ -0,0 +1,13 @@
+from app.db.models.hospital import Hospital
+
+def test_hospital_list_follows_admin_reassignment(client, db, make_user, auth):
+    first, second = Hospital(name="H1", status="approved"), Hospital(name="H2", status="approved")
+    db.add_all([first, second])
+    db.commit()
+    admin = make_user("hospital_admin", hospital_id=first.id)
+    system_admin = make_user("system_admin")
+
+    assert [h["name"] for h in client.get("/api/v1/hospitals/", headers=auth(admin)).json()] == ["H1"]
+    response = client.put(f"/api/v1/system-admin/users/{admin.id}/hospital", json={"hospital_id": second.id}, headers=auth(system_admin))
+    assert response.status_code == 200, response.text
+    assert [h["name"] for h in client.get("/api/v1/hospitals/", headers=auth(admin)).json()] == ["H2"]
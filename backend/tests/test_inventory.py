@@ -0,0 +1,51 @@
+from datetime import date
+from app.db.models.hospital import Hospital
+from app.db.models.pharmacy import Inventory, Medicine
+
+def test_inventory_correction_moves_medicine_stock(client, db, make_user, auth):
+    hospital = Hospital(name="H1", status="approved")
+    medicine = Medicine(name="Aspirin", price=5, stock=15)
+    db.add_all([hospital, medicine])
+    db.flush()
+    db.add_all([
+        Inventory(medicine_id=medicine.id, quantity=10, batch_number="B1", expiry_date=date(2030, 1, 1), hospital_id=hospital.id),
+        Inventory(medicine_id=medicine.id, quantity=5, batch_number="B2", expiry_date=date(2031, 1, 1), hospital_id=hospital.id),
+    ])
+    db.commit()
+    pharmacist = make_user("pharmacist", hospital_id=hospital.id)
+
+    listed = client.get("/api/v1/pharmacy/inventory", headers=auth(pharmacist))
+    assert listed.status_code == 200, listed.text
+    batch = listed.json()["items"][0]
+    assert batch["quantity"] == 10
+
+    response = client.put(f"/api/v1/pharmacy/inventory/{batch['id']}", json={"stock": 7}, headers=auth(pharmacist))
+    assert response.status_code == 200, response.text
+    assert response.json()["quantity"] == 7
+    db.expire_all()
+    assert db.get(Medicine, medicine.id).stock == 12
+
+    assert client.put(f"/api/v1/pharmacy/inventory/{batch['id']}", json={"stock": -1}, headers=auth(pharmacist)).status_code == 400
+
+def test_add_stock_keeps_batches_and_medicine_stock_together(client, db, make_user, auth):
+    hospital = Hospital(name="H1", status="approved")
+    medicine = Medicine(name="Aspirin", price=5, stock=3)
+    db.add_all([hospital, medicine])
+    db.flush()
+    db.add(Inventory(medicine_id=medicine.id, quantity=3, batch_number="Z", expiry_date=date(2030, 1, 1), hospital_id=hospital.id))
+    db.commit()
+    pharmacist = make_user("pharmacist", hospital_id=hospital.id)
+
+    def add(batch_number, quantity):
+        return client.post("/api/v1/pharmacy/inventory/add-stock", params={
+            "medicine_id": medicine.id, "quantity": quantity, "expiry_date": "2030-01-01", "batch_number": batch_number,
+        }, headers=auth(pharmacist))
+
+    for batch_number, quantity in (("Z", -2), ("Z", 0), ("NEW", -9)):
+        assert add(batch_number, quantity).status_code == 422
+    assert add("Z", 4).status_code == 200
+    assert add("NEW", 2).status_code == 200
+    db.expire_all()
+    batches = {b.batch_number: b.quantity for b in db.query(Inventory).filter(Inventory.medicine_id == medicine.id)}
+    assert batches == {"Z": 7, "NEW": 2}
+    assert db.get(Medicine, medicine.id).stock == 9
@@ -0,0 +1,9 @@
+import re
+
+def test_requests_are_labelled_with_the_route_template(client, make_user, auth):
+    admin = make_user("admin")
+    assert client.get("/api/v1/doctors/12345", headers=auth(admin)).status_code == 404
+    body = client.get("/metrics").text
+    # The template, not the raw path, so the label set stays small
+    assert re.search(r'hms_http_requests_total\{method="GET",route="(/api/v1)?/doctors/\{doctor_id\}",status="404"\} 1', body)
+    assert "12345" not in body
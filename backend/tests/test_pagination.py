@@ -0,0 +1,25 @@
+import base64
+import json
+import pytest
+from app.core.pagination import encode_cursor
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+@pytest.mark.parametrize("cursor", [
+    _cursor({"v": {"dt": "nope"}, "id": 1}),
+    _cursor({"v": {"dt": 5}, "id": 1}),
+    _cursor({"v": {"d": None}, "id": 1}),
+    _cursor({"v": None, "id": "1"}),
+    "not base64!",
+])
+def test_crafted_cursor_is_rejected(client, make_user, auth, cursor):
+    response = client.get("/api/v1/system-admin/users", params={"cursor": cursor}, headers=auth(make_user("system_admin")))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_cursor_round_trips(client, make_user, auth):
+    admin = make_user("system_admin")
+    response = client.get("/api/v1/system-admin/users", params={"cursor": encode_cursor(None, None, 0)}, headers=auth(admin))
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()["items"]] == [admin.id]
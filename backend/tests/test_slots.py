@@ -0,0 +1,59 @@
+import pytest
+from datetime import time
+from app.db.models.doctor import Doctor, DoctorSchedule
+from app.db.models.hospital import Hospital
+
+@pytest.fixture
+def doctor(db, make_user):
+    hospital = Hospital(name="H1", status="approved")
+    db.add(hospital)
+    db.commit()
+    user = make_user("doctor", hospital_id=hospital.id)
+    doctor = Doctor(user_id=user.id, department="Cardiology")
+    db.add(doctor)
+    db.commit()
+    return doctor
+
+def test_available_slots_accepts_aware_start(client, db, doctor, make_user, auth):
+    # 2030-01-07 is a Monday
+    db.add(DoctorSchedule(doctor_id=doctor.id, weekday=0, start_time=time(9), end_time=time(12), slot_minutes=30))
+    db.commit()
+    patient = make_user("patient")
+    for start in ("2030-01-07T08:00:00Z", "2030-01-07T10:00:00+01:00"):
+        response = client.get("/api/v1/appointments/available-slots", params={"doctor_id": doctor.id, "start": start, "limit": 2}, headers=auth(patient))
+        assert response.status_code == 200, response.text
+        assert [slot["start"] for slot in response.json()["slots"]] == ["2030-01-07T09:00:00", "2030-01-07T09:30:00"]
+
+@pytest.mark.parametrize("schedule", [
+    # Overlapping templates on one weekday
+    [{"weekday": 0, "start_time": "09:00", "end_time": "12:00", "slot_minutes": 30},
+     {"weekday": 0, "start_time": "11:00", "end_time": "13:00", "slot_minutes": 20}],
+    # 50 minutes do not divide three hours
+    [{"weekday": 1, "start_time": "09:00", "end_time": "12:00", "slot_minutes": 50}],
+    [{"weekday": 2, "start_time": "12:00", "end_time": "09:00", "slot_minutes": 30}],
+])
+def test_schedule_rejects_templates_with_clashing_slots(client, doctor, make_user, auth, schedule):
+    admin = make_user("hospital_admin", hospital_id=doctor.user.hospital_id)
+    response = client.put(f"/api/v1/doctors/{doctor.id}/schedule", json=schedule, headers=auth(admin))
+    assert response.status_code == 400
+
+def test_schedule_accepts_adjacent_templates(client, doctor, make_user, auth):
+    admin = make_user("hospital_admin", hospital_id=doctor.user.hospital_id)
+    schedule = [
+        {"weekday": 0, "start_time": "09:00:00", "end_time": "12:00:00", "slot_minutes": 30},
+        {"weekday": 0, "start_time": "12:00:00", "end_time": "13:00:00", "slot_minutes": 20},
+    ]
+    response = client.put(f"/api/v1/doctors/{doctor.id}/schedule", json=schedule, headers=auth(admin))
+    assert response.status_code == 200, response.text
+    assert len(response.json()["schedule"]) == 2
+
+def test_schedule_is_only_changed_by_the_doctors_hospital(client, db, doctor, make_user, auth):
+    other = Hospital(name="H2", status="approved")
+    db.add(other)
+    db.commit()
+    schedule = [{"weekday": 0, "start_time": "09:00:00", "end_time": "12:00:00", "slot_minutes": 30}]
+    elsewhere = make_user("hospital_admin", hospital_id=other.id)
+    assert client.put(f"/api/v1/doctors/{doctor.id}/schedule", json=schedule, headers=auth(elsewhere)).status_code == 403
+    assert db.query(DoctorSchedule).count() == 0
+    admin = make_user("hospital_admin", hospital_id=doctor.user.hospital_id)
+    assert client.put(f"/api/v1/doctors/{doctor.id}/schedule", json=schedule, headers=auth(admin)).status_code == 200
@@ -0,0 +1,29 @@
+import pytest
+from datetime import date
+from app.db.models.hospital import Hospital
+from app.db.models.pharmacy import Inventory, Medicine
+from app.db.statement_guard import StatementBudgetExceeded, count_statements
+
+@pytest.fixture
+def stocked(db):
+    hospital = Hospital(name="H1", status="approved")
+    db.add(hospital)
+    db.flush()
+    for n in range(40):
+        medicine = Medicine(name=f"Medicine {n}", price=5, stock=10)
+        db.add(medicine)
+        db.flush()
+        db.add(Inventory(medicine_id=medicine.id, quantity=10, batch_number=f"B{n}", expiry_date=date(2030, 1, 1), hospital_id=hospital.id))
+    db.commit()
+    return hospital
+
+def test_budget_fails_lazy_loading_per_row(db, stocked):
+    with pytest.raises(StatementBudgetExceeded), count_statements(10):
+        for item in db.query(Inventory).all():
+            item.medicine.name
+
+def test_inventory_details_loads_medicines_with_the_batches(client, stocked, make_user, auth):
+    pharmacist = make_user("pharmacist", hospital_id=stocked.id)
+    response = client.get("/api/v1/pharmacy/inventory-details", headers=auth(pharmacist))
+    assert response.status_code == 200
+    assert sorted(item["medicine_name"] for item in response.json()) == sorted(f"Medicine {n}" for n in range(40))
@@ -0,0 +1,100 @@
+import pytest
+from datetime import date
+from app.db.models.hospital import Hospital
+from app.db.models.lab import LabOrder, LabResult, LabTest
+from app.db.models.patient import Patient
+from app.db.models.pharmacy import Inventory, Medicine
+
+@pytest.fixture
+def hospitals(db):
+    first, second = Hospital(name="H1", status="approved"), Hospital(name="H2", status="approved")
+    db.add_all([first, second])
+    db.commit()
+    return first, second
+
+def test_patient_order_is_dispensed_by_the_hospital_holding_the_stock(client, db, hospitals, patient, make_user, auth):
+    first, second = hospitals
+    user, record = patient
+    medicine = Medicine(name="Aspirin", price=5, stock=5)
+    db.add(medicine)
+    db.flush()
+    db.add(Inventory(medicine_id=medicine.id, quantity=5, batch_number="B1", expiry_date=date(2030, 1, 1), hospital_id=second.id))
+    db.commit()
+    order = {"patient_id": record.id, "medicine_id": medicine.id, "quantity": 2}
+
+    # Stock is only taken from the named hospital
+    assert client.post("/api/v1/pharmacy/orders", json={**order, "hospital_id": first.id}, headers=auth(user)).status_code == 409
+    created = client.post("/api/v1/pharmacy/orders", json={**order, "hospital_id": second.id}, headers=auth(user))
+    assert created.status_code == 200, created.text
+    assert created.json()["hospital_id"] == second.id
+    order_id = created.json()["id"]
+
+    elsewhere = make_user("pharmacist", hospital_id=first.id)
+    assert client.get(f"/api/v1/pharmacy/orders/{order_id}", headers=auth(elsewhere)).status_code == 404
+    assert client.post(f"/api/v1/pharmacy/orders/{order_id}/dispense", headers=auth(elsewhere)).status_code == 404
+
+    pharmacist = make_user("pharmacist", hospital_id=second.id)
+    assert client.get(f"/api/v1/pharmacy/orders/{order_id}", headers=auth(pharmacist)).status_code == 200
+    dispensed = client.post(f"/api/v1/pharmacy/orders/{order_id}/dispense", headers=auth(pharmacist))
+    assert dispensed.status_code == 200, dispensed.text
+    assert dispensed.json()["status"] == "dispensed"
+
+def test_patient_cannot_order_for_another_patient(client, db, hospitals, patient, make_user, auth):
+    user, _ = patient
+    other = db.query(Patient).filter(Patient.user_id != user.id).first()
+    response = client.post("/api/v1/pharmacy/orders", json={
+        "patient_id": other.id, "medicine_id": 1, "quantity": 1, "hospital_id": hospitals[0].id,
+    }, headers=auth(user))
+    assert response.status_code == 403
+
+def test_staff_without_a_hospital_see_nothing(client, db, hospitals, make_user, auth):
+    first, _ = hospitals
+    medicine = Medicine(name="Aspirin", price=5, stock=5)
+    db.add(medicine)
+    db.flush()
+    db.add(Inventory(medicine_id=medicine.id, quantity=5, batch_number="B1", expiry_date=date(2030, 1, 1), hospital_id=first.id))
+    db.commit()
+
+    admin = make_user("hospital_admin")
+    assert client.get(f"/api/v1/hospitals/{first.id}/staff", headers=auth(admin)).status_code == 403
+    pharmacist = make_user("pharmacist")
+    assert client.get("/api/v1/pharmacy/inventory", headers=auth(pharmacist)).json()["items"] == []
+    doctor = make_user("doctor")
+    response = client.post("/api/v1/lab/orders", json={"patient_id": 1, "test_id": 1}, headers=auth(doctor))
+    assert response.status_code == 403
+    # Admins still work across hospitals
+    assert client.get(f"/api/v1/hospitals/{first.id}/staff", headers=auth(make_user("admin"))).status_code == 200
+
+def test_lab_results_are_scoped_by_their_order(client, db, hospitals, patient, make_user, auth):
+    first, second = hospitals
+    _, record = patient
+    db.add(LabTest(name="CBC"))
+    db.flush()
+    order = LabOrder(patient_id=record.id, test_id=1, hospital_id=second.id)
+    db.add(order)
+    db.flush()
+    result = LabResult(order_id=order.id, result="Hb 140")
+    db.add(result)
+    db.commit()
+
+    elsewhere = make_user("lab_worker", hospital_id=first.id)
+    single = client.put(f"/api/v1/lab/results/{result.id}", json={"order_id": order.id, "result": "forged"}, headers=auth(elsewhere))
+    assert single.status_code == 404
+    batch = client.put("/api/v1/lab/results", json={"items": [{"id": result.id, "result": "forged"}]}, headers=auth(elsewhere))
+    assert batch.json()["items"][0]["status"] == "failed"
+
+    lab_worker = make_user("lab_worker", hospital_id=second.id)
+    assert client.put(f"/api/v1/lab/results/{result.id}", json={"order_id": order.id, "result": "Hb 150"}, headers=auth(lab_worker)).status_code == 200
+    db.expire_all()
+    assert db.get(LabResult, result.id).result == "Hb 150"
+
+def test_lab_orders_belong_to_the_ordering_staff_hospital(client, db, hospitals, patient, make_user, auth):
+    _, second = hospitals
+    _, record = patient
+    db.add(LabTest(name="CBC"))
+    db.commit()
+    doctor = make_user("doctor", hospital_id=second.id)
+    response = client.post("/api/v1/lab/orders", json={"patient_id": record.id, "test_id": 1}, headers=auth(doctor))
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    assert db.get(LabOrder, response.json()["id"]).hospital_id == second.id